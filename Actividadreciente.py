@@ -0,0 +1,79 @@
+# Actividadreciente.py
+"""
+Feed de actividad reciente del dashboard (buffer circular en memoria)
+
+SP_DS_ACTIVIDAD_RECIENTE hace UNION de postulantes, miembros e historial y
+ordena por fecha en cada vista del dashboard. Se siembra una vez al arrancar
+con ese SP y después cada escritura admin (usuarios, cursos, eventos,
+noticias, instructores) y cada registro web agrega su propio item: GET
+/actividad-reciente?top=N se responde desde memoria.
+
+Items: {tipo, descripcion, detalle, fecha} (mismo formato que el SP), el más
+nuevo primero. Cada item nuevo también se empuja por SSE ("actividad").
+
+⚠️ Con varios workers de uvicorn, cada uno solo ve las escrituras que atendió
+(más lo sembrado al arrancar).
+
+Config (.env):
+    ACTIVIDAD_MAX → 200 items por defecto (top mayor a eso → SP)
+"""
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from Conexionsql import get_connection, filas_como_dicts
+import Eventosdashboard
+
+ACTIVIDAD_MAX = int(os.getenv("ACTIVIDAD_MAX", "200"))
+
+_items: deque = deque(maxlen=ACTIVIDAD_MAX)
+_lock = threading.Lock()
+_listo = False
+
+
+def esta_listo() -> bool:
+    return _listo
+
+
+def sembrar() -> int:
+    """Carga inicial desde SP_DS_ACTIVIDAD_RECIENTE. Retorna cuántos items cargó."""
+    global _listo
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("EXEC SP_DS_ACTIVIDAD_RECIENTE ?", (ACTIVIDAD_MAX,))
+        filas = []
+        if cursor.description:
+            filas = filas_como_dicts(cursor)
+        conn.commit()
+
+    with _lock:
+        # lo registrado mientras corría el SP queda adelante (es más nuevo)
+        nuevos = list(_items)
+        _items.clear()
+        _items.extend(nuevos + filas)
+        _listo = True
+    return len(filas)
+
+
+def registrar(tipo: str, descripcion: str, detalle: str | None = None):
+    """Llamar DESPUÉS de una escritura exitosa."""
+    item = {
+        "tipo": tipo,
+        "descripcion": descripcion,
+        "detalle": detalle,
+        "fecha": datetime.now(),
+    }
+    with _lock:
+        _items.appendleft(item)
+    Eventosdashboard.publicar("actividad", item, afecta=["actividad-reciente"])
+
+
+def recientes(top: int = 15, tipo: str | None = None) -> list[dict]:
+    with _lock:
+        items = list(_items)
+    if tipo:
+        tipo = tipo.strip().lower()
+        items = [i for i in items if str(i.get("tipo") or "").lower() == tipo]
+    return items[:max(top, 0)]
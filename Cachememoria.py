@@ -0,0 +1,51 @@
+# Cachememoria.py
+"""
+Cache en memoria con expiración (TTL) y tope de entradas (LRU)
+Thread-safe: los endpoints síncronos de FastAPI corren en el threadpool.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_SIN_VALOR = object()
+
+
+class CacheTTL:
+    def __init__(self, ttl: float, maximo: int = 1000):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._datos: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, defecto=None):
+        """Retorna el valor vigente o `defecto` si no existe / expiró."""
+        with self._lock:
+            entrada = self._datos.get(clave, _SIN_VALOR)
+            if entrada is _SIN_VALOR:
+                return defecto
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return defecto
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor, ttl: float | None = None):
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._datos[clave] = (expira, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
@@ -1,18 +1,46 @@
+import os
 import time
-import requests
-import hashlib
+import json
 import pyodbc
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from Conexionsql import get_connection
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
+from Descargafotos import Descargador
+from Extractorfacebook import clave_texto, recorrer
+from Fuentesfacebook import crear_fuente
+import Syncfacebook
 
 # =============================================
 # HELPER: Descargar imagen como bytes
 # =============================================
+def descargar_fotos(urls: list[str | None], metricas: dict | None = None) -> dict[str, bytes | None]:
+    """
+    Descarga las imágenes de varios posts en paralelo (ver Descargafotos.py).
+    Retorna url → bytes (None si falla, no es válida o supera el tope).
+    Si se pasa `metricas`, suma ahí bytes_fotos / fotos_nuevas / fotos_sin_cambios / fotos_error.
+    """
+    descargador = Descargador()
+    try:
+        fotos = descargador.descargar_varias(urls)
+    finally:
+        descargador.cerrar()
+
+    resultado = {}
+    for url, foto in fotos.items():
+        if foto.ok:
+            print(f"✅ Imagen {'descargada' if foto.estado == 'NUEVA' else 'sin cambios (304)'}: {foto.tamano} bytes")
+        elif foto.estado != "SIN_URL":
+            print(f"⚠️ No se pudo descargar la imagen ({foto.estado}): {foto.error or foto.tamano}")
+        resultado[url] = foto.leer()
+        if metricas is not None:
+            clave = {"NUEVA": "fotos_nuevas", "SIN_CAMBIOS": "fotos_sin_cambios", "SIN_URL": None}.get(foto.estado, "fotos_error")
+            if clave:
+                metricas[clave] = metricas.get(clave, 0) + 1
+            if foto.estado == "NUEVA":
+                metricas["bytes_fotos"] = metricas.get("bytes_fotos", 0) + foto.tamano
+    return resultado
+
+
 def descargar_foto_bytes(url: str) -> bytes | None:
     """
     Descarga la imagen desde la URL de Facebook y retorna los bytes.
@@ -21,118 +49,224 @@ def descargar_foto_bytes(url: str) -> bytes | None:
     if not url or url == "Sin imagen" or not url.startswith("http"):
         print("ℹ️ No hay imagen válida para descargar.")
         return None
+    return descargar_fotos([url]).get(url)
+
+
+# =============================================
+# CONFIGURACIÓN
+# =============================================
+FB_MAX_POSTS = int(os.getenv("FB_MAX_POSTS", "25"))   # tope por corrida (primera vez / watermark perdido)
+# selenium | http | fixture | auto (http y, si no alcanza, selenium). Ver Fuentesfacebook.py
+FB_FUENTE    = os.getenv("FB_FUENTE", "selenium")
+
 
+# =============================================
+# TIEMPOS POR FASE
+# =============================================
+class _Fases:
+    """Tiempo por fase de la corrida (se loguea y va en el resultado)."""
+
+    def __init__(self):
+        self.ms: dict[str, int] = {}
+
+    @contextmanager
+    def medir(self, nombre: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ms[nombre] = self.ms.get(nombre, 0) + int((time.perf_counter() - inicio) * 1000)
+
+    def cronometrar(self, nombre: str, iterable):
+        """Como medir(), pero solo cuenta el tiempo de producir cada elemento (no el de quien lo consume)."""
+        iterador = iter(iterable)
+        while True:
+            with self.medir(nombre):
+                elemento = next(iterador, StopIteration)
+            if elemento is StopIteration:
+                return
+            yield elemento
+
+    def resumen(self) -> str:
+        return " | ".join(f"{k}: {v / 1000:.1f}s" for k, v in self.ms.items())
+
+
+# =============================================
+# LECTURA DEL FEED (fuente + extractor)
+# =============================================
+def _leer_feed(nombre_fuente: str, sincronizados: set[str], fases: _Fases) -> tuple[list[dict], bool, int]:
+    """Retorna (posts, llegó_a_lo_sincronizado, bytes de HTML leídos)."""
+    fuente = crear_fuente(nombre_fuente)
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        with fases.medir("navegador" if nombre_fuente == "selenium" else "conexion"):
+            fuente.abrir()
+        # carga = navegar / scroll / bajar el HTML; extraccion = parsear los posts
+        carga_previa = fases.ms.get("carga", 0)
+        with fases.medir("extraccion"):
+            posts, completo = recorrer(fases.cronometrar("carga", fuente.paginas()), sincronizados, FB_MAX_POSTS)
+        fases.ms["extraccion"] -= fases.ms["carga"] - carga_previa
+    finally:
+        fuente.cerrar()
+    return posts, completo, fuente.bytes_html
 
-        foto_bytes = response.content
-        print(f"✅ Imagen descargada: {len(foto_bytes)} bytes")
-        return foto_bytes
 
+def _obtener_posts(sincronizados: set[str], fases: _Fases) -> tuple[list[dict], bool, int, str]:
+    """Según FB_FUENTE. En "auto" se usa HTTP si trajo posts completos; si no, Selenium."""
+    if FB_FUENTE != "auto":
+        return (*_leer_feed(FB_FUENTE, sincronizados, fases), FB_FUENTE)
+
+    try:
+        posts, completo, leidos = _leer_feed("http", sincronizados, fases)
+        if (posts or completo) and not any(p["truncado"] for p in posts):
+            return posts, completo, leidos, "http"
+        print("ℹ️ La fuente HTTP no alcanzó (sin posts o textos truncados), usando Selenium...")
     except Exception as e:
-        print(f"⚠️ No se pudo descargar la imagen: {e}")
-        return None
+        print(f"ℹ️ La fuente HTTP falló ({e}), usando Selenium...")
+        leidos = 0
+    posts, completo, leidos_selenium = _leer_feed("selenium", sincronizados, fases)
+    return posts, completo, leidos + leidos_selenium, "selenium"
+
+
+# =============================================
+# GUARDADO (una sola transacción)
+# =============================================
+def _publicaciones_existentes(conn, ids: list[str]) -> set[str]:
+    if not ids:
+        return set()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT idpublicacion FROM publicaciones WHERE idpublicacion IN ({','.join('?' * len(ids))})",
+        ids,
+    )
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def _publicaciones_legado(conn) -> dict[str, str]:
+    """clave_texto → idpublicacion de lo guardado desde Facebook (filas del scraper anterior, sin id de post)."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT idpublicacion, contenido FROM publicaciones WHERE creado_por = 'Facebook'")
+    return {clave_texto(fila[1]): fila[0] for fila in cursor.fetchall()}
+
+
+SQL_UPSERT_PUBLICACION = """
+    EXEC SP_INSERTAR_ACTUALIZAR_PUBLICACION
+        @idpublicacion = ?, @titulo = ?, @contenido = ?, @foto = ?, @fecha = ?, @creado_por = 'Facebook'
+"""
+
+# Posts por batch: 5 parámetros c/u (tope 2100) y fotos de hasta cientos de KB por post
+LOTE_PUBLICACIONES = 20
+
+
+def _guardar_publicaciones(conn, posts: list[dict]):
+    """Upsert de todos los posts nuevos en batches de N EXEC (un round trip c/u); commit único (o rollback de todo)."""
+    cursor = conn.cursor()
+    ahora = datetime.now()
+    # del más viejo al más nuevo: la fecha de recolección respeta el orden del feed
+    ordenados = list(reversed(posts))
+    try:
+        for i in range(0, len(ordenados), LOTE_PUBLICACIONES):
+            lote = ordenados[i:i + LOTE_PUBLICACIONES]
+            sql = "SET NOCOUNT ON;\n" + ";\n".join([SQL_UPSERT_PUBLICACION] * len(lote))
+            params = [
+                valor
+                for j, p in enumerate(lote, start=i)
+                for valor in (p["idpublicacion"], p["titulo"], p["contenido"], p["foto"],
+                              ahora + timedelta(milliseconds=10 * j))
+            ]
+            cursor.execute(sql, params)
+            while cursor.nextset():   # consumir los resultados de cada EXEC
+                pass
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
 
 
 # =============================================
 # FUNCIÓN PRINCIPAL
 # =============================================
-def escanear_y_guardar_db():
-    print(f"🚀 [{datetime.now()}] Iniciando extracción reforzada...")
-    
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-notifications")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
-
-    driver = None
+def escanear_y_guardar_db() -> dict:
+    """
+    Sincronización incremental: todos los posts publicados desde la última corrida.
+    Retorna un resumen:
+    {"estado": "OK" | "SIN_POSTS" | "ERROR", "fuente", "revisados", "guardadas", "omitidas",
+     "bytes_html", "bytes_fotos", "fotos_nuevas", "fotos_sin_cambios", "fotos_error", "fases_ms", "error"}
+    """
+    print(f"🚀 [{datetime.now()}] Iniciando sincronización incremental...")
+    resultado = {"estado": "SIN_POSTS", "revisados": 0, "guardadas": 0, "omitidas": 0, "bytes_fotos": 0}
+    fases = _Fases()
     conn = None
 
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        driver.get("https://www.facebook.com/paramedicos.pe")
-        print("⏳ Esperando carga inicial (10s)...")
-        time.sleep(10)
-
-        # --- EXPANDIR 'VER MÁS' ---
-        try:
-            print("🔍 Expandiendo contenido...")
-            boton = driver.find_element(By.XPATH, "//div[contains(text(), 'Ver más')]")
-            driver.execute_script("arguments[0].click();", boton)
-            time.sleep(3)
-        except:
-            print("ℹ️ Post corto o ya expandido.")
+        sincronizados = Syncfacebook.ids_sincronizados()
+        print(f"🔖 Posts ya sincronizados (tope del recorrido): {len(sincronizados) or '(ninguno)'}")
 
         # --- CAPTURA DE DATOS ---
-        posts = driver.find_elements(By.XPATH, "//div[@role='article']")
-        
-        if posts:
-            post = posts[0]
-            try:
-                # Extraer texto
-                texto_raw = post.find_element(By.XPATH, ".//div[@data-ad-comet-preview='message']").text
-                contenido = texto_raw.strip()
-
-                # Extraer URL de foto
-                foto_url = None
-                try:
-                    img_elem = post.find_element(By.XPATH, ".//img[contains(@src, 'scontent')]")
-                    foto_url = img_elem.get_attribute('src')
-                    print(f"🖼️ URL de imagen encontrada: {foto_url[:80]}...")
-                except:
-                    print("ℹ️ No se encontró imagen en el post.")
-
-                # ✅ Descargar imagen como bytes (antes se guardaba la URL como texto)
-                foto_bytes = descargar_foto_bytes(foto_url)
-                foto_varbinary = pyodbc.Binary(foto_bytes) if foto_bytes else None
-
-                # Metadatos
-                id_pub = hashlib.md5(contenido.encode('utf-8')).hexdigest()
-                titulo_auto = contenido[:80] + ('...' if len(contenido) > 80 else '')
-                fecha_recolecta = datetime.now()
-
-                # --- GUARDAR EN BASE DE DATOS ---
-                print(f"📡 Conectando a SQL Server...")
-                conn = get_connection()
-                cursor = conn.cursor()
-
-                cursor.execute("""
-                    EXEC SP_INSERTAR_ACTUALIZAR_PUBLICACION 
-                        @idpublicacion = ?, 
-                        @titulo = ?, 
-                        @contenido = ?, 
-                        @foto = ?, 
-                        @fecha = ?,
-                        @creado_por = 'Facebook'
-                """, (id_pub, titulo_auto, contenido, foto_varbinary, fecha_recolecta))
-                
-                conn.commit()
-                print(f"✅ Éxito: Post '{id_pub[:8]}' guardado con {'foto' if foto_varbinary else 'sin foto'}.")
-
-            except Exception as e:
-                print(f"⚠️ Error al extraer datos del post: {e}")
-        else:
-            print("❌ No se encontraron publicaciones.")
+        posts, completo, resultado["bytes_html"], resultado["fuente"] = _obtener_posts(sincronizados, fases)
+        truncados = [p for p in posts if p["truncado"]] if resultado["fuente"] != "selenium" else []
+        if truncados:
+            # sin navegador no se puede expandir: se omiten y el watermark no avanza (la próxima corrida los reintenta)
+            print(f"⚠️ {len(truncados)} posts con texto truncado ('Ver más'), se omiten.")
+            posts = [p for p in posts if not p["truncado"]]
+        resultado["revisados"] = len(posts)
+        if not posts:
+            print("ℹ️ No hay publicaciones nuevas." if completo else "❌ No se encontraron publicaciones.")
+            return resultado
+        if sincronizados and not completo:
+            print(f"⚠️ No se llegó a los posts ya sincronizados (tope FB_MAX_POSTS={FB_MAX_POSTS}): "
+                  f"el watermark no avanza.")
+
+        # --- OMITIR YA GUARDADOS (por id de post y por hash de contenido), sin descargar fotos ---
+        print(f"📡 Conectando a SQL Server...")
+        conn = get_connection()
+        # 1) id del post (posts_vistos) 2) md5 del texto 3) texto sin espacios (filas del scraper anterior)
+        ya_vistos = Syncfacebook.posts_vistos([p["id_post"] for p in posts if p["id_post"]])
+        candidatos = [p for p in posts if not (p["id_post"] and p["id_post"] in ya_vistos)]
+        existentes = _publicaciones_existentes(conn, [p["idpublicacion"] for p in candidatos])
+        nuevos = [p for p in candidatos if p["idpublicacion"] not in existentes]
+        if nuevos:
+            legado = _publicaciones_legado(conn)
+            ids_legado = set(legado.values())
+            for p in nuevos:
+                # la fila vieja conserva su idpublicacion (posts_vistos queda apuntando a ella)
+                p["idpublicacion"] = legado.get(clave_texto(p["contenido"]), p["idpublicacion"])
+            nuevos = [p for p in nuevos if p["idpublicacion"] not in ids_legado]
+        resultado["omitidas"] = len(posts) - len(nuevos)
+
+        with fases.medir("fotos"):
+            fotos = descargar_fotos([p["foto_url"] for p in nuevos], resultado)
+            for p in nuevos:
+                foto_bytes = fotos.get(p["foto_url"])
+                p["foto"] = pyodbc.Binary(foto_bytes) if foto_bytes else None
+                p["titulo"] = p["contenido"][:80] + ('...' if len(p["contenido"]) > 80 else '')
+
+        # --- GUARDAR EN BASE DE DATOS ---
+        with fases.medir("bd"):
+            if nuevos:
+                _guardar_publicaciones(conn, nuevos)
+            # Los posts pasan a ser tope del recorrido solo si no quedó un hueco: se llegó a lo ya
+            # sincronizado (o es la primera corrida) y no se omitieron posts truncados
+            avanza = not truncados and (completo or not sincronizados)
+            Syncfacebook.marcar_sincronizados(posts, continuo=avanza)
+
+        resultado.update(estado="OK", guardadas=len(nuevos))
+        print(f"✅ Éxito: {len(nuevos)} publicaciones nuevas, {resultado['omitidas']} ya existían.")
 
     except Exception as e:
         print(f"❌ Error crítico: {e}")
+        resultado.update(estado="ERROR", error=str(e))
     
     finally:
         if conn:
             conn.close()
-        if driver:
-            driver.quit()
+        resultado["fases_ms"] = fases.ms
+        print(f"⏱️ Tiempos: {fases.resumen()}")
         print("🏁 Navegador y conexiones cerradas correctamente.")
 
+    return resultado
 
+# Punto de entrada del proceso aislado (ver Ejecutorscraper.py):
+# la ÚLTIMA línea de stdout es el resultado para el API.
 if __name__ == "__main__":
-    escanear_y_guardar_db()
\ No newline at end of file
+    resultado = escanear_y_guardar_db()
+    print("RESULTADO_JSON:" + json.dumps(resultado, default=str), flush=True)
\ No newline at end of file
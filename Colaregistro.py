@@ -0,0 +1,206 @@
+# Colaregistro.py
+"""
+Cola write-behind para el registro web de postulantes (modo opcional)
+
+Con REGISTRO_ASINCRONO=1 cada postulante validado se guarda primero en un
+journal local (SQLite WAL) y se responde al instante con un tracking_id.
+Un hilo en segundo plano drena la cola en lotes hacia SP_REGISTRAR_POSTULANTE_WEB,
+reintentando con backoff si la BD / el pool no responde.
+
+Estados: PENDIENTE → PROCESANDO → REGISTRADO | RECHAZADO (el SP devolvió ERROR)
+                                 → ERROR (se agotaron los reintentos)
+
+Mientras un lote está PROCESANDO, un latido renueva tomado_en cada
+PROCESANDO_MAX / 4 seg.; solo se reclaman lotes cuyo worker dejó de latir.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+from typing import Callable
+
+from Journallocal import abrir_sqlite
+
+ACTIVO         = os.getenv("REGISTRO_ASINCRONO", "0") == "1"
+LOTE           = int(os.getenv("REGISTRO_COLA_LOTE", "100"))
+MAX_INTENTOS   = int(os.getenv("REGISTRO_COLA_MAX_INTENTOS", "8"))
+INTERVALO      = float(os.getenv("REGISTRO_COLA_INTERVALO", "2"))
+PROCESANDO_MAX = float(os.getenv("REGISTRO_COLA_LEASE", "900"))  # seg. sin latido → worker caído, se reclama
+
+_ARCHIVO = "cola_registro.db"
+
+
+def _db():
+    db = abrir_sqlite(_ARCHIVO)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS cola_registro (
+            tracking_id     TEXT PRIMARY KEY,
+            payload         TEXT NOT NULL,
+            estado          TEXT NOT NULL,
+            intentos        INTEGER NOT NULL DEFAULT 0,
+            proximo_intento REAL NOT NULL,
+            tomado_en       REAL,
+            resultado       TEXT,
+            creado          TEXT NOT NULL,
+            actualizado     TEXT NOT NULL
+        )
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS ix_cola_estado ON cola_registro (estado, proximo_intento)")
+    return db
+
+
+def encolar(payload: dict) -> str:
+    """Guarda el postulante en el journal (fsync) y retorna el tracking_id."""
+    tracking_id = uuid.uuid4().hex
+    ahora = datetime.now().isoformat()
+    with closing(_db()) as db:
+        db.execute(
+            "INSERT INTO cola_registro (tracking_id, payload, estado, proximo_intento, creado, actualizado) "
+            "VALUES (?, ?, 'PENDIENTE', ?, ?, ?)",
+            (tracking_id, json.dumps(payload, default=str), time.time(), ahora, ahora),
+        )
+    return tracking_id
+
+
+def consultar(tracking_id: str) -> dict | None:
+    with closing(_db()) as db:
+        row = db.execute(
+            "SELECT tracking_id, estado, intentos, resultado, creado, actualizado "
+            "FROM cola_registro WHERE tracking_id = ?",
+            (tracking_id,),
+        ).fetchone()
+    if not row:
+        return None
+    data = dict(row)
+    data["resultado"] = json.loads(data["resultado"]) if data["resultado"] else None
+    return data
+
+
+def _tomar_lote(db) -> list:
+    """Reclama hasta LOTE pendientes de forma atómica (varios workers comparten el archivo)."""
+    ahora = time.time()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        filas = db.execute(
+            "SELECT tracking_id, payload, intentos FROM cola_registro "
+            "WHERE (estado = 'PENDIENTE' AND proximo_intento <= ?) "
+            "   OR (estado = 'PROCESANDO' AND tomado_en < ?) "
+            "ORDER BY creado LIMIT ?",
+            (ahora, ahora - PROCESANDO_MAX, LOTE),
+        ).fetchall()
+        db.executemany(
+            "UPDATE cola_registro SET estado = 'PROCESANDO', tomado_en = ? WHERE tracking_id = ?",
+            [(ahora, f["tracking_id"]) for f in filas],
+        )
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    return filas
+
+
+def _latir(tracking_ids: list[str], fin: threading.Event):
+    """Renueva tomado_en del lote mientras se procesa (hasta que se marque `fin`)."""
+    while not fin.wait(PROCESANDO_MAX / 4):
+        try:
+            with closing(_db()) as db:
+                db.executemany(
+                    "UPDATE cola_registro SET tomado_en = ? WHERE tracking_id = ? AND estado = 'PROCESANDO'",
+                    [(time.time(), t) for t in tracking_ids],
+                )
+        except Exception as e:
+            print(f"⚠️ Cola de registro: no se pudo renovar el lote ({e})")
+
+
+def _para_reintento(f, mensaje: str, ahora: str) -> tuple:
+    """UPDATE de una fila que vuelve a PENDIENTE con backoff exponencial (o ERROR si se agotó)."""
+    intentos = f["intentos"] + 1
+    estado = "ERROR" if intentos >= MAX_INTENTOS else "PENDIENTE"
+    espera = min(5 * 2 ** intentos, 600)
+    return (estado, intentos, time.time() + espera, json.dumps({"mensaje": mensaje}), ahora, f["tracking_id"])
+
+
+def procesar_pendientes(procesar: Callable[[list[dict], list[int]], list[dict]]) -> int:
+    """
+    Drena un lote. `procesar` recibe los payloads y cuántos intentos previos
+    tiene cada uno, y retorna un resultado por payload ({"status": "SUCCESS"|"ERROR", ...}).
+    Los resultados con "reintentar": True (no llegaron a ejecutarse) vuelven a
+    PENDIENTE; el resto queda terminado. Retorna cuántos se tomaron.
+    """
+    with closing(_db()) as db:
+        filas = _tomar_lote(db)
+        if not filas:
+            return 0
+
+        fin = threading.Event()
+        threading.Thread(target=_latir, args=([f["tracking_id"] for f in filas], fin),
+                         name="cola-registro-latido", daemon=True).start()
+        try:
+            resultados = procesar([json.loads(f["payload"]) for f in filas], [f["intentos"] for f in filas])
+        except Exception as e:
+            # BD caída / pool agotado antes de registrar nada → reintento con backoff exponencial
+            print(f"⚠️ Cola de registro: lote de {len(filas)} falló ({e}), se reintentará.")
+            ahora = datetime.now().isoformat()
+            db.executemany(
+                "UPDATE cola_registro SET estado = ?, intentos = ?, proximo_intento = ?, "
+                "resultado = ?, actualizado = ?, tomado_en = NULL WHERE tracking_id = ?",
+                [_para_reintento(f, str(e), ahora) for f in filas],
+            )
+            return len(filas)
+        finally:
+            fin.set()
+
+        ahora = datetime.now().isoformat()
+        terminados, reintentos = [], []
+        for f, res in zip(filas, resultados):
+            if res.get("reintentar"):
+                reintentos.append(_para_reintento(f, res.get("mensaje", ""), ahora))
+                continue
+            estado = "REGISTRADO" if res.get("status") == "SUCCESS" else "RECHAZADO"
+            terminados.append((estado, f["intentos"] + 1, json.dumps(res, default=str), ahora, f["tracking_id"]))
+        db.executemany(
+            "UPDATE cola_registro SET estado = ?, intentos = ?, resultado = ?, actualizado = ?, "
+            "tomado_en = NULL WHERE tracking_id = ?",
+            terminados,
+        )
+        db.executemany(
+            "UPDATE cola_registro SET estado = ?, intentos = ?, proximo_intento = ?, "
+            "resultado = ?, actualizado = ?, tomado_en = NULL WHERE tracking_id = ?",
+            reintentos,
+        )
+        print(f"📥 Cola de registro: {len(terminados)} postulantes procesados"
+              + (f", {len(reintentos)} para reintento." if reintentos else "."))
+        return len(filas)
+
+
+_worker: threading.Thread | None = None
+_detener = threading.Event()
+
+
+def iniciar_worker(procesar: Callable[[list[dict], list[int]], list[dict]]):
+    """Arranca (una sola vez por proceso) el hilo que drena la cola."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+
+    def _bucle():
+        print("📥 Worker de cola de registro activo.")
+        while not _detener.is_set():
+            try:
+                tomados = procesar_pendientes(procesar)
+            except Exception as e:
+                print(f"❌ Error en worker de cola de registro: {e}")
+                tomados = 0
+            if tomados < LOTE:
+                _detener.wait(INTERVALO)
+
+    _detener.clear()
+    _worker = threading.Thread(target=_bucle, name="cola-registro", daemon=True)
+    _worker.start()
+
+
+def detener_worker():
+    _detener.set()
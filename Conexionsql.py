@@ -1,8 +1,15 @@
 import os
+import re
+import time
 import pyodbc
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 
+import Consultaslentas
+import Estadisticassql
+import Metricas
+
 load_dotenv()
 
 DB_SERVER = os.getenv("DB_SERVER", "127.0.0.1")
@@ -10,6 +17,10 @@ DB_NAME   = os.getenv("DB_NAME", "DB_CGPVP2")
 DB_USER   = os.getenv("DB_USER")        # ejemplo: sa o tu usuario
 DB_PASS   = os.getenv("DB_PASS")        # tu password
 DB_PORT   = os.getenv("DB_PORT", "1433")
+METRICAS_SQL = os.getenv("METRICAS_SQL", "1") == "1"   # histogramas por SP (ver Metricas.py)
+DB_POOL_SIZE     = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_OVERFLOW = int(os.getenv("DB_POOL_OVERFLOW", "20"))
+DB_POOL_TIMEOUT  = float(os.getenv("DB_POOL_TIMEOUT", "30"))
 
 def _crear_conexion():
     return pyodbc.connect(
@@ -23,29 +34,275 @@ def _crear_conexion():
         "Connection Timeout=30;"
     )
 
-_pool = QueuePool(
-    _crear_conexion,
-    pool_size=10,
-    max_overflow=20,
-    timeout=30,
-    recycle=1800,
-)
+def _crear_pool(creador, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_POOL_OVERFLOW):
+    return QueuePool(
+        creador,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        timeout=DB_POOL_TIMEOUT,
+        recycle=1800,
+    )
+
+
+_pool = _crear_pool(_crear_conexion)
+
+
+def usar_creador(creador, pool_size: int | None = None, max_overflow: int | None = None):
+    """
+    Reemplaza cómo se crean las conexiones (benchmarks/: driver falso sin SQL Server).
+    Todo lo demás (pool, cursor medido, métricas) sigue igual. Llamar antes de servir requests.
+    """
+    global _pool
+    anterior = _pool
+    _pool = _crear_pool(
+        creador,
+        DB_POOL_SIZE if pool_size is None else pool_size,
+        DB_POOL_OVERFLOW if max_overflow is None else max_overflow,
+    )
+    anterior.dispose()
+
+
+# =============================================
+# MÉTRICAS POR SP (GET /metrics)
+# =============================================
+_duracion = Metricas.histograma(
+    "sql_sp_duracion_segundos", "Tiempo por SP y fase (execute / fetch / serialize)", ("sp", "ruta", "fase"))
+_filas = Metricas.histograma(
+    "sql_sp_filas", "Filas devueltas por ejecución", ("sp", "ruta"), Metricas.BUCKETS_FILAS)
+_bytes = Metricas.histograma(
+    "sql_sp_bytes", "Bytes aproximados devueltos por ejecución", ("sp", "ruta"), Metricas.BUCKETS_BYTES)
+_errores = Metricas.contador(
+    "sql_sp_errores_total", "Ejecuciones con error, por fase", ("sp", "ruta", "fase"))
+_pool_conexiones = Metricas.gauge(
+    "sql_pool_conexiones", "Conexiones del pool por estado", ("estado",))
+_pool_espera = Metricas.histograma(
+    "sql_pool_espera_segundos", "Espera para obtener una conexión del pool")
+_pool_timeouts = Metricas.contador(
+    "sql_pool_timeouts_total", "Veces que no hubo conexión libre a tiempo")
+
+_RE_SP = re.compile(r"^\s*EXEC(?:UTE)?\s+(?:@\w+\s*=\s*)?([\w.\[\]]+)", re.IGNORECASE)
+_RE_PREAMBULO = re.compile(r"^\s*(?:SET\s+\w+\s+(?:ON|OFF)\s*;?\s*)+", re.IGNORECASE)
+
+
+def _nombre_consulta(sql: str) -> str:
+    """'EXEC dbo.SP_GU_LISTAR ?' → 'SP_GU_LISTAR' (también tras 'SET NOCOUNT ON;'); SQL suelto → 'sql:SELECT'."""
+    sql = _RE_PREAMBULO.sub("", sql, count=1)
+    m = _RE_SP.match(sql)
+    if m:
+        return m.group(1).replace("[", "").replace("]", "").rsplit(".", 1)[-1]
+    return "sql:" + (sql.split(None, 1) or ["?"])[0].upper()
+
+
+def _tamano(filas) -> int:
+    total = 0
+    for fila in filas:
+        for valor in fila:
+            if valor is None:
+                continue
+            total += len(valor) if isinstance(valor, (str, bytes, bytearray)) else 8
+    return total
+
+
+def _metricas_pool():
+    _pool_conexiones.fijar("en_uso", valor=_pool.checkedout())
+    _pool_conexiones.fijar("libres", valor=_pool.checkedin())
+    _pool_conexiones.fijar("overflow", valor=max(_pool.overflow(), 0))
+    _pool_conexiones.fijar("tamano", valor=_pool.size())
+
+
+Metricas.registrar_colector(_metricas_pool)
+
+
+class _Medicion:
+    """Lo acumulado de UNA sentencia (todos sus result sets) hasta la siguiente o el close."""
+    __slots__ = ("sp", "ruta", "sql", "params", "espera", "ejecutar", "fetch", "fetches",
+                 "serializar", "serializado", "filas", "bytes", "error", "mensajes", "estadisticas")
+
+    def __init__(self, sp: str, ruta: str, sql: str, params: tuple, espera: float):
+        self.sp, self.ruta, self.sql, self.params, self.espera = sp, ruta, sql, params, espera
+        self.ejecutar = self.fetch = self.serializar = 0.0
+        self.fetches = self.filas = self.bytes = 0
+        self.serializado = False
+        self.error = None
+        self.mensajes = None       # lista → modo STATISTICS IO/TIME (ver Estadisticassql.py)
+        self.estadisticas = None
+
+    def registrar(self):
+        Consultaslentas.evaluar(self.sp, self.ruta, self.sql, self.params, self.espera,
+                                self.ejecutar, self.fetch, self.filas, self.bytes, self.error,
+                                self.estadisticas)
+        if self.fetches:
+            _duracion.observar(self.sp, self.ruta, "fetch", valor=self.fetch)
+        if self.serializado:
+            _duracion.observar(self.sp, self.ruta, "serialize", valor=self.serializar)
+        _filas.observar(self.sp, self.ruta, valor=self.filas)
+        _bytes.observar(self.sp, self.ruta, valor=self.bytes)
+
+
+class _CursorMedido:
+    """Cursor de pyodbc con tiempos por SP; todo lo demás pasa directo al cursor real."""
+
+    def __init__(self, cursor, espera: float = 0.0):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_actual", None)
+        object.__setattr__(self, "_espera", espera)   # lo que costó sacar la conexión del pool
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _terminar(self):
+        medicion = self._actual
+        if medicion is not None:
+            object.__setattr__(self, "_actual", None)
+            if medicion.mensajes is not None:
+                self._cerrar_estadisticas(medicion)
+            medicion.registrar()
+
+    def _mensajes(self, medicion):
+        if medicion is not None and medicion.mensajes is not None:
+            medicion.mensajes.extend(getattr(self._cursor, "messages", None) or [])
+
+    def _cerrar_estadisticas(self, medicion):
+        """Lee los result sets que quedaron (los totales llegan al final) y apaga STATISTICS."""
+        try:
+            while self._cursor.nextset():
+                self._mensajes(medicion)
+            self._mensajes(medicion)
+        except Exception:
+            pass
+        try:
+            self._cursor.execute(Estadisticassql.DESACTIVAR)
+        except Exception as e:
+            print(f"⚠️ No se pudo apagar SET STATISTICS en la conexión: {e}")
+        medicion.estadisticas = Estadisticassql.parsear(medicion.mensajes)
+        Estadisticassql.agregar(medicion.sp, medicion.estadisticas)
+
+    def execute(self, sql, *params):
+        self._terminar()
+        medicion = _Medicion(_nombre_consulta(sql), Metricas.origen_actual(), sql, params, self._espera)
+        object.__setattr__(self, "_actual", medicion)
+        if Estadisticassql.activo():
+            try:
+                self._cursor.execute(Estadisticassql.ACTIVAR)
+                medicion.mensajes = []
+            except Exception as e:
+                print(f"⚠️ No se pudo activar SET STATISTICS: {e}")
+        inicio = time.perf_counter()
+        try:
+            resultado = self._cursor.execute(sql, *params)
+        except Exception as e:
+            _errores.inc(medicion.sp, medicion.ruta, "execute")
+            medicion.error = Consultaslentas.resumir_error(e)
+            raise
+        finally:
+            segundos = time.perf_counter() - inicio
+            medicion.ejecutar = segundos
+            _duracion.observar(medicion.sp, medicion.ruta, "execute", valor=segundos)
+            Metricas.sumar_tiempo("db-exec", segundos)
+        self._mensajes(medicion)
+        return self if resultado is self._cursor else resultado
+
+    def nextset(self):
+        resultado = self._cursor.nextset()
+        self._mensajes(self._actual)
+        return resultado
+
+    def _leer(self, metodo, *args, una: bool = False):
+        medicion = self._actual
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(*args)
+        except Exception as e:
+            if medicion:
+                _errores.inc(medicion.sp, medicion.ruta, "fetch")
+                medicion.error = Consultaslentas.resumir_error(e)
+            raise
+        finally:
+            segundos = time.perf_counter() - inicio
+            Metricas.sumar_tiempo("db-fetch", segundos)
+            if medicion:
+                medicion.fetch += segundos
+                medicion.fetches += 1
+        if medicion and resultado is not None:
+            filas = [resultado] if una else resultado
+            medicion.filas += len(filas)
+            medicion.bytes += _tamano(filas)
+        return resultado
+
+    def fetchone(self):
+        return self._leer(self._cursor.fetchone, una=True)
+
+    def fetchall(self):
+        return self._leer(self._cursor.fetchall)
+
+    def fetchmany(self, *args):
+        return self._leer(self._cursor.fetchmany, *args)
+
+    def close(self):
+        self._terminar()
+        self._cursor.close()
+
+
+def filas_como_dicts(cursor) -> list[dict]:
+    """fetchall → [{columna: valor}, ...] ([] si la sentencia no devolvió filas). La conversión cuenta como "serialize"."""
+    if not cursor.description:
+        return []
+    filas = cursor.fetchall()
+    inicio = time.perf_counter()
+    columnas = [c[0] for c in cursor.description]
+    resultado = [dict(zip(columnas, fila)) for fila in filas]
+    segundos = time.perf_counter() - inicio
+    Metricas.sumar_tiempo("db-serial", segundos)
+    medicion = cursor._actual if isinstance(cursor, _CursorMedido) else None
+    if medicion:
+        medicion.serializar += segundos
+        medicion.serializado = True
+    return resultado
+
 
 class _ConexionPool:
     def __init__(self):
-        self._fairy = _pool.connect()
+        inicio = time.perf_counter()
+        try:
+            self._fairy = _pool.connect()
+        except PoolTimeoutError:
+            _pool_timeouts.inc()
+            raise
+        finally:
+            segundos = time.perf_counter() - inicio
+            _pool_espera.observar(valor=segundos)
+            Metricas.sumar_tiempo("db-espera", segundos)
+        self._espera = segundos
+        self._cursores = []
 
     def __getattr__(self, name):
         return getattr(self._fairy, name)
 
+    def cursor(self):
+        cursor = self._fairy.cursor()
+        if not METRICAS_SQL:
+            return cursor
+        cursor = _CursorMedido(cursor, self._espera)
+        self._cursores.append(cursor)
+        return cursor
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._fairy.close()
+        self.close()
         return False
 
     def close(self):
+        for cursor in self._cursores:
+            cursor._terminar()
+        self._cursores.clear()
         self._fairy.close()
 
 def get_connection():
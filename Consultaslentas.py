@@ -0,0 +1,189 @@
+# Consultaslentas.py
+"""
+Log de llamadas lentas a la BD (DATOS_LOCALES_DIR/sql_lento-<pid>.log, JSON por línea)
+
+Lo alimenta Conexionsql al terminar cada sentencia. Se escribe si:
+    - tardó ≥ SQL_LENTO_MS (execute + fetch)          → "motivo": "lento"
+    - falló                                          → "motivo": "error"
+    - cae en la muestra SQL_MUESTREO (0.01 = 1%)      → "motivo": "muestra"
+      (la línea base para comparar contra las lentas)
+
+Parámetros SIN datos personales: los textos van como longitud + hash
+(HMAC con SQL_LENTO_SAL; sin sal se usa una al azar por proceso, así los
+hashes solo se pueden comparar dentro de la misma corrida), las fechas solo
+como tipo ("date" / "datetime": pueden ser de nacimiento). Números y
+booleanos van tal cual (ids, páginas: lo que explica la lentitud).
+Los SP de login / OTP / contraseñas no registran parámetros. De los errores
+solo va la clase, el SQLSTATE y el número de SQL Server: el mensaje puede
+citar valores (2627 / 2601 muestran la clave duplicada: DNI, email).
+
+Un archivo rotativo por worker (rotar un archivo compartido entre procesos
+pierde líneas): SQL_LENTO_MB por archivo, SQL_LENTO_ARCHIVOS de respaldo; los
+que no se escriben hace SQL_LENTO_DIAS (workers anteriores) se borran.
+Para ver los peores (todos los workers):  python Consultaslentas.py [carpeta_o_prefijo]
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+
+from Journallocal import ruta_local
+
+SQL_LENTO_MS       = float(os.getenv("SQL_LENTO_MS", "500"))
+SQL_MUESTREO       = float(os.getenv("SQL_MUESTREO", "0.01"))
+SQL_LENTO_MB       = float(os.getenv("SQL_LENTO_MB", "10"))
+SQL_LENTO_ARCHIVOS = int(os.getenv("SQL_LENTO_ARCHIVOS", "5"))
+SQL_LENTO_DIAS     = float(os.getenv("SQL_LENTO_DIAS", "7"))
+_SAL = (os.getenv("SQL_LENTO_SAL") or os.urandom(16).hex()).encode("utf-8")
+
+# Credenciales / códigos: ni siquiera el hash de los parámetros
+SP_SIN_PARAMETROS = {
+    "SP_VALIDAR_LOGIN_ADMIN", "SP_GUARDAR_OTP_ADMIN", "SP_VALIDAR_OTP_ADMIN",
+    "SP_CREAR_ADMIN", "SP_ACTUALIZAR_PERFIL_ADMIN", "SP_CAMBIAR_PASSWORD_ADMIN",
+}
+
+_PREFIJO = "sql_lento"
+_RE_NOMBRADOS = re.compile(r"(@\w+)\s*=\s*\?")
+_RE_NUMERO_ERROR = re.compile(r"\((\d+)\)\s*\(SQL\w+\)")   # "... (2627) (SQLExecDirectW)"
+
+_logger = logging.getLogger("cgpvp.sql_lento")
+_logger.propagate = False
+
+
+def _purgar_viejos():
+    """Logs sin escrituras hace más de SQL_LENTO_DIAS (de workers que ya no existen)."""
+    carpeta = os.path.dirname(ruta_local(_PREFIJO))
+    limite = time.time() - SQL_LENTO_DIAS * 86400
+    for nombre in os.listdir(carpeta):
+        ruta = os.path.join(carpeta, nombre)
+        if nombre.startswith(_PREFIJO) and os.path.getmtime(ruta) < limite:
+            os.remove(ruta)
+
+
+def _configurar():
+    if not _logger.handlers:
+        try:
+            _purgar_viejos()
+        except OSError as e:
+            print(f"⚠️ No se pudieron borrar logs viejos de SQL lento: {e}")
+        manejador = RotatingFileHandler(
+            ruta_local(f"{_PREFIJO}-{os.getpid()}.log"),
+            maxBytes=int(SQL_LENTO_MB * 1024 * 1024),
+            backupCount=SQL_LENTO_ARCHIVOS,
+            encoding="utf-8",
+        )
+        manejador.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(manejador)
+        _logger.setLevel(logging.INFO)
+
+
+def _redactar(valor):
+    if valor is None or isinstance(valor, (bool, int, float, Decimal)):
+        return valor if not isinstance(valor, Decimal) else float(valor)
+    if isinstance(valor, datetime):
+        return "datetime"
+    if isinstance(valor, date):
+        return "date"
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return f"bytes:{len(valor)}"
+    texto = str(valor)
+    huella = hmac.new(_SAL, texto.encode("utf-8"), hashlib.sha256).hexdigest()[:12]
+    return f"str:{len(texto)}:{huella}"
+
+
+def redactar_parametros(sql: str, params) -> dict:
+    """{'@criterio_busqueda': 'str:8:…', '@pagina': 2} — nombres del EXEC o posición (p1, p2…)."""
+    if len(params) == 1 and isinstance(params[0], (list, tuple)):
+        params = params[0]
+    nombres = _RE_NOMBRADOS.findall(sql)
+    if len(nombres) != len(params):
+        nombres = [f"p{i}" for i in range(1, len(params) + 1)]
+    return {nombre: _redactar(valor) for nombre, valor in zip(nombres, params)}
+
+
+def resumir_error(e: Exception) -> str:
+    """'IntegrityError 23000 #2627' — sin el texto del mensaje (puede traer datos personales)."""
+    partes = [type(e).__name__]
+    if e.args and isinstance(e.args[0], str) and re.fullmatch(r"[0-9A-Z]{5}", e.args[0]):
+        partes.append(e.args[0])   # SQLSTATE de pyodbc
+    partes.extend(f"#{n}" for n in dict.fromkeys(_RE_NUMERO_ERROR.findall(str(e))))
+    return " ".join(partes)
+
+
+def evaluar(sp: str, ruta: str, sql: str, params, espera: float, ejecutar: float, fetch: float,
+            filas: int, bytes_: int, error: str | None = None, estadisticas: dict | None = None):
+    """Decide si la sentencia va al log y la escribe (los parámetros se redactan solo si se escribe)."""
+    total_ms = (ejecutar + fetch) * 1000
+    if error:
+        motivo = "error"
+    elif total_ms >= SQL_LENTO_MS:
+        motivo = "lento"
+    elif SQL_MUESTREO and random.random() < SQL_MUESTREO:
+        motivo = "muestra"
+    else:
+        return
+
+    registro = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "motivo": motivo,
+        "sp": sp,
+        "ruta": ruta,
+        "params": "omitidos" if sp in SP_SIN_PARAMETROS else redactar_parametros(sql, params),
+        "espera_pool_ms": round(espera * 1000, 1),
+        "execute_ms": round(ejecutar * 1000, 1),
+        "fetch_ms": round(fetch * 1000, 1),
+        "db_ms": round(total_ms, 1),
+        "filas": filas,
+        "bytes": bytes_,
+        "pid": os.getpid(),
+    }
+    if sp.startswith("sql:"):
+        registro["sql"] = " ".join(sql.split())[:300]   # sin literales: los valores van como ?
+    if error:
+        registro["error"] = error[:200]   # ya resumido (resumir_error)
+    if estadisticas:
+        registro["estadisticas"] = estadisticas   # modo STATISTICS IO/TIME (Estadisticassql.py)
+    try:
+        _configurar()
+        _logger.info(json.dumps(registro, ensure_ascii=False))
+    except Exception as e:
+        print(f"⚠️ No se pudo escribir el log de SQL lento: {e}")
+
+
+# Resumen rápido: qué SP optimizar primero (tiempo total en las lentas)
+if __name__ == "__main__":
+    import sys
+    from collections import defaultdict
+
+    ruta = sys.argv[1] if len(sys.argv) > 1 else ruta_local(_PREFIJO)
+    if os.path.isdir(ruta):
+        ruta = os.path.join(ruta, _PREFIJO)
+    carpeta, prefijo = os.path.dirname(ruta) or ".", os.path.basename(ruta)
+    por_sp = defaultdict(lambda: {"lentas": 0, "errores": 0, "db_ms": [], "filas": 0, "bytes": 0})
+    for archivo in sorted(p for p in os.listdir(carpeta) if p.startswith(prefijo)):
+        with open(os.path.join(carpeta, archivo), encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    r = json.loads(linea)
+                except ValueError:
+                    continue
+                s = por_sp[r["sp"]]
+                s["lentas"] += r["motivo"] == "lento"
+                s["errores"] += r["motivo"] == "error"
+                s["db_ms"].append(r["db_ms"])
+                s["filas"] = max(s["filas"], r["filas"])
+                s["bytes"] = max(s["bytes"], r["bytes"])
+
+    orden = sorted(por_sp.items(), key=lambda kv: -sum(kv[1]["db_ms"]))
+    print(f"{'SP':45} {'lentas':>7} {'errores':>7} {'p50 ms':>9} {'max ms':>9} {'max filas':>9} {'max KB':>8}")
+    for sp, s in orden:
+        tiempos = sorted(s["db_ms"])
+        print(f"{sp[:45]:45} {s['lentas']:>7} {s['errores']:>7} {tiempos[len(tiempos) // 2]:>9.1f} "
+              f"{tiempos[-1]:>9.1f} {s['filas']:>9} {s['bytes'] / 1024:>8.0f}")
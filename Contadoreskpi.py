@@ -0,0 +1,276 @@
+# Contadoreskpi.py
+"""
+Contadores de miembros por estado / rango mantenidos en memoria
+
+SP_DS_GRAFICO_MIEMBROS_ESTADO / _RANGO y SP_DS_RESUMEN_RANGOS re-agregan toda
+la tabla miembros en cada vista del dashboard. Todo cambio a esos números pasa
+por admin_usuarios.py (crear, editar, cambiar estado/rango, eliminar), así que
+se siembran una vez (id → estado, rango) y se actualizan en cada escritura:
+los gráficos se leen en O(1).
+
+El resumen de las tarjetas (SP_DS_RESUMEN_RANGOS) también se mantiene: la
+base sale del SP en cada reconciliación y encima se aplican los contadores de
+miembros y los postulantes registrados desde entonces. Lo que no pasa por el
+API (cursos, eventos) se actualiza con la reconciliación.
+
+Reconciliación (tarea única del programador): UN worker corre los SP y deja
+el resultado en el journal compartido (contadores_kpi.db); cada worker lo
+compara con sus contadores (tarea "contadores-kpi-revisar", en el hilo del
+programador) y si no cuadran (escrituras de otro worker, cambios directos en
+la BD) vuelve a sembrar. Los requests solo leen los contadores.
+Mientras no estén listos, el dashboard usa los SP como siempre.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import closing
+from datetime import date, datetime
+from decimal import Decimal
+
+from Conexionsql import get_connection, filas_como_dicts
+from Journallocal import abrir_sqlite
+
+# Columnas de SP_DS_RESUMEN_RANGOS que salen de los contadores de miembros
+_RESUMEN_ESTADOS = {"miembros_activos": "Activo", "miembros_suspendidos": "Suspendido", "miembros_baja": "Baja"}
+
+_ARCHIVO = "contadores_kpi.db"
+_SIN_VALOR = "(sin valor)"   # estado / rango NULL en la referencia (JSON no admite claves None)
+
+_lock = threading.Lock()
+_lock_siembra = threading.Lock()    # una sola re-siembra a la vez (reconciliar / revisar_referencia)
+_miembros: dict[int, tuple[str, str]] = {}   # id → (estado, rango)
+_por_estado: Counter = Counter()
+_por_rango: Counter = Counter()
+_listo = False
+
+_resumen_base: dict | None = None   # última fila de SP_DS_RESUMEN_RANGOS
+_postulantes_nuevos = 0             # registrados en este worker desde esa fila
+_referencia_ts = 0.0                # versión de la referencia compartida ya aplicada
+
+
+def esta_listo() -> bool:
+    return _listo
+
+
+def _canonico(valor: str | None, conocidos) -> str | None:
+    """Estado / rango tal como está en la BD ("activo " → "Activo") si ya se conoce."""
+    if valor is None:
+        return None
+    limpio = str(valor).strip()
+    for conocido in conocidos:
+        if conocido and conocido.lower() == limpio.lower():
+            return conocido
+    return limpio
+
+
+def sembrar() -> int:
+    """Carga inicial / re-siembra completa. Retorna cuántos miembros contó."""
+    global _miembros, _por_estado, _por_rango, _listo
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, estado, rango FROM miembros")
+        filas = cursor.fetchall()
+        conn.commit()
+
+    miembros = {fila[0]: (fila[1], fila[2]) for fila in filas}
+    with _lock:
+        _miembros = miembros
+        _por_estado = Counter(e for e, _ in miembros.values())
+        _por_rango = Counter(r for _, r in miembros.values())
+        _listo = True
+    return len(miembros)
+
+
+def _mover(id_miembro: int, estado: str | None = None, rango: str | None = None):
+    global _listo
+    with _lock:
+        actual = _miembros.get(id_miembro)
+        if actual is None:
+            # Miembro que no conocemos (creado por otro worker): hasta reconciliar, al SP
+            _listo = False
+            return
+        nuevo = (_canonico(estado, _por_estado) if estado is not None else actual[0],
+                 _canonico(rango, _por_rango) if rango is not None else actual[1])
+        _por_estado[actual[0]] -= 1
+        _por_rango[actual[1]] -= 1
+        _por_estado[nuevo[0]] += 1
+        _por_rango[nuevo[1]] += 1
+        _miembros[id_miembro] = nuevo
+
+
+# =============================================
+# ESCRITURAS (llamadas desde admin_usuarios.py)
+# =============================================
+def alta(id_miembro: int, estado: str, rango: str):
+    if not id_miembro:
+        return
+    with _lock:
+        if id_miembro in _miembros:
+            return
+        estado, rango = _canonico(estado, _por_estado), _canonico(rango, _por_rango)
+        _miembros[id_miembro] = (estado, rango)
+        _por_estado[estado] += 1
+        _por_rango[rango] += 1
+
+
+def cambiar_estado(id_miembro: int, estado: str):
+    _mover(id_miembro, estado=estado)
+
+
+def cambiar_rango(id_miembro: int, rango: str):
+    _mover(id_miembro, rango=rango)
+
+
+def editar(id_miembro: int, estado: str, rango: str):
+    _mover(id_miembro, estado=estado, rango=rango)
+
+
+def baja(id_miembro: int):
+    with _lock:
+        actual = _miembros.pop(id_miembro, None)
+        if actual is not None:
+            _por_estado[actual[0]] -= 1
+            _por_rango[actual[1]] -= 1
+
+
+def postulante_registrado():
+    global _postulantes_nuevos
+    with _lock:
+        _postulantes_nuevos += 1
+
+
+# =============================================
+# LECTURAS (mismo formato que los SP)
+# =============================================
+def por_estado() -> list[dict]:
+    with _lock:
+        conteo = [(e, c) for e, c in _por_estado.items() if c > 0]
+    total = sum(c for _, c in conteo) or 1
+    return [
+        {"estado": e, "cantidad": c, "porcentaje": round(100.0 * c / total, 2)}
+        for e, c in sorted(conteo, key=lambda x: -x[1])
+    ]
+
+
+def por_rango() -> list[dict]:
+    with _lock:
+        conteo = [(r, c) for r, c in _por_rango.items() if c > 0]
+    return [{"rango": r, "cantidad": c} for r, c in sorted(conteo, key=lambda x: -x[1])]
+
+
+def resumen() -> dict | None:
+    """Fila de SP_DS_RESUMEN_RANGOS con los conteos al día, o None si aún no hay base."""
+    if not _listo or _resumen_base is None:
+        return None
+    with _lock:
+        data = dict(_resumen_base)
+        if "total_miembros" in data:
+            data["total_miembros"] = len(_miembros)
+        if "total_rangos" in data:
+            data["total_rangos"] = sum(1 for c in _por_rango.values() if c > 0)
+        for columna, estado in _RESUMEN_ESTADOS.items():
+            if columna in data:
+                data[columna] = _por_estado.get(estado, 0)
+        for columna in ("total_postulantes", "postulantes_pendientes"):
+            if columna in data:
+                data[columna] = (data[columna] or 0) + _postulantes_nuevos
+    return data
+
+
+def instantanea() -> dict | None:
+    """Resumen compacto para empujar por SSE junto con cada evento."""
+    if not _listo:
+        return None
+    with _lock:
+        return {
+            "total_miembros": len(_miembros),
+            "por_estado": {e: c for e, c in _por_estado.items() if c > 0},
+            "por_rango": {r: c for r, c in _por_rango.items() if c > 0},
+        }
+
+
+# =============================================
+# RECONCILIACIÓN
+# =============================================
+def _sp_conteo(nombre: str, columna: str) -> dict:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"EXEC {nombre}")
+        filas = filas_como_dicts(cursor)
+        conn.commit()
+    return {_clave(f[columna]): int(f["cantidad"]) for f in filas if f.get("cantidad")}
+
+
+def _clave(valor) -> str:
+    return _SIN_VALOR if valor is None else str(valor)
+
+
+def _valor_json(valor):
+    """Decimal / fecha → lo mismo que entregaría FastAPI, para que todos los workers respondan igual."""
+    if isinstance(valor, Decimal):
+        return int(valor) if valor == valor.to_integral_value() else float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _db():
+    db = abrir_sqlite(_ARCHIVO)
+    db.execute("CREATE TABLE IF NOT EXISTS referencia (id INTEGER PRIMARY KEY CHECK (id = 1), "
+               "ts REAL NOT NULL, datos TEXT NOT NULL)")
+    return db
+
+
+def _aplicar_referencia(ref: dict, ts: float) -> bool:
+    """Compara los contadores con los conteos de los SP; si no cuadran, re-siembra. True si cuadraban."""
+    global _resumen_base, _postulantes_nuevos, _referencia_ts
+    with _lock_siembra:
+        if ts <= _referencia_ts:
+            return True
+        with _lock:
+            _resumen_base = ref["resumen"]
+            _postulantes_nuevos = 0
+            _referencia_ts = ts
+            propios_e = {_clave(e): c for e, c in _por_estado.items() if c > 0}
+            propios_r = {_clave(r): c for r, c in _por_rango.items() if c > 0}
+        if _listo and ref["estados"] == propios_e and ref["rangos"] == propios_r:
+            return True
+        if _listo:
+            print(f"⚠️ Contadores KPI desfasados, re-sembrando (SP: {ref['estados']} / memoria: {propios_e})")
+        sembrar()
+        return False
+
+
+def revisar_referencia() -> bool:
+    """Tarea del programador (todos los workers): si otro worker publicó una reconciliación nueva, aplicarla."""
+    with closing(_db()) as db:
+        fila = db.execute("SELECT ts, datos FROM referencia WHERE id = 1").fetchone()
+    if fila and fila["ts"] > _referencia_ts:
+        return _aplicar_referencia(json.loads(fila["datos"]), fila["ts"])
+    return True
+
+
+def reconciliar() -> bool:
+    """
+    Corre los SP (un worker por disparo), publica el resultado para los demás y
+    lo aplica aquí. Retorna True si los contadores de este worker cuadraban.
+    """
+    filas = []
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("EXEC SP_DS_RESUMEN_RANGOS")
+        if cursor.description:
+            filas = filas_como_dicts(cursor)
+        conn.commit()
+    ref = {
+        "estados": _sp_conteo("SP_DS_GRAFICO_MIEMBROS_ESTADO", "estado"),
+        "rangos": _sp_conteo("SP_DS_GRAFICO_MIEMBROS_RANGO", "rango"),
+        "resumen": {k: _valor_json(v) for k, v in filas[0].items()} if filas else {},
+    }
+    ts = time.time()
+    with closing(_db()) as db:
+        db.execute("INSERT OR REPLACE INTO referencia (id, ts, datos) VALUES (1, ?, ?)",
+                   (ts, json.dumps(ref)))
+    return _aplicar_referencia(ref, ts)
@@ -0,0 +1,170 @@
+# Descargafotos.py
+"""
+Descarga de imágenes de los posts de Facebook (la usa Cargadatosfacebook.py)
+
+- Una sola requests.Session con pool keep-alive (no un requests.get suelto por foto)
+- Concurrencia acotada para varios posts (FOTO_CONCURRENCIA)
+- GET condicional: If-None-Match / If-Modified-Since con lo guardado la vez
+  anterior → 304 = se reutiliza el archivo local, no se baja de nuevo
+- Tope de tamaño (FOTO_MAX_MB), controlado por Content-Length Y al leer
+- Se escribe por partes a disco (DATOS_LOCALES_DIR/fotos_facebook), nunca
+  el cuerpo entero en memoria mientras se descarga
+
+La clave de cada foto es la URL sin query string (el CDN cambia la firma
+pero no la ruta). Para probar contra un servidor local: Descargador(sesion=..., directorio=...).
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from Journallocal import abrir_sqlite, ruta_local
+
+FOTO_MAX_MB       = float(os.getenv("FOTO_MAX_MB", "8"))
+FOTO_CONCURRENCIA = int(os.getenv("FOTO_CONCURRENCIA", "4"))
+FOTO_TIMEOUT      = (5, 20)   # seg. (conexión, lectura)
+_BLOQUE           = 64 * 1024
+
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+_ARCHIVO = "fotos_cache.db"
+
+
+@dataclass
+class Foto:
+    url: str
+    estado: str                 # NUEVA | SIN_CAMBIOS | MUY_GRANDE | ERROR | SIN_URL
+    ruta: str | None = None
+    tamano: int = 0
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.estado in ("NUEVA", "SIN_CAMBIOS")
+
+    def leer(self) -> bytes | None:
+        if not self.ok:
+            return None
+        with open(self.ruta, "rb") as f:
+            return f.read()
+
+
+def crear_sesion(conexiones: int = FOTO_CONCURRENCIA) -> requests.Session:
+    sesion = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+    sesion.headers["User-Agent"] = _USER_AGENT
+    return sesion
+
+
+def _db():
+    db = abrir_sqlite(_ARCHIVO)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS fotos (
+            clave         TEXT PRIMARY KEY,
+            etag          TEXT,
+            last_modified TEXT,
+            ruta          TEXT NOT NULL,
+            tamano        INTEGER NOT NULL,
+            actualizado   TEXT NOT NULL
+        )
+    """)
+    return db
+
+
+class Descargador:
+    def __init__(self, sesion: requests.Session | None = None, directorio: str | None = None,
+                 max_bytes: int | None = None, concurrencia: int = FOTO_CONCURRENCIA):
+        self.sesion = sesion or crear_sesion(concurrencia)
+        self.directorio = directorio or ruta_local("fotos_facebook")
+        self.max_bytes = max_bytes or int(FOTO_MAX_MB * 1024 * 1024)
+        self.concurrencia = max(concurrencia, 1)
+        os.makedirs(self.directorio, exist_ok=True)
+
+    @staticmethod
+    def _clave(url: str) -> str:
+        partes = urlsplit(url)
+        return f"{partes.netloc}{partes.path}"
+
+    def _anterior(self, clave: str) -> dict | None:
+        with closing(_db()) as db:
+            fila = db.execute("SELECT * FROM fotos WHERE clave = ?", (clave,)).fetchone()
+        if fila and os.path.exists(fila["ruta"]):
+            return dict(fila)
+        return None
+
+    def _guardar_validadores(self, clave: str, respuesta: requests.Response, ruta: str, tamano: int):
+        with closing(_db()) as db:
+            db.execute(
+                "INSERT OR REPLACE INTO fotos (clave, etag, last_modified, ruta, tamano, actualizado) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (clave, respuesta.headers.get("ETag"), respuesta.headers.get("Last-Modified"),
+                 ruta, tamano, datetime.now().isoformat()),
+            )
+
+    def descargar(self, url: str | None) -> Foto:
+        if not url or url == "Sin imagen" or not url.startswith("http"):
+            return Foto(url or "", "SIN_URL")
+
+        clave = self._clave(url)
+        ruta = os.path.join(self.directorio, hashlib.sha1(clave.encode("utf-8")).hexdigest())
+        anterior = self._anterior(clave)
+        headers = {}
+        if anterior:
+            if anterior["etag"]:
+                headers["If-None-Match"] = anterior["etag"]
+            if anterior["last_modified"]:
+                headers["If-Modified-Since"] = anterior["last_modified"]
+
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        try:
+            with self.sesion.get(url, headers=headers, timeout=FOTO_TIMEOUT, stream=True) as r:
+                if r.status_code == 304 and anterior:
+                    return Foto(url, "SIN_CAMBIOS", anterior["ruta"], anterior["tamano"])
+                r.raise_for_status()
+
+                tipo = r.headers.get("Content-Type", "")
+                if tipo and not tipo.startswith("image/"):
+                    return Foto(url, "ERROR", error=f"No es una imagen ({tipo})")
+                declarado = int(r.headers.get("Content-Length") or 0)
+                if declarado > self.max_bytes:
+                    return Foto(url, "MUY_GRANDE", tamano=declarado)
+
+                tamano = 0
+                with open(temporal, "wb") as f:
+                    for bloque in r.iter_content(_BLOQUE):
+                        tamano += len(bloque)
+                        if tamano > self.max_bytes:
+                            break
+                        f.write(bloque)
+                if tamano > self.max_bytes:
+                    os.remove(temporal)
+                    return Foto(url, "MUY_GRANDE", tamano=tamano)
+
+                os.replace(temporal, ruta)
+                self._guardar_validadores(clave, r, ruta, tamano)
+                return Foto(url, "NUEVA", ruta, tamano)
+
+        except Exception as e:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return Foto(url, "ERROR", error=str(e))
+
+    def descargar_varias(self, urls: list[str | None]) -> dict[str, Foto]:
+        """Descarga en paralelo (máx. `concurrencia`). Retorna url → Foto (URLs repetidas se bajan una vez)."""
+        unicas = list(dict.fromkeys(u for u in urls if u))
+        if not unicas:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.concurrencia, len(unicas)),
+                                thread_name_prefix="fotos") as pool:
+            return dict(zip(unicas, pool.map(self.descargar, unicas)))
+
+    def cerrar(self):
+        self.sesion.close()
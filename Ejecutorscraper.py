@@ -0,0 +1,159 @@
+# Ejecutorscraper.py
+"""
+Ejecuta el bot de Facebook (Cargadatosfacebook.py) en un PROCESO aparte
+
+Chrome headless + Selenium + descargas de imágenes ya no comparten memoria
+ni threadpool con el API: se lanza `python Cargadatosfacebook.py` en su
+propio grupo de procesos y el API solo espera el resultado.
+
+- Límite de tiempo: SCRAPER_TIMEOUT seg. → se mata TODO el grupo
+- Límite de memoria: SCRAPER_MEMORIA_MB (RSS del grupo: python + chromedriver
+  + chrome; medido en /proc, solo Linux) → se mata TODO el grupo
+- Al terminar (bien o mal) se mata el grupo igual: no quedan Chrome huérfanos
+- Resultado estructurado: la última línea "RESULTADO_JSON:{...}" del proceso
+- Cada corrida (también las que se matan) queda en el historial local
+  (Syncfacebook.registrar_corrida; ver GET /api/admin/scraper/corridas)
+
+No se usa RLIMIT_AS: Chrome reserva mucho espacio virtual y no arranca con él.
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import Syncfacebook
+
+SCRAPER_TIMEOUT    = float(os.getenv("SCRAPER_TIMEOUT", "900"))
+SCRAPER_MEMORIA_MB = int(os.getenv("SCRAPER_MEMORIA_MB", "1536"))
+GRACIA             = 10   # seg. entre SIGTERM y SIGKILL
+
+_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Cargadatosfacebook.py")
+_MARCA = "RESULTADO_JSON:"
+_WINDOWS = os.name == "nt"
+
+
+def _rss_grupo_mb(pgid: int) -> float | None:
+    """RSS total del grupo de procesos (Linux). None si no se puede medir."""
+    if not os.path.isdir("/proc"):
+        return None
+    pagina = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                campos = f.read().rsplit(b")", 1)[1].split()
+        except OSError:
+            continue
+        # después del ")" del nombre: estado, ppid, pgrp, ... rss es el campo 24 (índice 21)
+        if int(campos[2]) == pgid:
+            total += int(campos[21]) * pagina
+    return total / (1024 * 1024)
+
+
+def _matar_grupo(proceso: subprocess.Popen):
+    """Termina el proceso y todo lo que lanzó (chromedriver, chrome)."""
+    if _WINDOWS:
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(proceso.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    try:
+        os.killpg(proceso.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        proceso.wait(GRACIA)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        os.killpg(proceso.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _registrar(inicio: float, resultado: dict, memoria_max_mb: float | None):
+    try:
+        Syncfacebook.registrar_corrida(inicio, time.time(), resultado, memoria_max_mb)
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar la corrida en el historial: {e}")
+
+
+def ejecutar_scraper_aislado(timeout: float = SCRAPER_TIMEOUT, memoria_mb: int = SCRAPER_MEMORIA_MB) -> dict:
+    """
+    Corre el bot y retorna su resultado (dict de escanear_y_guardar_db).
+    Lanza RuntimeError si se pasó de tiempo / memoria, murió, o reportó ERROR
+    (así el Programador lo registra como ejecución fallida).
+    """
+    entorno = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    opciones = (
+        {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if _WINDOWS
+        else {"start_new_session": True}   # pgid = pid del hijo
+    )
+    inicio = time.monotonic()
+    inicio_reloj = time.time()
+    proceso = subprocess.Popen(
+        [sys.executable, _SCRIPT],
+        cwd=os.path.dirname(_SCRIPT),
+        env=entorno,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        **opciones,
+    )
+    print(f"🧭 Bot de Facebook lanzado en proceso aparte (pid {proceso.pid}).")
+
+    resultado: dict = {}
+
+    def _leer_salida():
+        for linea in proceso.stdout:
+            linea = linea.rstrip()
+            if linea.startswith(_MARCA):
+                try:
+                    resultado.update(json.loads(linea[len(_MARCA):]))
+                except ValueError:
+                    pass
+            elif linea:
+                print(f"   [fb] {linea}")
+
+    lector = threading.Thread(target=_leer_salida, name="scraper-salida", daemon=True)
+    lector.start()
+
+    motivo = None
+    rss_max = None
+    try:
+        while proceso.poll() is None:
+            if time.monotonic() - inicio > timeout:
+                motivo = f"superó el límite de {timeout:.0f}s"
+                break
+            rss = None if _WINDOWS else _rss_grupo_mb(proceso.pid)
+            if rss is not None:
+                rss_max = max(rss_max or 0, rss)
+            if rss is not None and rss > memoria_mb:
+                motivo = f"superó el límite de memoria ({rss:.0f} MB > {memoria_mb} MB)"
+                break
+            time.sleep(1)
+    finally:
+        # siempre: también barre Chrome/chromedriver que hayan quedado colgados
+        _matar_grupo(proceso)
+        proceso.wait()
+        lector.join(5)
+
+    duracion = time.monotonic() - inicio
+    if motivo or not resultado:
+        error = (f"Bot de Facebook detenido: {motivo}" if motivo
+                 else f"El bot de Facebook terminó sin resultado (código {proceso.returncode})")
+        _registrar(inicio_reloj, dict(resultado, estado="ERROR", error=error), rss_max)
+        raise RuntimeError(error)
+    _registrar(inicio_reloj, resultado, rss_max)
+    if resultado.get("estado") == "ERROR":
+        raise RuntimeError(f"Bot de Facebook: {resultado.get('error')}")
+
+    resultado["duracion_s"] = round(duracion, 1)
+    print(f"🏁 Bot de Facebook terminado en {duracion:.1f}s: {resultado}")
+    return resultado
@@ -1,11 +1,33 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
 from pydantic import BaseModel
 from datetime import date, datetime
 import base64
-import hashlib
+import json
+import pyodbc
 from Conexionsql import get_connection
+from Indicemiembros import generar_hash_id
+import Indicemiembros
+import Metricas
+import Tarjetasmiembro
 
-app = FastAPI()
+app = FastAPI(default_response_class=Metricas.JSONMedido)
+
+# SP_BUSCAR_MIEMBRO_POR_ID es nuevo: mientras no exista en la BD se usa el SP por hash
+_sp_por_id_disponible = True
+
+
+def tipo_imagen(contenido: bytes) -> str:
+    if contenido[:4] == b'\x89PNG':
+        return 'image/png'
+    if contenido[:2] == b'\xff\xd8':
+        return 'image/jpeg'
+    if contenido[:4] == b'GIF8':
+        return 'image/gif'
+    if contenido[:4] == b'RIFF':
+        return 'image/webp'
+    return 'image/jpeg'
 
 
 def serializar_fila(columns, row) -> dict:
@@ -18,17 +40,9 @@ def serializar_fila(columns, row) -> dict:
     resultado = {}
     for col, val in zip(columns, row):
         if isinstance(val, (bytes, bytearray)):
-            if val[:4] == b'\x89PNG':
-                mime = 'image/png'
-            elif val[:2] == b'\xff\xd8':
-                mime = 'image/jpeg'
-            elif val[:4] == b'GIF8':
-                mime = 'image/gif'
-            elif val[:4] == b'RIFF':
-                mime = 'image/webp'
-            else:
-                mime = 'image/jpeg'
-            b64 = base64.b64encode(val).decode('utf-8')
+            mime = tipo_imagen(val)
+            with Metricas.medir("base64"):
+                b64 = base64.b64encode(val).decode('utf-8')
             resultado[col] = f"data:{mime};base64,{b64}"
         elif isinstance(val, (date, datetime)):
             resultado[col] = val.isoformat()
@@ -37,20 +51,6 @@ def serializar_fila(columns, row) -> dict:
     return resultado
 
 
-def generar_hash_id(id: int) -> str:
-    """
-    Replica exactamente lo que hace SQL Server:
-    LOWER(CONVERT(VARCHAR(32), HASHBYTES('MD5', CONVERT(NVARCHAR(50), id)), 2))
-    
-    SQL Server HASHBYTES con NVARCHAR usa UTF-16 LE.
-    CONVERT(..., 2) produce hex en mayúsculas → LOWER lo pasa a minúsculas.
-    """
-    id_str = str(id)
-    id_utf16 = id_str.encode('utf-16-le')   # NVARCHAR en SQL Server = UTF-16 LE
-    hash_bytes = hashlib.md5(id_utf16).digest()
-    return hash_bytes.hex()                  # hex en minúsculas = equivale a LOWER(CONVERT(...,2))
-
-
 class CriterioBusqueda(BaseModel):
     criterio: str
 
@@ -87,35 +87,123 @@ class BusquedaPorHash(BaseModel):
     hash: str
 
 
-@app.post("/buscar-por-hash")
-def buscar_miembro_por_hash(data: BusquedaPorHash):
-    try:
-        print(f"🔍 Buscando por hash: {data.hash}")
-        
-        with get_connection() as conn:
-            cursor = conn.cursor()
+def _ejecutar_busqueda(cursor, id_miembro: int | None, hash_publico: str):
+    """Por clave primaria si el índice conoce el hash; si no (o si el SP por id no existe, error 2812), por hash."""
+    global _sp_por_id_disponible
+    if id_miembro is not None and _sp_por_id_disponible:
+        try:
             cursor.execute("""
-                EXEC SP_BUSCAR_MIEMBRO_POR_HASH @hash=?
-            """, (data.hash,))
+                EXEC SP_BUSCAR_MIEMBRO_POR_ID @id=?
+            """, (id_miembro,))
+            return
+        except pyodbc.ProgrammingError as e:
+            if "2812" not in str(e):
+                raise
+            _sp_por_id_disponible = False
+            print("⚠️ SP_BUSCAR_MIEMBRO_POR_ID no existe en la BD: se usa SP_BUSCAR_MIEMBRO_POR_HASH")
+
+    # Fallback: hash aún no indexado en este proceso (o índice sin cargar)
+    cursor.execute("""
+        EXEC SP_BUSCAR_MIEMBRO_POR_HASH @hash=?
+    """, (hash_publico,))
+
+
+def _leer_por_hash(hash_publico: str):
+    """(columnas, fila) del miembro o (None, None); mantiene el índice hash → id al día."""
+    id_miembro = Indicemiembros.buscar_id(hash_publico)
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        _ejecutar_busqueda(cursor, id_miembro, hash_publico)
+        columns = [column[0] for column in cursor.description]
+        row = cursor.fetchone()
+
+    if not row:
+        if id_miembro is not None:
+            Indicemiembros.eliminar_miembro(id_miembro)
+        Tarjetasmiembro.marcar_desconocido(hash_publico)
+        return None, None
+
+    if id_miembro is None:
+        id_leido = dict(zip(columns, row)).get('id')
+        if id_leido:
+            Indicemiembros.registrar_miembro(id_leido)
+    return columns, row
 
-            columns = [column[0] for column in cursor.description]
-            row = cursor.fetchone()
 
-            if not row:
-                print(f"❌ No se encontró miembro con hash: {data.hash}")
-                raise HTTPException(status_code=404, detail="Miembro no encontrado")
+@app.post("/buscar-por-hash")
+def buscar_miembro_por_hash(data: BusquedaPorHash, request: Request):
+    try:
+        print(f"🔍 Buscando por hash: {data.hash}")
 
-            miembro = serializar_fila(columns, row)
-            
-            # Agregar el hash al resultado también
-            if miembro.get('id'):
-                miembro['hash'] = generar_hash_id(miembro['id'])
-            
-            print(f"✅ Miembro encontrado: {miembro.get('nombre_completo') or miembro.get('nombre')}")
-            return {"status": "SUCCESS", "miembro": miembro}
+        # ⚡ Tarjeta ya renderizada / hash desconocido → sin tocar la BD
+        hash_publico = Tarjetasmiembro.normalizar_hash(data.hash)
+        if hash_publico is None or Tarjetasmiembro.es_desconocido(hash_publico):
+            raise HTTPException(status_code=404, detail="Miembro no encontrado")
+
+        tarjeta = Tarjetasmiembro.obtener(hash_publico)
+        if tarjeta is not None:
+            return Response(content=tarjeta, media_type="application/json")
+
+        # ⚡ Índice en memoria: hash → id en O(1) y lectura por clave primaria
+        columns, row = _leer_por_hash(hash_publico)
+        if row is None:
+            print(f"❌ No se encontró miembro con hash: {data.hash}")
+            raise HTTPException(status_code=404, detail="Miembro no encontrado")
+
+        # La foto no va dentro de la tarjeta: URL versionada a /foto/{hash} (cacheable por el navegador)
+        blobs = {col: val for col, val in zip(columns, row) if isinstance(val, (bytes, bytearray))}
+        miembro = serializar_fila(
+            [col for col in columns if col not in blobs],
+            [val for col, val in zip(columns, row) if col not in blobs],
+        )
+        url_foto = str(request.url_for("foto_por_hash", hash_publico=hash_publico))
+        for col, val in blobs.items():
+            miembro[col] = f"{url_foto}?v={Tarjetasmiembro.version_foto(val)}"
+
+        # Agregar el hash al resultado también
+        if miembro.get('id'):
+            miembro['hash'] = generar_hash_id(miembro['id'])
+
+        print(f"✅ Miembro encontrado: {miembro.get('nombre_completo') or miembro.get('nombre')}")
+
+        # Mismo render que JSONResponse de FastAPI, guardado para las próximas visitas
+        tarjeta = json.dumps(
+            jsonable_encoder({"status": "SUCCESS", "miembro": miembro}),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        Tarjetasmiembro.guardar(hash_publico, tarjeta)
+
+        return Response(content=tarjeta, media_type="application/json")
 
     except HTTPException:
         raise
     except Exception as e:
         print(f"💥 Error en buscar-por-hash: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/foto/{hash_publico}", name="foto_por_hash")
+def foto_por_hash(hash_publico: str, v: str | None = None):
+    """
+    Foto de la tarjeta pública. La URL lleva ?v=<versión>: si coincide con la foto
+    actual se cachea como inmutable; si no (tarjeta vieja en otro worker), se sirve
+    la foto actual sin cache en vez de un 404.
+    """
+    h = Tarjetasmiembro.normalizar_hash(hash_publico)
+    if h is None or Tarjetasmiembro.es_desconocido(h):
+        raise HTTPException(status_code=404, detail="Miembro no encontrado")
+
+    columns, row = _leer_por_hash(h)
+    foto = next((val for val in row or () if isinstance(val, (bytes, bytearray))), None)
+    if foto is None:
+        raise HTTPException(status_code=404, detail="Foto no encontrada")
+
+    vigente = v == Tarjetasmiembro.version_foto(foto)
+    return Response(
+        content=bytes(foto),
+        media_type=tipo_imagen(foto),
+        headers={"Cache-Control": "public, max-age=31536000, immutable" if vigente else "no-cache"},
+    )
@@ -1,19 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Request
 from pydantic import BaseModel
-from Conexionsql import get_connection
+from Conexionsql import get_connection, filas_como_dicts
+import Indiceunicidad
+import Metricas
 
 from dotenv import load_dotenv
-import os
-import smtplib
 import random
-from datetime import date, datetime, timedelta, timezone
-import base64
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from datetime import datetime, timedelta, timezone
+import Outboxcorreo
+import Perfilesadmin
+import Sesionadmin
+from Sesionadmin import requerir_sesion
 
 load_dotenv()
 
-app = FastAPI()
+app = FastAPI(default_response_class=Metricas.JSONMedido)
 
 def ejecutar_sp(sp_nombre: str, params: tuple = ()):
     try:
@@ -26,8 +27,7 @@ def ejecutar_sp(sp_nombre: str, params: tuple = ()):
 
             rows = []
             if cursor.description:
-                columns = [col[0] for col in cursor.description]
-                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                rows = filas_como_dicts(cursor)
 
             # ✅ CLAVE: commit siempre
             conn.commit()
@@ -37,16 +37,16 @@ def ejecutar_sp(sp_nombre: str, params: tuple = ()):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def enviar_codigo_email(destinatario: str, codigo: str):
-    SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
-    SMTP_USER = os.getenv("SMTP_USER")
-    SMTP_PASS = os.getenv("SMTP_PASS")
-
-    if not SMTP_USER or not SMTP_PASS:
+def enviar_codigo_email(destinatario: str, codigo: str) -> str:
+    """
+    Deja el correo con el OTP en el outbox y retorna su id.
+    El envío real lo hace el sender de Outboxcorreo (sesión SMTP persistente),
+    así el login no espera al servidor de correo.
+    """
+    if not Outboxcorreo.SMTP_USER:
         raise HTTPException(
             status_code=500,
-            detail="Faltan SMTP_USER o SMTP_PASS en el archivo .env"
+            detail="Falta SMTP_USER en el archivo .env"
         )
 
     asunto = "Código de verificación"
@@ -58,19 +58,10 @@ Este código expira en 5 minutos.
 Si no fuiste tú, ignora este mensaje.
 """
 
-    msg = MIMEMultipart()
-    msg["From"] = SMTP_USER
-    msg["To"] = destinatario
-    msg["Subject"] = asunto
-    msg.attach(MIMEText(cuerpo, "plain"))
-
     try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(SMTP_USER, destinatario, msg.as_string())
+        return Outboxcorreo.encolar(destinatario, asunto, cuerpo, expira_en_seg=5 * 60)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error enviando correo: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error encolando correo: {str(e)}")
 
 class LoginAdmin(BaseModel):
     email: str
@@ -94,21 +85,31 @@ def login_admin(data: LoginAdmin):
     print(f"⏰ SYSUTCDATETIME en Python sería: {datetime.now(timezone.utc)}")
 
     ejecutar_sp("SP_GUARDAR_OTP_ADMIN", (admin_id, codigo, expira_en))
-    enviar_codigo_email(data.email, codigo)
+    correo_id = enviar_codigo_email(data.email, codigo)
 
     return {
         "status": "2FA_REQUIRED",
         "admin_id": admin_id,
+        "correo_id": correo_id,
         "message": "Se envió un código a tu correo"
     }
 
 
+@app.get("/login/correo/{correo_id}")
+def estado_correo_otp(correo_id: str):
+    """Estado de entrega del correo con el OTP (PENDIENTE / ENVIADO / ERROR)."""
+    data = Outboxcorreo.consultar(correo_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="Correo no encontrado")
+    return {"status": "SUCCESS", "data": data}
+
+
 class VerificarOTP(BaseModel):
     admin_id: int
     codigo: str  # "123456"
 
 @app.post("/login/verify-otp")
-def verificar_otp(data: VerificarOTP):
+def verificar_otp(data: VerificarOTP, request: Request):
     res = ejecutar_sp("SP_VALIDAR_OTP_ADMIN", (data.admin_id, data.codigo))[0]
 
     if res.get("status") != "SUCCESS":
@@ -139,26 +140,18 @@ def verificar_otp(data: VerificarOTP):
 
             admin = dict(zip(columns, row))
 
-            # Serializar foto_perfil (VARBINARY → data URI) si está en BD como bytes
-            if isinstance(admin.get("foto_perfil"), (bytes, bytearray)):
-                val = admin["foto_perfil"]
-                if val[:4] == b'\x89PNG':
-                    mime = 'image/png'
-                elif val[:2] == b'\xff\xd8':
-                    mime = 'image/jpeg'
-                else:
-                    mime = 'image/jpeg'
-                b64 = base64.b64encode(val).decode('utf-8')
-                admin["foto_perfil"] = f"data:{mime};base64,{b64}"
-
-            # Serializar fechas
-            for k, v in admin.items():
-                if isinstance(v, (date, datetime)):
-                    admin[k] = v.isoformat()
+            # Foto → URL versionada (sin re-codificar a base64) y fechas → ISO
+            admin = Perfilesadmin.preparar_perfil(data.admin_id, admin,
+                                                  base_url=Perfilesadmin.base_publica(request))
+
+            # 🔐 Token firmado: las siguientes requests admin no vuelven a la BD para validar sesión
+            sesion = Sesionadmin.emitir_token(admin["admin_id"], admin.get("rol"))
 
             return {
                 "status": "LOGIN_SUCCESS",
-                "admin": admin
+                "admin": admin,
+                "token": sesion["token"],
+                "expira": sesion["expira"]
             }
 
     except HTTPException:
@@ -178,9 +171,17 @@ class CrearAdmin(BaseModel):
     foto_perfil: str | None = None
     creado_por: int | None = None
 
-@app.post("/crear")
+def _refrescar_indice_admins():
+    """Tabla chica: tras una escritura se recarga completa (username/email admin)."""
+    try:
+        Indiceunicidad.recargar("admin_users")
+    except Exception as e:
+        print(f"⚠️ No se pudo refrescar el índice de admins: {e}")
+
+
+@app.post("/crear", dependencies=[Depends(requerir_sesion)])
 def crear_admin(admin: CrearAdmin):
-    return ejecutar_sp("SP_CREAR_ADMIN", (
+    res = ejecutar_sp("SP_CREAR_ADMIN", (
         admin.username,
         admin.password,
         admin.nombre_completo,
@@ -189,6 +190,8 @@ def crear_admin(admin: CrearAdmin):
         admin.foto_perfil,
         admin.creado_por
     ))[0]
+    _refrescar_indice_admins()
+    return res
 
 class ActualizarPerfilAdmin(BaseModel):
     admin_id: int
@@ -198,9 +201,9 @@ class ActualizarPerfilAdmin(BaseModel):
     password_actual: str | None = None
     password_nuevo: str | None = None
 
-@app.put("/perfil")
+@app.put("/perfil", dependencies=[Depends(requerir_sesion)])
 def actualizar_perfil(data: ActualizarPerfilAdmin):
-    return ejecutar_sp("SP_ACTUALIZAR_PERFIL_ADMIN", (
+    res = ejecutar_sp("SP_ACTUALIZAR_PERFIL_ADMIN", (
         data.admin_id,
         data.nombre_completo,
         data.email,
@@ -208,6 +211,10 @@ def actualizar_perfil(data: ActualizarPerfilAdmin):
         data.password_actual,
         data.password_nuevo
     ))[0]
+    Perfilesadmin.invalidar(data.admin_id)
+    if data.email:
+        _refrescar_indice_admins()
+    return res
 
 # ================================
 # 5️⃣ CAMBIAR PASSWORD (SUPER ADMIN)
@@ -217,18 +224,22 @@ class CambiarPasswordAdmin(BaseModel):
     password_nuevo: str
     modificado_por: int
 
-@app.put("/cambiar_password")
+@app.put("/cambiar_password", dependencies=[Depends(requerir_sesion)])
 def cambiar_password(data: CambiarPasswordAdmin):
-    return ejecutar_sp("SP_CAMBIAR_PASSWORD_ADMIN", (
+    res = ejecutar_sp("SP_CAMBIAR_PASSWORD_ADMIN", (
         data.admin_id,
         data.password_nuevo,
         data.modificado_por
     ))[0]
+    Perfilesadmin.invalidar(data.admin_id)
+    if res.get("status") != "ERROR":
+        Sesionadmin.revocar_admin(data.admin_id)
+    return res
 
 # ================================
 # 6️⃣ LISTAR ADMINS
 # ================================
-@app.get("/listar")
+@app.get("/listar", dependencies=[Depends(requerir_sesion)])
 def listar_admins(solo_activos: bool = True):
     resultado = ejecutar_sp("SP_LISTAR_ADMINS", (solo_activos,))
     return {"status": "SUCCESS", "resultados": resultado}
@@ -241,13 +252,17 @@ class CambiarEstadoAdmin(BaseModel):
     activar: bool
     modificado_por: int
 
-@app.put("/estado")
+@app.put("/estado", dependencies=[Depends(requerir_sesion)])
 def cambiar_estado_admin(data: CambiarEstadoAdmin):
-    return ejecutar_sp("SP_CAMBIAR_ESTADO_ADMIN", (
+    res = ejecutar_sp("SP_CAMBIAR_ESTADO_ADMIN", (
         data.admin_id,
         data.activar,
         data.modificado_por
     ))[0]
+    Perfilesadmin.invalidar(data.admin_id)
+    if not data.activar and res.get("status") != "ERROR":
+        Sesionadmin.revocar_admin(data.admin_id)
+    return res
 
 # ================================
 # 8️⃣ VERIFICAR SESIÓN
@@ -256,5 +271,45 @@ class VerificarSesion(BaseModel):
     admin_id: int
 
 @app.post("/verificar_sesion")
-def verificar_sesion(data: VerificarSesion):
-    return ejecutar_sp("SP_VERIFICAR_SESION_ADMIN", (data.admin_id,))[0]
\ No newline at end of file
+def verificar_sesion(data: VerificarSesion, request: Request):
+    # Con token: verificación en proceso, sin round trip a la BD
+    token = Sesionadmin.token_de_request(request)
+    if token:
+        payload = Sesionadmin.verificar_token(token)
+        if payload["sub"] != data.admin_id:
+            raise HTTPException(status_code=401, detail="El token no corresponde a este admin")
+        return {
+            "status": "SUCCESS",
+            "admin_id": payload["sub"],
+            "rol": payload.get("rol"),
+            "expira": payload["exp"]
+        }
+
+    # Frontend antiguo (solo admin_id): se mantiene el SP
+    return ejecutar_sp("SP_VERIFICAR_SESION_ADMIN", (data.admin_id,))[0]
+
+
+# ================================
+# 9️⃣ LOGOUT
+# ================================
+@app.post("/logout")
+def logout(request: Request):
+    token = Sesionadmin.token_de_request(request)
+    if token:
+        Sesionadmin.revocar_token(Sesionadmin.verificar_token(token))
+    return {"status": "SUCCESS", "mensaje": "Sesión cerrada"}
+
+
+# ================================
+# 🔟 RENOVAR TOKEN
+# ================================
+@app.post("/renovar")
+def renovar(request: Request):
+    """Token vigente → token nuevo (el anterior queda revocado). Los tokens son de vida corta."""
+    token = Sesionadmin.token_de_request(request)
+    if not token:
+        raise HTTPException(status_code=401, detail="Falta el token de sesión")
+    payload = Sesionadmin.verificar_token(token)
+    sesion = Sesionadmin.emitir_token(payload["sub"], payload.get("rol"))
+    Sesionadmin.revocar_token(payload)
+    return {"status": "SUCCESS", "token": sesion["token"], "expira": sesion["expira"]}
\ No newline at end of file
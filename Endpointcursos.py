@@ -10,8 +10,9 @@ Lista cursos activos, eventos y detalles para usuarios finales
 from fastapi import FastAPI, HTTPException, Path, Query
 from typing import Optional
 from Conexionsql import get_connection
+import Metricas
 
-app = FastAPI()
+app = FastAPI(default_response_class=Metricas.JSONMedido)
 
 # =============================================
 # Función genérica para ejecutar SP
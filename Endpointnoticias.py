@@ -3,12 +3,13 @@ from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import Response
 from typing import Optional
 import pyodbc
-from Conexionsql import get_connection
+from Conexionsql import get_connection, filas_como_dicts
+import Metricas
 
 # -------------------------------
 # INSTANCIA DE FASTAPI
 # -------------------------------
-app = FastAPI(title="API de Noticias - CGPVP2", version="1.0")
+app = FastAPI(title="API de Noticias - CGPVP2", version="1.0", default_response_class=Metricas.JSONMedido)
 
 # -------------------------------
 # FUNCIONES AUXILIARES PARA SP
@@ -28,8 +29,7 @@ def execute_sp(sp_name: str, params: dict = {}, fetch_one: bool = False, fetch_a
             return None
         elif fetch_all:
             if cursor.description:
-                columns = [column[0] for column in cursor.description]
-                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                rows = filas_como_dicts(cursor)
                 # ✅ Quitar campo "foto" (bytes) para no romper JSON
                 for r in rows:
                     r.pop("foto", None)
@@ -58,8 +58,7 @@ def execute_sp_raw(sp_name: str, params: dict = {}):
         cursor.execute(sql, tuple(params.values()))
 
         if cursor.description:
-            columns = [column[0] for column in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return filas_como_dicts(cursor)
         return []
     except Exception as e:
         print(f"❌ Error en execute_sp_raw({sp_name}): {str(e)}")
@@ -3,6 +3,11 @@ from pydantic import BaseModel, Field, EmailStr, field_validator
 from datetime import date
 import pyodbc
 from Conexionsql import get_connection
+import Actividadreciente
+import Colaregistro
+import Contadoreskpi
+import Eventosdashboard
+import Indiceunicidad
 
 router = APIRouter()
 
@@ -47,21 +52,21 @@ class PostulanteWeb(BaseModel):
         return v
 
 # ===============================
-# ENDPOINT CON SP
+# HELPERS SP
 # ===============================
-@router.post("/registrar", tags=["Registro Web"])
-def registrar_postulante(postulante: PostulanteWeb):
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Ejecutar SP
-        cursor.execute("""
-            EXEC SP_REGISTRAR_POSTULANTE_WEB 
-                @nombre=?, @apellido=?, @dni=?, @fecha_nacimiento=?, @genero=?,
-                @email=?, @telefono=?, @direccion=?, @departamento=?, @distrito=?,
-                @nivel_educativo=?, @profesion=?, @motivacion=?, @experiencia=?, @experiencia_detalle=?
-        """,
+SQL_REGISTRAR_POSTULANTE = """
+    EXEC SP_REGISTRAR_POSTULANTE_WEB 
+        @nombre=?, @apellido=?, @dni=?, @fecha_nacimiento=?, @genero=?,
+        @email=?, @telefono=?, @direccion=?, @departamento=?, @distrito=?,
+        @nivel_educativo=?, @profesion=?, @motivacion=?, @experiencia=?, @experiencia_detalle=?
+"""
+
+# SQL Server acepta hasta 2100 parámetros por batch → 15 por postulante
+LOTE_POSTULANTES = 100
+
+
+def _params_postulante(postulante: PostulanteWeb) -> tuple:
+    return (
         postulante.nombre.strip(),
         postulante.apellido.strip(),
         postulante.dni.strip(),
@@ -76,31 +81,216 @@ def registrar_postulante(postulante: PostulanteWeb):
         postulante.profesion.strip(),
         postulante.motivacion.strip(),
         int(postulante.experiencia),
-        postulante.experiencia_detalle.strip() if postulante.experiencia_detalle else None
+        postulante.experiencia_detalle.strip() if postulante.experiencia_detalle else None,
+    )
+
+
+def _respuesta_registro(row) -> dict:
+    if row and row[0] == "SUCCESS":
+        return {
+            "status": row[0],
+            "id_postulante": row[1],
+            "nombre_completo": row[2],
+            "dni": row[3],
+            "email": row[4],
+            "fecha_registro": row[5],
+            "edad": row[6],
+            "mensaje": row[7]
+        }
+    # Si SP devuelve ERROR, row[2] es el mensaje
+    return {
+        "status": "ERROR",
+        "mensaje": row[2] if row and len(row) > 2 else "No se pudo registrar el postulante"
+    }
+
+
+def _dni_ya_registrado(postulante: PostulanteWeb) -> dict | None:
+    """DNI en el índice (confirmado con un SELECT puntual) → misma respuesta que daría el SP."""
+    if Indiceunicidad.postulantes_dni.ocupado(postulante.dni.strip()):
+        return {"status": "ERROR", "mensaje": "Ya existe un postulante registrado con ese DNI"}
+    return None
+
+
+def _al_registrar(res: dict):
+    """Después de cada registro exitoso: índice de DNIs + aviso al dashboard."""
+    if res.get("status") == "SUCCESS":
+        Indiceunicidad.postulantes_dni.registrar(res.get("dni"), res.get("id_postulante"))
+        Contadoreskpi.postulante_registrado()
+        Eventosdashboard.publicar(
+            "postulante_registrado",
+            {"id_postulante": res.get("id_postulante"), "nombre": res.get("nombre_completo")},
+            afecta=["kpi", "postulantes-mes"],
         )
+        Actividadreciente.registrar("Postulante", "Nuevo postulante registrado", res.get("nombre_completo"))
+
+
+def _sin_terminar(e: Exception) -> dict:
+    """Resultado de una fila que no llegó a ejecutarse (conexión caída): el llamador puede reintentarla."""
+    return {"status": "ERROR", "reintentar": True, "mensaje": f"Conexión con la BD perdida: {e}"}
+
+
+def _registrar_uno_a_uno(conn, postulantes: list[PostulanteWeb]) -> tuple[list[dict], Exception | None]:
+    """
+    Fallback fila por fila (aísla el error de cada postulante).
+    Si se cae la conexión se corta ahí: retorna los resultados de las filas ya
+    terminadas (commiteadas) y la excepción; el resto queda para reintento.
+    """
+    resultados = []
+    cursor = conn.cursor()
+    for postulante in postulantes:
+        try:
+            cursor.execute(SQL_REGISTRAR_POSTULANTE, _params_postulante(postulante))
+            row = cursor.fetchone() if cursor.description else None
+            conn.commit()
+            resultados.append(_respuesta_registro(row))
+        except pyodbc.OperationalError as e:
+            # Conexión caída: no es culpa de la fila
+            return resultados, e
+        except pyodbc.Error as e:
+            conn.rollback()
+            resultados.append({"status": "ERROR", "mensaje": str(e)})
+    return resultados, None
+
+
+def registrar_postulantes_lote(postulantes: list[PostulanteWeb]) -> list[dict]:
+    """
+    Registra muchos postulantes con UNA conexión del pool y una transacción
+    por lote: cada lote viaja como un solo batch con N EXEC (un round trip)
+    y se lee el SELECT de status de cada SP con nextset().
+    Si un lote falla (o el SP devuelve algo inesperado) se hace rollback y
+    ese lote se reintenta fila por fila para reportar el error exacto.
+    Los DNIs que el índice en memoria ya conoce se rechazan sin ir a la BD.
+    Retorna un resultado por postulante, en el mismo orden. Si la conexión se
+    cae a mitad de camino, las filas ya commiteadas conservan su resultado y
+    las que no llegaron a ejecutarse vuelven con "reintentar": True.
+    """
+    resultados: list[dict | None] = [_dni_ya_registrado(p) for p in postulantes]
+    pendientes = [i for i, r in enumerate(resultados) if r is None]
+    if not pendientes:
+        return resultados
+
+    registrados: list[dict] = []
+    caida: Exception | None = None
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        for i in range(0, len(pendientes), LOTE_POSTULANTES):
+            lote = [postulantes[j] for j in pendientes[i:i + LOTE_POSTULANTES]]
+            sql = "SET NOCOUNT ON;\n" + ";\n".join([SQL_REGISTRAR_POSTULANTE] * len(lote))
+            params = [valor for p in lote for valor in _params_postulante(p)]
+            try:
+                cursor.execute(sql, params)
+                filas = []
+                while True:
+                    if cursor.description:
+                        filas.append(cursor.fetchone())
+                    if not cursor.nextset():
+                        break
+                if len(filas) != len(lote):
+                    raise pyodbc.Error(f"Se esperaban {len(lote)} resultados y llegaron {len(filas)}")
+                conn.commit()
+                registrados.extend(_respuesta_registro(row) for row in filas)
+            except pyodbc.OperationalError as e:
+                # Conexión caída: el lote no se commiteó, ni este ni los siguientes se ejecutan
+                caida = e
+            except pyodbc.Error as e:
+                print(f"⚠️ Lote {i // LOTE_POSTULANTES + 1} falló ({e}), reintentando fila por fila...")
+                conn.rollback()
+                parcial, caida = _registrar_uno_a_uno(conn, lote)
+                registrados.extend(parcial)
+            if caida is not None:
+                print(f"⚠️ Conexión perdida tras {len(registrados)} de {len(pendientes)} postulantes: {caida}")
+                conn.invalidate()
+                break
+
+    for j, res in zip(pendientes, registrados):
+        _al_registrar(res)
+        resultados[j] = res
+    for j in pendientes[len(registrados):]:
+        resultados[j] = _sin_terminar(caida)
+    return resultados
+
+
+def _registro_previo(postulante: PostulanteWeb) -> dict | None:
+    """
+    Reintento de la cola que choca con "DNI ya registrado": si la fila existente
+    tiene el mismo DNI y email es la de un intento anterior que sí se commiteó.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, email FROM postulantes WHERE dni = ?", (postulante.dni.strip(),))
+        row = cursor.fetchone()
+    if row and (row[1] or "").lower().strip() == postulante.email.lower().strip():
+        return {
+            "status": "SUCCESS",
+            "id_postulante": row[0],
+            "dni": postulante.dni.strip(),
+            "email": row[1],
+            "nombre_completo": f"{postulante.nombre.strip()} {postulante.apellido.strip()}",
+            "mensaje": "Registrado en un intento anterior",
+        }
+    return None
+
+
+def _registrar_desde_cola(payloads: list[dict], intentos: list[int]) -> list[dict]:
+    postulantes = [PostulanteWeb.model_validate(p) for p in payloads]
+    resultados = registrar_postulantes_lote(postulantes)
+    for i, (postulante, res) in enumerate(zip(postulantes, resultados)):
+        if intentos[i] and res.get("status") == "ERROR" and not res.get("reintentar"):
+            previo = _registro_previo(postulante)
+            if previo:
+                _al_registrar(previo)
+                resultados[i] = previo
+    return resultados
+
+
+def iniciar_cola_registro():
+    """Arranca el worker write-behind si REGISTRO_ASINCRONO=1 (se llama en el startup)."""
+    if Colaregistro.ACTIVO:
+        Colaregistro.iniciar_worker(_registrar_desde_cola)
+
+
+# ===============================
+# ENDPOINT CON SP
+# ===============================
+@router.post("/registrar", tags=["Registro Web"])
+def registrar_postulante(postulante: PostulanteWeb):
+    duplicado = _dni_ya_registrado(postulante)
+    if duplicado:
+        return duplicado
+
+    # Modo write-behind: se guarda en el journal local y se responde al instante
+    if Colaregistro.ACTIVO:
+        tracking_id = Colaregistro.encolar(postulante.model_dump(mode="json"))
+        return {
+            "status": "ENCOLADO",
+            "tracking_id": tracking_id,
+            "mensaje": "Tu registro fue recibido y se está procesando"
+        }
+
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        # Ejecutar SP
+        cursor.execute(SQL_REGISTRAR_POSTULANTE, _params_postulante(postulante))
         
         # Obtener resultado del SP
         row = cursor.fetchone()
         cursor.commit()
         conn.close()
 
-        if row and row[0] == "SUCCESS":
-            return {
-                "status": row[0],
-                "id_postulante": row[1],
-                "nombre_completo": row[2],
-                "dni": row[3],
-                "email": row[4],
-                "fecha_registro": row[5],
-                "edad": row[6],
-                "mensaje": row[7]
-            }
-        else:
-            # Si SP devuelve ERROR, row[2] es el mensaje
-            return {
-                "status": "ERROR",
-                "mensaje": row[2] if row and len(row) > 2 else "No se pudo registrar el postulante"
-            }
+        res = _respuesta_registro(row)
+        _al_registrar(res)
+        return res
     
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/estado/{tracking_id}", tags=["Registro Web"])
+def estado_registro(tracking_id: str):
+    """Estado de un registro recibido en modo write-behind."""
+    data = Colaregistro.consultar(tracking_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="Registro no encontrado")
+    return {"status": "SUCCESS", "data": data}
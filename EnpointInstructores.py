@@ -2,9 +2,10 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List
-from Conexionsql import get_connection
+from Conexionsql import get_connection, filas_como_dicts
+import Metricas
 
-app = FastAPI()
+app = FastAPI(default_response_class=Metricas.JSONMedido)
 
 # ---------------------------
 # FunciÃ³n genÃ©rica para ejecutar SP
@@ -20,9 +21,7 @@ def ejecutar_sp(sp_nombre: str, params: tuple = ()):
                 cursor.execute(f"EXEC {sp_nombre}")
             
             if cursor.description:  # SP devuelve filas
-                columns = [col[0] for col in cursor.description]
-                rows = cursor.fetchall()
-                resultados = [dict(zip(columns, row)) for row in rows]
+                resultados = filas_como_dicts(cursor)
                 return resultados
             else:  # SP solo devuelve status / mensaje
                 return [{"status": "SUCCESS", "mensaje": "SP ejecutado correctamente"}]
@@ -0,0 +1,181 @@
+# Estadisticassql.py
+"""
+Modo diagnóstico: SET STATISTICS IO / TIME de SQL Server por SP (opt-in)
+
+Se activa por request o globalmente:
+    - Header "X-SQL-Stats: 1" + token de sesión admin válido (solo ese request)
+    - Toggle admin con vencimiento (POST /api/admin/diagnostico/sql-stats),
+      compartido entre workers vía DATOS_LOCALES_DIR/diagnostico.db
+
+Con el modo activo, Conexionsql envuelve cada sentencia:
+    SET STATISTICS IO ON; SET STATISTICS TIME ON   → EXEC ... → (resto de result sets) → OFF
+y parsea los mensajes informativos que devuelve pyodbc (cursor.messages):
+    lecturas lógicas / físicas por tabla, CPU y tiempo transcurrido en el servidor.
+
+Resultado: header "X-SQL-Stats" (JSON por SP), "sql-cpu" / "sql-elapsed" en el
+Server-Timing, y el campo "estadisticas" en el log de SQL lento.
+Cuesta 2 idas y vueltas extra por sentencia: no dejarlo prendido.
+"""
+import asyncio
+import json
+import re
+import time
+from contextlib import closing
+from contextvars import ContextVar
+from datetime import datetime
+
+from fastapi import HTTPException, Request
+
+import Metricas
+import Sesionadmin
+from Journallocal import abrir_sqlite
+
+ACTIVAR    = "SET STATISTICS IO ON; SET STATISTICS TIME ON;"
+DESACTIVAR = "SET STATISTICS IO OFF; SET STATISTICS TIME OFF;"
+MINUTOS_MAX = 120
+_CACHE_S = 5          # cada cuánto se relee el toggle global (tarea de fondo, fuera del request)
+_HEADER_MAX = 7000    # bytes del header X-SQL-Stats
+
+_RE_TABLA = re.compile(
+    r"Table '([^']+)'\. Scan count (\d+), logical reads (\d+), physical reads (\d+)"
+    r"(?:.*?read-ahead reads (\d+))?(?:.*?lob logical reads (\d+))?", re.IGNORECASE)
+_RE_EJECUCION = re.compile(r"Execution Times:\s*CPU time = (\d+) ms,\s*elapsed time = (\d+) ms", re.IGNORECASE)
+_RE_COMPILACION = re.compile(r"parse and compile time:\s*CPU time = (\d+) ms,\s*elapsed time = (\d+) ms", re.IGNORECASE)
+
+_solicitud: ContextVar = ContextVar("estadisticas_sql", default=None)
+_global = {"expira": 0.0}
+_refresco: asyncio.Task | None = None
+
+
+# =============================================
+# ACTIVACIÓN
+# =============================================
+def _db():
+    db = abrir_sqlite("diagnostico.db")
+    db.execute("CREATE TABLE IF NOT EXISTS estado (clave TEXT PRIMARY KEY, valor TEXT)")
+    return db
+
+
+def _leer_global() -> float:
+    """Relee el toggle compartido (lo fijó cualquier worker) y lo deja en _global. Bloqueante."""
+    try:
+        with closing(_db()) as db:
+            fila = db.execute("SELECT valor FROM estado WHERE clave = 'sql_stats_expira'").fetchone()
+        _global["expira"] = float(fila["valor"]) if fila else 0.0
+    except Exception as e:
+        print(f"⚠️ No se pudo leer el modo diagnóstico SQL: {e}")
+    return _global["expira"]
+
+
+def _expira_global() -> float:
+    """Lo último leído: el request nunca abre el SQLite (ver iniciar_refresco)."""
+    return _global["expira"]
+
+
+async def _refrescar():
+    while True:
+        await asyncio.to_thread(_leer_global)
+        await asyncio.sleep(_CACHE_S)
+
+
+def iniciar_refresco():
+    """Tarea de fondo que relee el toggle global cada _CACHE_S segundos (llamar en el startup)."""
+    global _refresco
+    if _refresco is None or _refresco.done():
+        _refresco = asyncio.create_task(_refrescar())
+
+
+def fijar_modo_global(minutos: int) -> dict:
+    """minutos > 0 → activo hasta entonces; 0 → apagado."""
+    expira = time.time() + min(minutos, MINUTOS_MAX) * 60 if minutos > 0 else 0.0
+    with closing(_db()) as db:
+        db.execute("INSERT OR REPLACE INTO estado (clave, valor) VALUES ('sql_stats_expira', ?)", (str(expira),))
+    _global["expira"] = expira
+    return estado_global()
+
+
+def estado_global() -> dict:
+    expira = _leer_global()
+    activo = expira > time.time()
+    return {"activo": activo, "expira": datetime.fromtimestamp(expira).isoformat() if activo else None}
+
+
+def solicitado(scope: dict) -> bool:
+    """¿Este request captura estadísticas? (lo decide el middleware de main.py)"""
+    if _expira_global() > time.time():
+        return True
+    request = Request(scope)
+    if request.headers.get("x-sql-stats", "").lower() not in ("1", "true", "si"):
+        return False
+    token = Sesionadmin.token_de_request(request)
+    if not token:
+        return False
+    try:
+        # corre en el event loop: firma + vencimiento + revocación ya en memoria, sin SQLite
+        Sesionadmin.verificar_token(token, refrescar=False)
+    except HTTPException:
+        return False
+    return True
+
+
+def activar():
+    return _solicitud.set([])
+
+
+def desactivar(token):
+    _solicitud.reset(token)
+
+
+def activo() -> bool:
+    return _solicitud.get() is not None
+
+
+# =============================================
+# MENSAJES → NÚMEROS
+# =============================================
+def parsear(mensajes: list) -> dict:
+    """
+    Mensajes de pyodbc ([(estado, texto), ...]) → totales de la sentencia.
+    CPU / elapsed: el mayor "Execution Times" (el del EXEC completo, que incluye a los internos).
+    """
+    tablas: dict[str, int] = {}
+    fisicas = cpu = transcurrido = compilacion = 0
+    for mensaje in mensajes:
+        texto = mensaje[1] if isinstance(mensaje, (tuple, list)) else str(mensaje)
+        for m in _RE_TABLA.finditer(texto):
+            tablas[m.group(1)] = tablas.get(m.group(1), 0) + int(m.group(3)) + int(m.group(6) or 0)
+            fisicas += int(m.group(4)) + int(m.group(5) or 0)
+        for m in _RE_EJECUCION.finditer(texto):
+            cpu = max(cpu, int(m.group(1)))
+            transcurrido = max(transcurrido, int(m.group(2)))
+        for m in _RE_COMPILACION.finditer(texto):
+            compilacion += int(m.group(2))
+    return {
+        "lecturas_logicas": sum(tablas.values()),
+        "lecturas_fisicas": fisicas,
+        "cpu_ms": cpu,
+        "elapsed_ms": transcurrido,
+        "compilacion_ms": compilacion,
+        "tablas": dict(sorted(tablas.items(), key=lambda kv: -kv[1])[:10]),
+    }
+
+
+def agregar(sp: str, estadisticas: dict):
+    recolectadas = _solicitud.get()
+    if recolectadas is None:
+        return
+    recolectadas.append({"sp": sp, **estadisticas})
+    Metricas.sumar_tiempo("sql-cpu", estadisticas["cpu_ms"] / 1000)
+    Metricas.sumar_tiempo("sql-elapsed", estadisticas["elapsed_ms"] / 1000)
+
+
+def header() -> str | None:
+    """JSON compacto para "X-SQL-Stats" (se recorta si no entra en el header)."""
+    recolectadas = _solicitud.get()
+    if not recolectadas:
+        return None
+    valor = json.dumps(recolectadas, separators=(",", ":"), ensure_ascii=True)
+    while len(valor) > _HEADER_MAX and recolectadas:
+        recolectadas = [{k: v for k, v in r.items() if k != "tablas"} for r in recolectadas[:-1]]
+        valor = json.dumps(recolectadas + [{"recortado": True}], separators=(",", ":"), ensure_ascii=True)
+    return valor
@@ -0,0 +1,74 @@
+# Eventosdashboard.py
+"""
+Bus de eventos en proceso para el dashboard admin (Server-Sent Events)
+
+Las escrituras admin / el registro web llaman a `publicar(...)` y cada
+dashboard abierto recibe el evento por GET /api/admin/dashboard/stream,
+en lugar de re-consultar los SP_DS_* con un timer.
+
+`publicar` es thread-safe (los endpoints síncronos corren en el threadpool).
+⚠️ Con varios workers de uvicorn, cada cliente solo ve los eventos de las
+escrituras atendidas por su mismo worker.
+"""
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+MAX_EN_COLA = 100   # por cliente: si no lee, se descartan los más viejos
+HEARTBEAT   = 15    # seg. entre comentarios keep-alive
+
+_suscriptores: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+_lock = threading.Lock()
+
+
+def _poner(cola: asyncio.Queue, evento: dict):
+    if cola.full():
+        cola.get_nowait()
+    cola.put_nowait(evento)
+
+
+def publicar(tipo: str, datos: dict | None = None, afecta: list[str] | None = None):
+    """
+    tipo:   ej. "miembro_creado", "postulante_registrado"
+    datos:  payload del evento (JSON-serializable)
+    afecta: tarjetas / gráficos del dashboard que cambian (el frontend solo refresca esos)
+    """
+    evento = {
+        "tipo": tipo,
+        "fecha": datetime.now().isoformat(),
+        "datos": datos or {},
+        "afecta": afecta or [],
+    }
+    with _lock:
+        suscriptores = list(_suscriptores)
+    for loop, cola in suscriptores:
+        try:
+            loop.call_soon_threadsafe(_poner, cola, evento)
+        except RuntimeError:
+            # loop cerrado (worker apagándose)
+            pass
+
+
+async def stream(request):
+    """Generador SSE para StreamingResponse. Termina cuando el cliente se desconecta."""
+    cola: asyncio.Queue = asyncio.Queue(maxsize=MAX_EN_COLA)
+    suscriptor = (asyncio.get_running_loop(), cola)
+    with _lock:
+        _suscriptores.add(suscriptor)
+    try:
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            try:
+                evento = await asyncio.wait_for(cola.get(), timeout=HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"event: {evento['tipo']}\ndata: {json.dumps(evento, default=str, ensure_ascii=False)}\n\n"
+    finally:
+        with _lock:
+            _suscriptores.discard(suscriptor)
+
+
+def total_suscriptores() -> int:
+    return len(_suscriptores)
@@ -0,0 +1,217 @@
+# Extractorfacebook.py
+"""
+Extracción de posts desde el HTML del feed de Facebook (sin navegador)
+
+Lógica pura sobre HTML (html.parser de la stdlib): la usan todas las fuentes
+(Selenium, HTTP, fixtures; ver Fuentesfacebook.py), así que se puede probar y
+medir offline contra snapshots guardados:
+
+    python Extractorfacebook.py datos_locales/snapshots_facebook/
+
+Post = <div role="article"> (o <article>) que no está dentro de otro (los
+comentarios también son role="article"):
+    texto → [data-ad-comet-preview="message"] o, si no hay, los <p> del post
+    foto  → primer <img> del CDN (scontent)
+    id    → del permalink (/posts/..., story_fbid=..., /permalink/...)
+"""
+import hashlib
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from typing import Iterable
+
+_RE_ID_POST = re.compile(r"(?:/posts/|story_fbid=|/permalink/|fbid=)([\w.-]+)")
+_VACIOS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+           "param", "source", "track", "wbr"}
+_BLOQUES = {"div", "p", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote"}
+_VER_MAS = ("Ver más", "See more")
+
+
+def id_contenido(contenido: str) -> str:
+    """idpublicacion: md5 del texto (mismo criterio que las filas ya guardadas)."""
+    return hashlib.md5(contenido.encode('utf-8')).hexdigest()
+
+
+def clave_texto(contenido: str) -> str:
+    """
+    Huella del texto sin importar espacios / saltos de línea. El scraper anterior
+    hasheaba el .text de Selenium, que no espacia igual que este extractor: así se
+    reconocen sus filas aunque el md5 (idpublicacion) no coincida.
+    """
+    return hashlib.md5(" ".join((contenido or "").split()).encode('utf-8')).hexdigest()
+
+
+def _normalizar(partes: list[str]) -> str:
+    lineas = (" ".join(linea.split()) for linea in "".join(partes).split("\n"))
+    return "\n".join(linea for linea in lineas if linea)
+
+
+class _ParserFeed(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.posts: list[dict] = []
+        self._pila: list[str] = []
+        self._post: dict | None = None
+        self._nivel_post = 0
+        self._nivel_mensaje = 0      # >0: dentro del mensaje (data-ad-comet-preview)
+        self._nivel_p = 0            # >0: dentro de un <p> del post (fallback sin mensaje)
+        self._anidados: list[int] = []   # niveles de articles dentro del post (comentarios)
+
+    # -- utilidades de pila --
+    def _abrir(self, tag: str):
+        if tag not in _VACIOS:
+            self._pila.append(tag)
+
+    def _cerrar(self, tag: str) -> int | None:
+        """Cierra hasta `tag` (HTML mal formado: cierra lo que quedó abierto). Retorna el nivel cerrado."""
+        if tag not in self._pila:
+            return None
+        while self._pila:
+            nivel = len(self._pila)
+            if self._pila.pop() == tag:
+                return nivel
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        es_article = tag == "article" or a.get("role") == "article"
+
+        if self._post is None:
+            self._abrir(tag)
+            if es_article:
+                self._post = {"mensaje": [], "parrafos": [], "foto_url": None, "id_post": None}
+                self._nivel_post = len(self._pila)
+            return
+
+        self._abrir(tag)
+        if es_article and tag not in _VACIOS:
+            self._anidados.append(len(self._pila))
+        if self._anidados:
+            return  # comentarios: no son parte del post
+
+        if tag in _BLOQUES:
+            self._texto("\n")
+        if tag == "br":
+            self._texto("\n")
+        if a.get("data-ad-comet-preview") == "message" and not self._nivel_mensaje:
+            self._nivel_mensaje = len(self._pila)
+        if tag == "p" and not self._nivel_p:
+            self._nivel_p = len(self._pila)
+        if tag == "img" and not self._post["foto_url"] and "scontent" in (a.get("src") or ""):
+            self._post["foto_url"] = a["src"]
+        if tag == "a" and not self._post["id_post"]:
+            m = _RE_ID_POST.search(a.get("href") or "")
+            if m:
+                self._post["id_post"] = m.group(1)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VACIOS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        nivel = self._cerrar(tag)
+        if nivel is None or self._post is None:
+            return
+        if nivel <= self._nivel_post:
+            self._terminar_post()
+            return
+        if self._anidados:
+            while self._anidados and nivel <= self._anidados[-1]:
+                self._anidados.pop()
+            return
+        if tag in _BLOQUES:
+            self._texto("\n")
+        if self._nivel_mensaje and nivel <= self._nivel_mensaje:
+            self._nivel_mensaje = 0
+        if self._nivel_p and nivel <= self._nivel_p:
+            self._nivel_p = 0
+
+    def handle_data(self, data):
+        if self._post is not None and not self._anidados:
+            self._texto(data)
+
+    def _texto(self, texto: str):
+        if self._nivel_mensaje:
+            self._post["mensaje"].append(texto)
+        elif self._nivel_p:
+            self._post["parrafos"].append(texto)
+
+    def _terminar_post(self):
+        post, self._post = self._post, None
+        self._nivel_mensaje = self._nivel_p = 0
+        self._anidados = []
+        contenido = _normalizar(post["mensaje"]) or _normalizar(post["parrafos"])
+        if not contenido:
+            return  # sin texto (compartido / solo foto): no se publica
+        truncado = contenido.endswith(_VER_MAS)
+        self.posts.append({
+            "id_post": post["id_post"],
+            "idpublicacion": id_contenido(contenido),
+            "contenido": contenido,
+            "foto_url": post["foto_url"],
+            "truncado": truncado,   # "Ver más" sin expandir: el texto no está completo
+        })
+
+    def close(self):
+        super().close()
+        if self._post is not None:
+            self._terminar_post()
+
+
+def extraer_posts(html: str) -> list[dict]:
+    """Posts del feed en orden de aparición (más nuevo primero)."""
+    parser = _ParserFeed()
+    parser.feed(html)
+    parser.close()
+    return parser.posts
+
+
+def recorrer(paginas: Iterable[str], sincronizados: set[str], max_posts: int,
+             seguidos: int = 3) -> tuple[list[dict], bool]:
+    """
+    Junta los posts de cada página/snapshot del feed (más nuevo → más viejo) hasta
+    `seguidos` posts ya sincronizados consecutivos o `max_posts`. Los sincronizados
+    no se devuelven; uno suelto (post fijado arriba) no corta el recorrido.
+    Retorna (posts, llegó_a_lo_sincronizado): también True si el feed se acaba
+    justo después de un post ya sincronizado.
+    """
+    posts: list[dict] = []
+    vistos = set()
+    racha = 0
+    for html in paginas:
+        for post in extraer_posts(html):
+            if post["id_post"] and post["id_post"] in sincronizados:
+                racha += 1
+                if racha >= seguidos:
+                    return posts, True
+                continue
+            if post["idpublicacion"] in vistos:
+                continue
+            racha = 0
+            vistos.add(post["idpublicacion"])
+            posts.append(post)
+            if len(posts) >= max_posts:
+                return posts, False
+    return posts, racha > 0
+
+
+# Benchmark / prueba offline contra snapshots guardados
+if __name__ == "__main__":
+    import glob
+    import os
+
+    rutas = []
+    for arg in sys.argv[1:] or ["."]:
+        rutas += sorted(glob.glob(os.path.join(arg, "*.html"))) if os.path.isdir(arg) else [arg]
+    for ruta in rutas:
+        with open(ruta, encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        inicio = time.perf_counter()
+        posts = extraer_posts(html)
+        ms = (time.perf_counter() - inicio) * 1000
+        print(f"{os.path.basename(ruta)}: {len(posts)} posts en {ms:.1f} ms ({len(html) / 1024:.0f} KB)")
+        for p in posts:
+            marca = " [truncado]" if p["truncado"] else ""
+            print(f"   {p['id_post'] or '-':>20}  {p['idpublicacion'][:8]}  {p['contenido'][:60]!r}{marca}")
@@ -0,0 +1,241 @@
+# Fuentesfacebook.py
+"""
+Fuentes del HTML del feed de Facebook (la extracción está en Extractorfacebook.py)
+
+    selenium → Chrome headless: expande "Ver más" y hace scroll (la más cara, la más completa)
+    http     → un GET con requests a FB_PAGINA_HTTP (sin navegador: MB y segundos en vez de cientos/decenas)
+    fixture  → re-lee snapshots .html guardados (pruebas y benchmarks offline;
+               por defecto fixtures_facebook/, ver tests/test_extractorfacebook.py)
+
+Todas entregan el HTML de a páginas/snapshots con `paginas()`; cada una se puede
+guardar en DATOS_LOCALES_DIR/snapshots_facebook con FB_GUARDAR_HTML=1 (para
+armar fixtures con lo que de verdad devolvió Facebook).
+
+Selenium / webdriver_manager se importan recién al abrir esa fuente.
+"""
+import abc
+import glob
+import os
+import time
+from datetime import datetime
+from typing import Iterator
+
+import Syncfacebook
+from Descargafotos import crear_sesion
+from Journallocal import ruta_local
+
+FB_PAGINA         = os.getenv("FB_PAGINA", "https://www.facebook.com/paramedicos.pe")
+FB_PAGINA_HTTP    = os.getenv("FB_PAGINA_HTTP", "https://mbasic.facebook.com/paramedicos.pe")
+FB_ESPERA         = float(os.getenv("FB_ESPERA", "20"))     # seg. máximos esperando que aparezca el feed
+FB_FIXTURES_DIR   = os.getenv("FB_FIXTURES_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                  "fixtures_facebook")
+FB_GUARDAR_HTML   = os.getenv("FB_GUARDAR_HTML", "0") == "1"
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")          # fijo → nunca se consulta ChromeDriverManager
+DRIVER_CACHE_DIAS = 7
+SNAPSHOTS_MAX     = 40
+
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+_ARTICULOS = "//div[@role='article']"
+
+
+class Fuente(abc.ABC):
+    nombre = "base"
+
+    def __init__(self):
+        self.bytes_html = 0
+        self._snapshots = 0
+
+    def abrir(self):
+        pass
+
+    @abc.abstractmethod
+    def paginas(self) -> Iterator[str]:
+        """HTML del feed, más nuevo → más viejo (cada página puede repetir las anteriores)."""
+
+    def cerrar(self):
+        pass
+
+    def _entregar(self, html: str) -> str:
+        self.bytes_html += len(html.encode("utf-8"))
+        if FB_GUARDAR_HTML:
+            self._guardar_snapshot(html)
+        return html
+
+    def _guardar_snapshot(self, html: str):
+        directorio = ruta_local("snapshots_facebook")
+        os.makedirs(directorio, exist_ok=True)
+        self._snapshots += 1
+        nombre = f"{datetime.now():%Y%m%d-%H%M%S}-{self.nombre}-{self._snapshots:02d}.html"
+        with open(os.path.join(directorio, nombre), "w", encoding="utf-8") as f:
+            f.write(html)
+        for viejo in sorted(glob.glob(os.path.join(directorio, "*.html")))[:-SNAPSHOTS_MAX]:
+            os.remove(viejo)
+
+
+# =============================================
+# SELENIUM
+# =============================================
+def _ruta_chromedriver(forzar: bool = False) -> str:
+    """
+    CHROMEDRIVER_PATH si está en el .env; si no, la última ruta resuelta por
+    ChromeDriverManager (cacheada DRIVER_CACHE_DIAS) para no consultar la red en cada corrida.
+    """
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+    if not forzar:
+        cache = Syncfacebook.leer_estado("chromedriver")
+        if cache:
+            ruta, _, cuando = cache.partition("|")
+            if os.path.exists(ruta) and time.time() - float(cuando or 0) < DRIVER_CACHE_DIAS * 86400:
+                return ruta
+    from webdriver_manager.chrome import ChromeDriverManager
+    ruta = ChromeDriverManager().install()
+    Syncfacebook.guardar_estado("chromedriver", f"{ruta}|{time.time()}")
+    return ruta
+
+
+class FuenteSelenium(Fuente):
+    nombre = "selenium"
+
+    def __init__(self):
+        super().__init__()
+        self.driver = None
+
+    def abrir(self):
+        from selenium import webdriver
+        from selenium.common.exceptions import SessionNotCreatedException
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-notifications")
+        options.add_argument(f"user-agent={_USER_AGENT}")
+        try:
+            self.driver = webdriver.Chrome(service=Service(_ruta_chromedriver()), options=options)
+        except SessionNotCreatedException:
+            if CHROMEDRIVER_PATH:
+                raise
+            # Chrome se actualizó y el driver cacheado ya no corresponde
+            print("ℹ️ Chromedriver cacheado incompatible, resolviendo de nuevo...")
+            self.driver = webdriver.Chrome(service=Service(_ruta_chromedriver(forzar=True)), options=options)
+
+    def _expandir(self, ya_expandidos: set):
+        """Click en cada "Ver más" visible (una vez) y espera a que desaparezca."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        for boton in self.driver.find_elements(By.XPATH, f"{_ARTICULOS}//div[contains(text(), 'Ver más')]"):
+            if boton.id in ya_expandidos:
+                continue
+            ya_expandidos.add(boton.id)
+            try:
+                self.driver.execute_script("arguments[0].click();", boton)
+                WebDriverWait(self.driver, 3).until(EC.invisibility_of_element(boton))
+            except Exception:
+                pass  # no se colapsó a tiempo: el post queda marcado como truncado
+
+    def paginas(self) -> Iterator[str]:
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self.driver.get(FB_PAGINA)
+        print(f"⏳ Esperando el feed (máx. {FB_ESPERA:.0f}s)...")
+        try:
+            WebDriverWait(self.driver, FB_ESPERA).until(EC.presence_of_element_located((By.XPATH, _ARTICULOS)))
+        except TimeoutException:
+            print("❌ El feed no apareció a tiempo.")
+            return
+
+        expandidos: set = set()
+        while True:
+            self._expandir(expandidos)
+            yield self._entregar(self.driver.page_source)
+
+            cantidad = len(self.driver.find_elements(By.XPATH, _ARTICULOS))
+            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            try:
+                WebDriverWait(self.driver, 8).until(
+                    lambda d: len(d.find_elements(By.XPATH, _ARTICULOS)) > cantidad
+                )
+            except TimeoutException:
+                return  # no cargó nada más
+
+    def cerrar(self):
+        if self.driver:
+            self.driver.quit()
+            self.driver = None
+
+
+# =============================================
+# HTTP (sin navegador)
+# =============================================
+class FuenteHTTP(Fuente):
+    nombre = "http"
+
+    def __init__(self, url: str = FB_PAGINA_HTTP):
+        super().__init__()
+        self.url = url
+        self.sesion = None
+
+    def abrir(self):
+        self.sesion = crear_sesion(1)
+        self.sesion.headers["Accept-Language"] = "es-PE,es;q=0.9"
+
+    def paginas(self) -> Iterator[str]:
+        r = self.sesion.get(self.url, timeout=(5, FB_ESPERA))
+        r.raise_for_status()
+        yield self._entregar(r.text)
+
+    def cerrar(self):
+        if self.sesion:
+            self.sesion.close()
+            self.sesion = None
+
+
+# =============================================
+# FIXTURES (snapshots guardados)
+# =============================================
+class FuenteFixture(Fuente):
+    nombre = "fixture"
+
+    def __init__(self, ruta: str = FB_FIXTURES_DIR):
+        super().__init__()
+        self.ruta = ruta
+
+    def _archivos(self) -> list[str]:
+        """Un .html o una carpeta de .html (en orden de nombre = orden del feed)."""
+        if os.path.isdir(self.ruta):
+            archivos = sorted(glob.glob(os.path.join(self.ruta, "*.html")))
+            if not archivos:
+                raise FileNotFoundError(f"FB_FIXTURES_DIR={self.ruta}: la carpeta no tiene snapshots .html")
+            return archivos
+        if not os.path.isfile(self.ruta):
+            raise FileNotFoundError(f"FB_FIXTURES_DIR={self.ruta}: no existe (carpeta de snapshots .html "
+                                    f"o un .html; se arman con FB_GUARDAR_HTML=1)")
+        return [self.ruta]
+
+    def abrir(self):
+        self._archivos()   # falla antes de medir / recorrer si la ruta no sirve
+
+    def paginas(self) -> Iterator[str]:
+        for archivo in self._archivos():
+            with open(archivo, encoding="utf-8", errors="replace") as f:
+                html = f.read()
+            self.bytes_html += len(html.encode("utf-8"))
+            yield html
+
+
+FUENTES = {"selenium": FuenteSelenium, "http": FuenteHTTP, "fixture": FuenteFixture}
+
+
+def crear_fuente(nombre: str) -> Fuente:
+    if nombre not in FUENTES:
+        raise ValueError(f"Fuente de Facebook desconocida '{nombre}' (opciones: {', '.join(FUENTES)})")
+    return FUENTES[nombre]()
@@ -0,0 +1,94 @@
+# Indicemiembros.py
+"""
+Índice en memoria hash público → id de miembro
+
+El hash que viaja en las tarjetas públicas (QR / links) es el mismo que calcula
+SQL Server con HASHBYTES('MD5', NVARCHAR(id)). Resolverlo en la BD obliga a
+SP_BUSCAR_MIEMBRO_POR_HASH a hashear TODOS los ids (full scan por visita).
+
+Este índice se construye una sola vez al arrancar (un SELECT id FROM miembros)
+y se mantiene con las altas/bajas hechas desde el panel admin, así la búsqueda
+por hash se resuelve en O(1) y el miembro se trae por clave primaria.
+
+⚠️ Con varios workers de uvicorn cada proceso tiene su propio índice: si un hash
+no está, el endpoint cae al SP por hash y aprende el id (nunca da un 404 falso).
+"""
+import hashlib
+import threading
+from Conexionsql import get_connection
+
+
+def generar_hash_id(id: int) -> str:
+    """
+    Replica exactamente lo que hace SQL Server:
+    LOWER(CONVERT(VARCHAR(32), HASHBYTES('MD5', CONVERT(NVARCHAR(50), id)), 2))
+
+    SQL Server HASHBYTES con NVARCHAR usa UTF-16 LE.
+    CONVERT(..., 2) produce hex en mayúsculas → LOWER lo pasa a minúsculas.
+    """
+    id_str = str(id)
+    id_utf16 = id_str.encode('utf-16-le')   # NVARCHAR en SQL Server = UTF-16 LE
+    hash_bytes = hashlib.md5(id_utf16).digest()
+    return hash_bytes.hex()                  # hex en minúsculas = equivale a LOWER(CONVERT(...,2))
+
+
+_lock = threading.Lock()
+_hash_a_id: dict[str, int] = {}
+_en_carga: list[tuple[str, int | None]] | None = None   # altas / bajas mientras construir_indice lee la BD
+
+
+def construir_indice() -> int:
+    """
+    Carga masiva del índice (se llama en el startup). Retorna cuántos ids indexó.
+    Las altas / bajas que llegan mientras corre el SELECT se aplican sobre la foto nueva.
+    """
+    global _hash_a_id, _en_carga
+
+    with _lock:
+        _en_carga = []
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM miembros")
+            ids = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+
+        nuevo = {generar_hash_id(i): i for i in ids}
+
+        with _lock:
+            for hash_id, id_miembro in _en_carga:
+                if id_miembro is None:
+                    nuevo.pop(hash_id, None)
+                else:
+                    nuevo[hash_id] = id_miembro
+            _hash_a_id = nuevo
+    finally:
+        with _lock:
+            _en_carga = None
+
+    return len(nuevo)
+
+
+def registrar_miembro(id_miembro: int):
+    """Alta en el índice (crear miembro / miembro aprendido por fallback)."""
+    if not id_miembro:
+        return
+    hash_id = generar_hash_id(id_miembro)
+    with _lock:
+        _hash_a_id[hash_id] = int(id_miembro)
+        if _en_carga is not None:
+            _en_carga.append((hash_id, int(id_miembro)))
+
+
+def eliminar_miembro(id_miembro: int):
+    """Baja en el índice (eliminación física)."""
+    hash_id = generar_hash_id(id_miembro)
+    with _lock:
+        _hash_a_id.pop(hash_id, None)
+        if _en_carga is not None:
+            _en_carga.append((hash_id, None))
+
+
+def buscar_id(hash_publico: str) -> int | None:
+    """Retorna el id del miembro para ese hash, o None si no está indexado."""
+    return _hash_a_id.get((hash_publico or "").strip().lower())
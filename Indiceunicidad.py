@@ -0,0 +1,155 @@
+# Indiceunicidad.py
+"""
+Índices en memoria de valores únicos (DNI, email, username)
+
+Evitan ir a la BD para:
+- Rechazar DNIs de postulantes/miembros obviamente duplicados.
+- Responder validar-email / validar-username del perfil admin en cada tecla.
+
+Cada índice es un dict valor_normalizado → id. Se cargan al arrancar (un SELECT
+por tabla), se mantienen con las escrituras del API y se recargan
+periódicamente para ver lo que escribieron otros workers.
+
+Regla: un "no está" se responde desde memoria; un "sí está" se confirma con
+la BD (ocupado() / el SP) porque el dato pudo haber cambiado en otro worker.
+"""
+import threading
+from Conexionsql import get_connection
+
+
+def normalizar(valor) -> str:
+    return str(valor or "").strip().lower()
+
+
+class IndiceUnico:
+    def __init__(self, nombre: str):
+        self.nombre = nombre                      # "tabla.columna"
+        self._valores: dict[str, int] = {}
+        self._por_id: dict[int, set[str]] = {}    # id → valores (quitar_id en O(1))
+        self._en_recarga: list[tuple] | None = None
+        self._lock = threading.Lock()
+        self.listo = False
+
+    def iniciar_recarga(self):
+        """Desde aquí hasta reemplazar() las escrituras se anotan para aplicarlas sobre la foto nueva."""
+        with self._lock:
+            self._en_recarga = []
+
+    def cancelar_recarga(self):
+        with self._lock:
+            self._en_recarga = None
+
+    def reemplazar(self, pares):
+        valores: dict[str, int] = {}
+        por_id: dict[int, set[str]] = {}
+        for i, v in pares:
+            if v:
+                valores[normalizar(v)] = i
+                por_id.setdefault(i, set()).add(normalizar(v))
+        with self._lock:
+            self._valores, self._por_id = valores, por_id
+            for operacion, *args in self._en_recarga or ():
+                operacion(self, *args)
+            self._en_recarga = None
+            self.listo = True
+
+    def buscar(self, valor) -> int | None:
+        """Id dueño del valor según memoria, o None si no está registrado."""
+        return self._valores.get(normalizar(valor))
+
+    def ocupado(self, valor) -> bool:
+        """Un "no" sale de memoria; un "sí" se confirma en la BD (y si ya no está, se olvida)."""
+        clave = normalizar(valor)
+        id_dueno = self._valores.get(clave)
+        if id_dueno is None:
+            return False
+        tabla, columna = self.nombre.split(".")
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT 1 FROM {tabla} WHERE {columna} = ?", (str(valor).strip(),))
+            existe = cursor.fetchone() is not None
+        if not existe:
+            with self._lock:
+                if self._valores.get(clave) == id_dueno:
+                    self._quitar(clave, id_dueno)
+        return existe
+
+    def registrar(self, valor, id_dueno):
+        if not valor:
+            return
+        with self._lock:
+            self._registrar(normalizar(valor), id_dueno)
+            if self._en_recarga is not None:
+                self._en_recarga.append((IndiceUnico._registrar, normalizar(valor), id_dueno))
+
+    def quitar_id(self, id_dueno):
+        """Quita los valores de un registro (antes de re-registrarlo tras una edición / al eliminarlo)."""
+        with self._lock:
+            self._quitar_id(id_dueno)
+            if self._en_recarga is not None:
+                self._en_recarga.append((IndiceUnico._quitar_id, id_dueno))
+
+    # ── sin lock: llamar con self._lock tomado ──
+    def _registrar(self, clave: str, id_dueno):
+        anterior = self._valores.get(clave)
+        if anterior is not None and anterior != id_dueno:
+            self._por_id.get(anterior, set()).discard(clave)
+        self._valores[clave] = id_dueno
+        self._por_id.setdefault(id_dueno, set()).add(clave)
+
+    def _quitar(self, clave: str, id_dueno):
+        self._valores.pop(clave, None)
+        self._por_id.get(id_dueno, set()).discard(clave)
+
+    def _quitar_id(self, id_dueno):
+        for clave in self._por_id.pop(id_dueno, ()):
+            if self._valores.get(clave) == id_dueno:
+                del self._valores[clave]
+
+    def __len__(self):
+        return len(self._valores)
+
+
+postulantes_dni   = IndiceUnico("postulantes.dni")
+miembros_dni      = IndiceUnico("miembros.dni")
+admin_username    = IndiceUnico("admin_users.username")
+admin_email       = IndiceUnico("admin_users.email")
+
+# tabla → (consulta "id, col1, col2", índices en el mismo orden que las columnas)
+_TABLAS = {
+    "postulantes": ("SELECT id, dni FROM postulantes",               (postulantes_dni,)),
+    "miembros":    ("SELECT id, dni FROM miembros",                  (miembros_dni,)),
+    "admin_users": ("SELECT id, username, email FROM admin_users",   (admin_username, admin_email)),
+}
+
+
+def recargar(tabla: str) -> int:
+    sql, indices = _TABLAS[tabla]
+    for indice in indices:
+        indice.iniciar_recarga()
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql)
+            filas = cursor.fetchall()
+            conn.commit()
+    except Exception:
+        for indice in indices:
+            indice.cancelar_recarga()
+        raise
+
+    for n, indice in enumerate(indices, start=1):
+        indice.reemplazar((fila[0], fila[n]) for fila in filas)
+    return len(filas)
+
+
+def cargar_todo() -> dict:
+    """Carga/recarga todos los índices. Una tabla que falla no bloquea a las demás."""
+    resumen = {}
+    for tabla in _TABLAS:
+        try:
+            resumen[tabla] = recargar(tabla)
+        except Exception as e:
+            print(f"⚠️ Índice de unicidad '{tabla}' no disponible: {e}")
+            resumen[tabla] = None
+    return resumen
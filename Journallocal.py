@@ -0,0 +1,32 @@
+# Journallocal.py
+"""
+Almacenamiento local en SQLite (modo WAL) para colas e historiales del API.
+Compartido entre los workers de uvicorn de la misma máquina.
+Carpeta configurable con DATOS_LOCALES_DIR (por defecto ./datos_locales).
+"""
+import os
+import sqlite3
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATOS_LOCALES_DIR = os.getenv("DATOS_LOCALES_DIR", "datos_locales")
+
+
+def ruta_local(nombre_archivo: str) -> str:
+    os.makedirs(DATOS_LOCALES_DIR, exist_ok=True)
+    return os.path.join(DATOS_LOCALES_DIR, nombre_archivo)
+
+
+def abrir_sqlite(nombre_archivo: str) -> sqlite3.Connection:
+    """
+    Abre (o crea) la base local. Usar con `with closing(abrir_sqlite(...)) as db:`
+    - WAL: lectores no bloquean al escritor (varios workers)
+    - synchronous=FULL: lo confirmado sobrevive a un corte de luz
+    """
+    db = sqlite3.connect(ruta_local(nombre_archivo), timeout=10, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=FULL")
+    return db
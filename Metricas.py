@@ -0,0 +1,255 @@
+# Metricas.py
+"""
+Métricas del proceso en formato de texto de Prometheus (GET /metrics)
+
+- Histogramas / contadores con etiquetas, en memoria y thread-safe
+  (sin dependencias: prometheus_client no hace falta para esto)
+- `origen`: quién está usando la BD en este momento → "GET /api/admin/usuarios/{id}"
+  en un request (lo fija OrigenMiddleware), "tarea:facebook" en el programador,
+  "-" en lo demás (arranque, threads propios)
+- Colectores: funciones que se llaman al exportar (métricas del pool de conexiones)
+
+Lo alimenta Conexionsql (cada SP: execute / fetch / serialize, filas, bytes, errores).
+Ojo con la cardinalidad: las rutas van como plantilla, nunca con los ids reales.
+
+Además, tiempos POR REQUEST para el header Server-Timing (ver main.py):
+sumar_tiempo / medir acumulan en el request en curso (no hacen nada fuera de uno).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable
+
+from fastapi.responses import JSONResponse
+
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_FILAS    = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
+BUCKETS_BYTES    = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+_LE_INF = 'le="+Inf"'
+_origen: ContextVar = ContextVar("origen_metricas", default="-")
+_tiempos: ContextVar = ContextVar("tiempos_request", default=None)
+
+
+# =============================================
+# ORIGEN (ruta / tarea que ejecuta la consulta)
+# =============================================
+def _plantilla(scope: dict) -> str:
+    """'/api/admin/usuarios/15' + path_params {'id': 15} → '/api/admin/usuarios/{id}'."""
+    partes = scope.get("path", "").split("/")
+    for nombre, valor in (scope.get("path_params") or {}).items():
+        valor = str(valor)
+        partes = [f"{{{nombre}}}" if p == valor else p for p in partes]
+    return "/".join(partes)
+
+
+def origen_actual() -> str:
+    origen = _origen.get()
+    if isinstance(origen, dict):   # scope ASGI: path_params se completa recién al enrutar
+        if "endpoint" not in origen:
+            return f"{origen.get('method', '')} (sin ruta)"
+        return f"{origen.get('method', '')} {_plantilla(origen)}"
+    return origen
+
+
+def fijar_origen(origen: str):
+    """Para threads / tareas propias. Retorna el token para `restaurar_origen`."""
+    return _origen.set(origen)
+
+
+def restaurar_origen(token):
+    _origen.reset(token)
+
+
+class OrigenMiddleware:
+    """ASGI puro (el contextvar llega al threadpool de los endpoints síncronos)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _origen.set(scope)   # el mismo dict que completa el router (endpoint, path_params)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _origen.reset(token)
+
+
+# =============================================
+# TIEMPOS DEL REQUEST (Server-Timing)
+# =============================================
+def iniciar_tiempos() -> tuple[dict, object]:
+    """Lo llama el middleware: retorna (tiempos, token). El mismo dict llega al threadpool."""
+    tiempos: dict[str, list] = {}
+    return tiempos, _tiempos.set(tiempos)
+
+
+def terminar_tiempos(token):
+    _tiempos.reset(token)
+
+
+def sumar_tiempo(fase: str, segundos: float):
+    tiempos = _tiempos.get()
+    if tiempos is None:
+        return
+    acumulado = tiempos.get(fase)
+    if acumulado is None:
+        tiempos[fase] = [segundos, 1]
+    else:
+        acumulado[0] += segundos
+        acumulado[1] += 1
+
+
+@contextmanager
+def medir(fase: str):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        sumar_tiempo(fase, time.perf_counter() - inicio)
+
+
+def server_timing(tiempos: dict, total: float) -> str:
+    """'db-exec;dur=12.4;desc="x3", json;dur=0.8, total;dur=15.1' (ms, como lo muestran las devtools)."""
+    partes = []
+    for fase, (segundos, veces) in tiempos.items():
+        desc = f';desc="x{veces}"' if veces > 1 else ""
+        partes.append(f"{fase};dur={segundos * 1000:.1f}{desc}")
+    partes.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(partes)
+
+
+class JSONMedido(JSONResponse):
+    """JSONResponse que mide el json.dumps del body (fase "json" del Server-Timing)."""
+
+    def render(self, content) -> bytes:
+        with medir("json"):
+            return super().render(content)
+
+
+# =============================================
+# TIPOS DE MÉTRICA
+# =============================================
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = ()):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self._valores: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores, cantidad: float = 1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def lineas(self) -> Iterable[str]:
+        with self._lock:
+            valores = dict(self._valores)
+        for clave, valor in sorted(valores.items()):
+            yield f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(valor)}"
+
+
+class Gauge(Contador):
+    tipo = "gauge"
+
+    def fijar(self, *valores, valor: float):
+        with self._lock:
+            self._valores[valores] = valor
+
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = (), buckets: tuple = BUCKETS_SEGUNDOS):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}   # etiquetas → [conteos por bucket..., +Inf, suma]
+        self._lock = threading.Lock()
+
+    def observar(self, *valores, valor: float):
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [0] * (len(self.buckets) + 2)
+            serie[indice] += 1
+            serie[-1] += valor
+
+    def lineas(self) -> Iterable[str]:
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for clave, serie in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, serie):
+                acumulado += conteo
+                le = 'le="%s"' % _numero(limite)
+                yield f"{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {acumulado}"
+            acumulado += serie[-2]
+            yield f"{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, _LE_INF)} {acumulado}"
+            yield f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(serie[-1])}"
+            yield f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {acumulado}"
+
+
+# =============================================
+# REGISTRO Y EXPORTACIÓN
+# =============================================
+_metricas: dict[str, Contador | Histograma] = {}
+_colectores: list[Callable[[], None]] = []
+_lock = threading.Lock()
+
+
+def _registrar(metrica):
+    with _lock:
+        return _metricas.setdefault(metrica.nombre, metrica)
+
+
+def contador(nombre: str, ayuda: str, etiquetas: tuple = ()) -> Contador:
+    return _registrar(Contador(nombre, ayuda, etiquetas))
+
+
+def gauge(nombre: str, ayuda: str, etiquetas: tuple = ()) -> Gauge:
+    return _registrar(Gauge(nombre, ayuda, etiquetas))
+
+
+def histograma(nombre: str, ayuda: str, etiquetas: tuple = (), buckets: tuple = BUCKETS_SEGUNDOS) -> Histograma:
+    return _registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+
+def registrar_colector(funcion: Callable[[], None]):
+    """`funcion` se llama antes de cada exportación (p. ej. para fijar gauges del pool)."""
+    _colectores.append(funcion)
+
+
+def exportar() -> str:
+    for funcion in _colectores:
+        try:
+            funcion()
+        except Exception as e:
+            print(f"⚠️ Colector de métricas falló: {e}")
+    salida = []
+    with _lock:
+        metricas = sorted(_metricas.values(), key=lambda m: m.nombre)
+    for m in metricas:
+        salida.append(f"# HELP {m.nombre} {m.ayuda}")
+        salida.append(f"# TYPE {m.nombre} {m.tipo}")
+        salida.extend(m.lineas())
+    return "\n".join(salida) + "\n"
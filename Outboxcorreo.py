@@ -0,0 +1,226 @@
+# Outboxcorreo.py
+"""
+Outbox de correos (OTP del login admin)
+
+El request de login ya no espera al servidor SMTP: el correo se guarda en un
+outbox local (SQLite WAL) y un hilo en segundo plano lo envía reutilizando una
+sesión SMTP persistente (STARTTLS + login una sola vez), con reintentos y
+backoff exponencial.
+
+Config (.env):
+    SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS
+    SMTP_STARTTLS=0     → para un SMTP local de pruebas (ej. aiosmtpd / smtp4dev)
+    SMTP_IDLE=60        → seg. que se mantiene abierta la sesión sin uso
+
+Estados: PENDIENTE → ENVIADO | ERROR (reintentos agotados o código ya expirado)
+"""
+import os
+import smtplib
+import threading
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from dotenv import load_dotenv
+
+from Journallocal import abrir_sqlite
+
+load_dotenv()
+
+SMTP_HOST     = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT     = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER     = os.getenv("SMTP_USER")
+SMTP_PASS     = os.getenv("SMTP_PASS")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_IDLE     = float(os.getenv("SMTP_IDLE", "60"))
+
+MAX_INTENTOS = 6
+_ARCHIVO = "outbox_correo.db"
+
+
+def _db():
+    db = abrir_sqlite(_ARCHIVO)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS outbox_correo (
+            id              TEXT PRIMARY KEY,
+            destinatario    TEXT NOT NULL,
+            asunto          TEXT NOT NULL,
+            cuerpo          TEXT NOT NULL,
+            estado          TEXT NOT NULL,
+            intentos        INTEGER NOT NULL DEFAULT 0,
+            proximo_intento REAL NOT NULL,
+            expira          REAL,
+            error           TEXT,
+            creado          TEXT NOT NULL,
+            enviado_en      TEXT
+        )
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS ix_outbox_estado ON outbox_correo (estado, proximo_intento)")
+    return db
+
+
+# =============================================
+# API PÚBLICA
+# =============================================
+def encolar(destinatario: str, asunto: str, cuerpo: str, expira_en_seg: float | None = None) -> str:
+    """Persiste el correo y despierta al sender. Retorna el id para consultar su estado."""
+    correo_id = uuid.uuid4().hex
+    ahora = time.time()
+    with closing(_db()) as db:
+        db.execute(
+            "INSERT INTO outbox_correo (id, destinatario, asunto, cuerpo, estado, proximo_intento, expira, creado) "
+            "VALUES (?, ?, ?, ?, 'PENDIENTE', ?, ?, ?)",
+            (correo_id, destinatario, asunto, cuerpo, ahora,
+             ahora + expira_en_seg if expira_en_seg else None, datetime.now().isoformat()),
+        )
+    iniciar_sender()
+    _hay_trabajo.set()
+    return correo_id
+
+
+def consultar(correo_id: str) -> dict | None:
+    with closing(_db()) as db:
+        row = db.execute(
+            "SELECT id, estado, intentos, error, creado, enviado_en FROM outbox_correo WHERE id = ?",
+            (correo_id,),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+# =============================================
+# SESIÓN SMTP PERSISTENTE
+# =============================================
+class _SesionSMTP:
+    def __init__(self):
+        self._smtp: smtplib.SMTP | None = None
+        self._ultimo_uso = 0.0
+
+    def obtener(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self.cerrar()
+
+        smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=15)
+        if SMTP_STARTTLS:
+            smtp.starttls()
+        if SMTP_USER and SMTP_PASS:
+            smtp.login(SMTP_USER, SMTP_PASS)
+        self._smtp = smtp
+        return smtp
+
+    def enviar(self, destinatario: str, asunto: str, cuerpo: str):
+        msg = MIMEMultipart()
+        msg["From"] = SMTP_USER
+        msg["To"] = destinatario
+        msg["Subject"] = asunto
+        msg.attach(MIMEText(cuerpo, "plain"))
+
+        self.obtener().sendmail(SMTP_USER, destinatario, msg.as_string())
+        self._ultimo_uso = time.monotonic()
+
+    def cerrar_si_ociosa(self):
+        if self._smtp is not None and time.monotonic() - self._ultimo_uso > SMTP_IDLE:
+            self.cerrar()
+
+    def cerrar(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+# =============================================
+# SENDER EN SEGUNDO PLANO
+# =============================================
+def _tomar_siguiente(db):
+    ahora = time.time()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        row = db.execute(
+            "SELECT * FROM outbox_correo WHERE estado = 'PENDIENTE' AND proximo_intento <= ? "
+            "ORDER BY creado LIMIT 1",
+            (ahora,),
+        ).fetchone()
+        if row:
+            # Se "reserva" moviendo proximo_intento: otro worker no lo toma mientras se envía
+            db.execute("UPDATE outbox_correo SET proximo_intento = ? WHERE id = ?", (ahora + 120, row["id"]))
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    return row
+
+
+def procesar_pendientes(sesion: _SesionSMTP) -> int:
+    enviados = 0
+    with closing(_db()) as db:
+        while True:
+            row = _tomar_siguiente(db)
+            if row is None:
+                return enviados
+
+            if row["expira"] and row["expira"] < time.time():
+                db.execute(
+                    "UPDATE outbox_correo SET estado = 'ERROR', cuerpo = '', error = ? WHERE id = ?",
+                    ("El código expiró antes de poder enviarse", row["id"]),
+                )
+                continue
+
+            try:
+                sesion.enviar(row["destinatario"], row["asunto"], row["cuerpo"])
+            except Exception as e:
+                sesion.cerrar()
+                intentos = row["intentos"] + 1
+                agotado = intentos >= MAX_INTENTOS
+                print(f"⚠️ Outbox: fallo enviando a {row['destinatario']} (intento {intentos}): {e}")
+                db.execute(
+                    "UPDATE outbox_correo SET estado = ?, intentos = ?, proximo_intento = ?, error = ?, "
+                    "cuerpo = CASE WHEN ? THEN '' ELSE cuerpo END WHERE id = ?",
+                    ("ERROR" if agotado else "PENDIENTE", intentos,
+                     time.time() + min(2 * 2 ** intentos, 300), str(e), agotado, row["id"]),
+                )
+                continue
+
+            # ✅ Enviado: el cuerpo (con el OTP) no se queda en disco
+            db.execute(
+                "UPDATE outbox_correo SET estado = 'ENVIADO', intentos = intentos + 1, cuerpo = '', "
+                "error = NULL, enviado_en = ? WHERE id = ?",
+                (datetime.now().isoformat(), row["id"]),
+            )
+            enviados += 1
+
+
+_sender: threading.Thread | None = None
+_hay_trabajo = threading.Event()
+_lock_inicio = threading.Lock()
+
+
+def iniciar_sender():
+    """Arranca (una vez por proceso) el hilo que envía los correos pendientes."""
+    global _sender
+    with _lock_inicio:
+        if _sender is not None and _sender.is_alive():
+            return
+
+        def _bucle():
+            sesion = _SesionSMTP()
+            while True:
+                _hay_trabajo.wait(timeout=5)
+                _hay_trabajo.clear()
+                try:
+                    procesar_pendientes(sesion)
+                except Exception as e:
+                    print(f"❌ Error en el sender del outbox: {e}")
+                sesion.cerrar_si_ociosa()
+
+        _sender = threading.Thread(target=_bucle, name="outbox-correo", daemon=True)
+        _sender.start()
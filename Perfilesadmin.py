@@ -0,0 +1,108 @@
+# Perfilesadmin.py
+"""
+Cache del perfil admin (shell del Panel Admin)
+
+Cada página del panel pide el mismo perfil (SP_OBTENER_PERFIL_ADMIN). Se guarda
+por admin_id y la foto ya NO va inline en base64: se reemplaza por una URL
+absoluta, versionada y firmada (.../api/admin/perfil/{id}/foto?v=...&f=...)
+que el navegador cachea. Base: URL_PUBLICA_API del .env, o la del request.
+
+El cache es por proceso: otro worker puede entregar un v= viejo hasta que
+vence PERFIL_CACHE_TTL. El endpoint de la foto acepta cualquier v= con firma
+válida y entrega la foto actual (sin cache si el v= ya no coincide).
+
+Invalidar después de: SP_ACTUALIZAR_PERFIL_ADMIN, SP_ACTUALIZAR_FOTO_ADMIN,
+SP_CAMBIAR_ESTADO_ADMIN y SP_CAMBIAR_PASSWORD_ADMIN.
+"""
+import base64
+import hashlib
+import os
+from datetime import date, datetime
+
+from fastapi import Request
+
+import Sesionadmin
+from Cachememoria import CacheTTL
+
+PERFIL_CACHE_TTL = float(os.getenv("PERFIL_CACHE_TTL", "300"))
+URL_PUBLICA_API  = os.getenv("URL_PUBLICA_API", "").rstrip("/")
+
+_perfiles = CacheTTL(PERFIL_CACHE_TTL, maximo=500)
+
+
+def obtener(admin_id: int) -> dict | None:
+    return _perfiles.obtener(admin_id)
+
+
+def guardar(admin_id: int, perfil: dict):
+    _perfiles.guardar(admin_id, perfil)
+
+
+def invalidar(admin_id: int):
+    _perfiles.invalidar(admin_id)
+
+
+def foto_a_bytes(foto) -> tuple[bytes, str] | None:
+    """foto_perfil (VARBINARY o data URI / base64 en texto) → (bytes, mime)."""
+    if not foto:
+        return None
+    if isinstance(foto, (bytes, bytearray)):
+        data = bytes(foto)
+    else:
+        texto = str(foto)
+        if texto.startswith("data:") and "," in texto:
+            cabecera, texto = texto.split(",", 1)
+            return base64.b64decode(texto), cabecera[5:].split(";")[0] or "image/jpeg"
+        try:
+            data = base64.b64decode(texto, validate=True)
+        except Exception:
+            return None
+
+    if data[:4] == b'\x89PNG':
+        mime = 'image/png'
+    elif data[:4] == b'GIF8':
+        mime = 'image/gif'
+    elif data[:4] == b'RIFF':
+        mime = 'image/webp'
+    else:
+        mime = 'image/jpeg'
+    return data, mime
+
+
+def version_foto(foto) -> str | None:
+    """Huella corta de la foto: cambia la URL cuando cambia la foto."""
+    if not foto:
+        return None
+    crudo = foto if isinstance(foto, (bytes, bytearray)) else str(foto).encode("utf-8")
+    return hashlib.sha1(crudo).hexdigest()[:12]
+
+
+def base_publica(request: Request | None) -> str:
+    """Origen para armar URLs absolutas: URL_PUBLICA_API o esquema + host del request."""
+    if URL_PUBLICA_API or request is None:
+        return URL_PUBLICA_API
+    return f"{request.url.scheme}://{request.url.netloc}"
+
+
+def firma_foto(admin_id: int, version: str) -> str:
+    return Sesionadmin.firma_url(f"foto-admin:{admin_id}:{version}")
+
+
+def preparar_perfil(admin_id: int, perfil: dict, campo_foto: str = "foto_perfil",
+                    base_url: str = "") -> dict:
+    """Foto → URL absoluta versionada y firmada, fechas → ISO (listo para JSON y para cachear)."""
+    resultado = dict(perfil)
+    foto = resultado.get(campo_foto)
+    if isinstance(foto, str) and foto.startswith("http"):
+        pass  # ya es una URL externa
+    elif foto:
+        version = version_foto(foto)
+        resultado[campo_foto] = (f"{base_url}/api/admin/perfil/{admin_id}/foto"
+                                 f"?v={version}&f={firma_foto(admin_id, version)}")
+    else:
+        resultado[campo_foto] = None
+
+    for k, v in resultado.items():
+        if isinstance(v, (date, datetime)):
+            resultado[k] = v.isoformat()
+    return resultado
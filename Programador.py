@@ -0,0 +1,324 @@
+# Programador.py
+"""
+Programador de tareas del API (reemplaza el reloj de Facebook que miraba la hora cada 30 s)
+
+- Horarios estilo cron (5 campos: minuto hora día-mes mes día-semana, hora local):
+  "26 0 * * *", "*/5 * * * *", "0 8-18/2 * * 1-5"...
+- Jitter: cada disparo espera entre 0 y `jitter` segundos (no todos a la vez)
+- Instancia única: con varios workers de uvicorn, cada disparo (tarea + slot)
+  se reclama con un INSERT sobre UNIQUE(tarea, slot) en un SQLite compartido
+  (Journallocal): solo UN worker lo ejecuta. Las tareas `unica=False` (caches
+  en memoria: índices, contadores) corren en TODOS los workers.
+- Historial: inicio, fin, duración, estado (EN_CURSO | OK | ERROR) y detalle;
+  se purga con la tarea "purgar-historial" (ver main.py)
+- Pool de hilos propio: una tarea larga no ocupa el executor por defecto
+
+Uso:
+    Programador.registrar_tarea("facebook", "26 0 * * *", escanear_y_guardar_db, jitter=120)
+    Programador.iniciar()      # en el startup de FastAPI
+"""
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+import Metricas
+from Journallocal import abrir_sqlite
+
+HISTORIAL_DIAS = int(os.getenv("PROGRAMADOR_HISTORIAL_DIAS", "30"))
+TICK_MAX       = 60   # seg. máximos dormido (tolera cambios de hora del servidor)
+
+_ARCHIVO = "programador.db"
+_PID = os.getpid()
+
+
+def _boot_id() -> str:
+    """Identifica el arranque de la máquina: tras un reinicio los PID se repiten."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return f"{time.time() - time.monotonic():.0f}"
+
+
+# Dueño de las ejecuciones unica=False: arranque + PID (un PID reciclado no hereda un EN_CURSO)
+_PROCESO = f"{_boot_id()}:{_PID}"
+
+
+# =============================================
+# EXPRESIONES CRON
+# =============================================
+_RANGOS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _campo(texto: str, minimo: int, maximo: int) -> set[int]:
+    valores = set()
+    for parte in texto.split(","):
+        paso = 1
+        if "/" in parte:
+            parte, paso_txt = parte.split("/", 1)
+            paso = int(paso_txt)
+            if paso < 1:
+                raise ValueError(f"Paso inválido en '{texto}'")
+        if parte == "*":
+            inicio, fin = minimo, maximo
+        elif "-" in parte:
+            inicio, fin = (int(x) for x in parte.split("-", 1))
+        else:
+            inicio = int(parte)
+            fin = maximo if paso > 1 else inicio
+        if inicio < minimo or fin > maximo or inicio > fin:
+            raise ValueError(f"Valor fuera de rango en '{texto}' ({minimo}-{maximo})")
+        valores.update(range(inicio, fin + 1, paso))
+    return valores
+
+
+class Cron:
+    def __init__(self, expresion: str):
+        partes = expresion.split()
+        if len(partes) != 5:
+            raise ValueError(f"Cron inválido '{expresion}': se esperan 5 campos")
+        self.expresion = expresion
+        self.minutos, self.horas, self.dias, self.meses, dias_semana = (
+            _campo(p, mn, mx) for p, (mn, mx) in zip(partes, _RANGOS)
+        )
+        self.dias_semana = {d % 7 for d in dias_semana}   # 0 y 7 = domingo
+        self._dia_libre = partes[2] == "*"
+        self._semana_libre = partes[4] == "*"
+
+    def _dia_ok(self, fecha: datetime) -> bool:
+        dia_semana = (fecha.weekday() + 1) % 7   # cron: 0 = domingo
+        en_mes = fecha.day in self.dias
+        en_semana = dia_semana in self.dias_semana
+        # regla de cron: si ambos campos están restringidos, basta con uno
+        if not self._dia_libre and not self._semana_libre:
+            return en_mes or en_semana
+        return en_mes and en_semana
+
+    def siguiente(self, desde: datetime) -> datetime:
+        """Primer minuto > desde que cumple la expresión."""
+        t = desde.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = t + timedelta(days=366 * 5)
+        while t < limite:
+            if t.month not in self.meses:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._dia_ok(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.horas:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutos:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"El cron '{self.expresion}' nunca se cumple")
+
+
+# =============================================
+# TAREAS
+# =============================================
+@dataclass
+class Tarea:
+    nombre: str
+    cron: Cron
+    funcion: Callable[[], object]
+    jitter: float = 0
+    unica: bool = True             # False → corre en cada worker (caches en memoria)
+    max_duracion: float = 7200     # seg.: un EN_CURSO más viejo se considera abandonado
+    proxima: datetime | None = None
+
+
+_tareas: dict[str, Tarea] = {}
+_en_curso: set[str] = set()
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="programador")
+_bucle: asyncio.Task | None = None
+
+
+def registrar_tarea(nombre: str, cron: str, funcion: Callable[[], object], jitter: float = 0,
+                    unica: bool = True, max_duracion: float = 7200):
+    _tareas[nombre] = Tarea(nombre, Cron(cron), funcion, jitter, unica, max_duracion)
+
+
+def nombres_tareas() -> list[str]:
+    return list(_tareas)
+
+
+# =============================================
+# HISTORIAL (SQLite compartido entre workers)
+# =============================================
+def _db():
+    db = abrir_sqlite(_ARCHIVO)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS ejecuciones (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            tarea       TEXT NOT NULL,
+            slot        TEXT NOT NULL,
+            pid         INTEGER NOT NULL,
+            manual      INTEGER NOT NULL DEFAULT 0,
+            estado      TEXT NOT NULL,
+            inicio      TEXT NOT NULL,
+            inicio_ts   REAL NOT NULL,
+            fin         TEXT,
+            duracion_ms INTEGER,
+            detalle     TEXT,
+            proceso     TEXT,
+            UNIQUE (tarea, slot)
+        )
+    """)
+    if "proceso" not in {c["name"] for c in db.execute("PRAGMA table_info(ejecuciones)")}:
+        db.execute("ALTER TABLE ejecuciones ADD COLUMN proceso TEXT")   # historial de una versión anterior
+    db.execute("CREATE INDEX IF NOT EXISTS ix_ejecuciones_tarea ON ejecuciones (tarea, inicio_ts)")
+    return db
+
+
+def _reclamar(tarea: Tarea, slot: str, manual: bool = False) -> int | None:
+    """Registra la ejecución; None si otro worker ya tomó ese slot (o la tarea sigue corriendo)."""
+    ahora = time.time()
+    with closing(_db()) as db:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            corriendo = db.execute(
+                "SELECT 1 FROM ejecuciones WHERE tarea = ? AND estado = 'EN_CURSO' AND inicio_ts > ? "
+                + ("" if tarea.unica else "AND proceso = ? ") + "LIMIT 1",
+                (tarea.nombre, ahora - tarea.max_duracion) + (() if tarea.unica else (_PROCESO,)),
+            ).fetchone()
+            if corriendo:
+                db.execute("ROLLBACK")
+                return None
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO ejecuciones (tarea, slot, pid, proceso, manual, estado, inicio, inicio_ts) "
+                "VALUES (?, ?, ?, ?, ?, 'EN_CURSO', ?, ?)",
+                (tarea.nombre, slot, _PID, _PROCESO, int(manual), datetime.now().isoformat(), ahora),
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+    return cursor.lastrowid if cursor.rowcount else None
+
+
+def _cerrar(id_ejecucion: int, estado: str, detalle: str | None, inicio: float):
+    with closing(_db()) as db:
+        db.execute(
+            "UPDATE ejecuciones SET estado = ?, fin = ?, duracion_ms = ?, detalle = ? WHERE id = ?",
+            (estado, datetime.now().isoformat(), int((time.perf_counter() - inicio) * 1000),
+             (detalle or "")[:2000] or None, id_ejecucion),
+        )
+
+
+def purgar_historial() -> int:
+    """Borra ejecuciones terminadas de más de HISTORIAL_DIAS. Retorna cuántas borró."""
+    with closing(_db()) as db:
+        cursor = db.execute("DELETE FROM ejecuciones WHERE inicio_ts < ? AND estado != 'EN_CURSO'",
+                            (time.time() - HISTORIAL_DIAS * 86400,))
+    return cursor.rowcount
+
+
+def historial(tarea: str | None = None, limite: int = 50) -> list[dict]:
+    with closing(_db()) as db:
+        filas = db.execute(
+            "SELECT id, tarea, slot, pid, manual, estado, inicio, fin, duracion_ms, detalle "
+            "FROM ejecuciones " + ("WHERE tarea = ? " if tarea else "") +
+            "ORDER BY inicio_ts DESC LIMIT ?",
+            ((tarea,) if tarea else ()) + (limite,),
+        ).fetchall()
+    return [dict(f) | {"manual": bool(f["manual"])} for f in filas]
+
+
+def listar_tareas() -> list[dict]:
+    ultimas = {}
+    with closing(_db()) as db:
+        for f in db.execute(
+            "SELECT tarea, estado, inicio, duracion_ms FROM ejecuciones e "
+            "WHERE inicio_ts = (SELECT MAX(inicio_ts) FROM ejecuciones WHERE tarea = e.tarea)"
+        ).fetchall():
+            ultimas[f["tarea"]] = dict(f)
+    return [
+        {
+            "nombre": t.nombre,
+            "cron": t.cron.expresion,
+            "jitter": t.jitter,
+            "unica": t.unica,
+            "proxima": t.proxima.isoformat() if t.proxima else None,
+            "en_curso_aqui": t.nombre in _en_curso,
+            "ultima": ultimas.get(t.nombre),
+        }
+        for t in _tareas.values()
+    ]
+
+
+# =============================================
+# EJECUCIÓN
+# =============================================
+def _correr(tarea: Tarea, id_ejecucion: int):
+    inicio = time.perf_counter()
+    _en_curso.add(tarea.nombre)
+    origen = Metricas.fijar_origen(f"tarea:{tarea.nombre}")   # etiqueta "ruta" de las métricas SQL
+    try:
+        resultado = tarea.funcion()
+        _cerrar(id_ejecucion, "OK", None if resultado is None else str(resultado), inicio)
+        print(f"✅ Tarea '{tarea.nombre}' completada en {time.perf_counter() - inicio:.1f}s.")
+    except Exception as e:
+        _cerrar(id_ejecucion, "ERROR", f"{type(e).__name__}: {e}", inicio)
+        print(f"❌ Error en la tarea '{tarea.nombre}': {e}")
+    finally:
+        Metricas.restaurar_origen(origen)
+        _en_curso.discard(tarea.nombre)
+
+
+async def _disparar(tarea: Tarea, slot: datetime):
+    if tarea.jitter:
+        await asyncio.sleep(random.uniform(0, tarea.jitter))
+    clave = slot.strftime("%Y-%m-%dT%H:%M")
+    if not tarea.unica:
+        clave += f"@{_PROCESO}"
+    try:
+        id_ejecucion = await asyncio.to_thread(_reclamar, tarea, clave)
+    except Exception as e:
+        print(f"⚠️ No se pudo reclamar la tarea '{tarea.nombre}': {e}")
+        return
+    if id_ejecucion is None:
+        return  # otro worker la tomó, o la anterior sigue corriendo
+    await asyncio.get_running_loop().run_in_executor(_pool, _correr, tarea, id_ejecucion)
+
+
+def ejecutar_ahora(nombre: str) -> int | None:
+    """Disparo manual (admin). Retorna el id de ejecución, o None si ya está corriendo."""
+    tarea = _tareas[nombre]
+    id_ejecucion = _reclamar(tarea, f"manual-{time.time():.6f}@{_PROCESO}", manual=True)
+    if id_ejecucion is not None:
+        _pool.submit(_correr, tarea, id_ejecucion)
+    return id_ejecucion
+
+
+async def _programar():
+    print(f"⏰ Programador activo: {', '.join(f'{t.nombre} [{t.cron.expresion}]' for t in _tareas.values())}")
+    ahora = datetime.now()
+    for t in _tareas.values():
+        t.proxima = t.cron.siguiente(ahora)
+
+    while True:
+        try:
+            ahora = datetime.now()
+            for t in _tareas.values():
+                if t.proxima <= ahora:
+                    asyncio.create_task(_disparar(t, t.proxima))
+                    t.proxima = t.cron.siguiente(ahora)
+            espera = (min((t.proxima for t in _tareas.values()), default=ahora + timedelta(seconds=TICK_MAX))
+                      - datetime.now()).total_seconds()
+        except Exception as e:
+            # Un error aquí no debe dejar al API sin programador: se registra y se sigue
+            print(f"❌ Error en el bucle del programador: {type(e).__name__}: {e}")
+            espera = TICK_MAX
+        await asyncio.sleep(min(max(espera, 0.5), TICK_MAX))
+
+
+def iniciar():
+    """Arranca el bucle (una vez por proceso) dentro del event loop de FastAPI."""
+    global _bucle
+    if _bucle is None or _bucle.done():
+        _bucle = asyncio.create_task(_programar())
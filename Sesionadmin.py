@@ -0,0 +1,213 @@
+# Sesionadmin.py
+"""
+Tokens de sesión del Panel Admin (firmados, sin estado)
+
+verify-otp emite un token HMAC-SHA256 con admin_id, rol y expiración; cada
+request admin lo verifica en el mismo proceso (sin SP_VERIFICAR_SESION_ADMIN).
+
+Formato:  base64url(payload JSON) . base64url(firma)
+Header:   Authorization: Bearer <token>
+SSE:      EventSource no manda headers → ?ticket=... con un ticket de un solo
+          propósito y 60 s de vida (POST /api/admin/dashboard/stream/ticket),
+          aceptado solo en la ruta del stream. El token de sesión nunca va en la URL.
+
+Revocación: logout (por token) y cambio de estado / password (todos los
+tokens del admin emitidos antes). Se guarda en el journal SQLite compartido
+(sesiones_admin.db), así vale para todos los workers; cada proceso relee la
+lista cada REVOCACION_REFRESCO seg. Las filas se borran cuando el token vence.
+
+Config (.env):
+    ADMIN_TOKEN_SECRET        → OBLIGATORIO en producción (igual en todos los workers)
+    ADMIN_TOKEN_DURACION_MIN  → 60 por defecto (POST /api/admin/renovar extiende la sesión)
+    ADMIN_TOKEN_OBLIGATORIO   → 1 por defecto: requests admin sin token = 401 (y exige ADMIN_TOKEN_SECRET)
+                                0 = excepción temporal mientras el frontend migra: sin token se
+                                deja pasar (se avisa al arrancar), un token inválido/vencido
+                                siempre es 401
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import closing
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+from Journallocal import abrir_sqlite
+
+load_dotenv()
+
+DURACION            = int(os.getenv("ADMIN_TOKEN_DURACION_MIN", "60")) * 60
+DURACION_TICKET     = 60
+OBLIGATORIO         = os.getenv("ADMIN_TOKEN_OBLIGATORIO", "1") != "0"
+REVOCACION_REFRESCO = float(os.getenv("ADMIN_REVOCACION_REFRESCO", "2"))
+RUTA_SSE            = "/api/admin/dashboard/stream"
+
+_SECRETO = os.getenv("ADMIN_TOKEN_SECRET", "")
+if not _SECRETO:
+    if OBLIGATORIO:
+        raise RuntimeError("Falta ADMIN_TOKEN_SECRET en el .env (las rutas admin exigen token; "
+                           "ADMIN_TOKEN_OBLIGATORIO=0 solo mientras migra el frontend)")
+    _SECRETO = secrets.token_hex(32)
+    print("⚠️ ADMIN_TOKEN_SECRET no está en el .env: se usa uno temporal "
+          "(los tokens no sirven entre workers ni sobreviven un reinicio).")
+_CLAVE = _SECRETO.encode("utf-8")
+if not OBLIGATORIO:
+    print("⚠️ ADMIN_TOKEN_OBLIGATORIO=0: las rutas /api/admin aceptan requests SIN token "
+          "(logout y revocaciones no protegen nada). Solo durante la migración del frontend.")
+
+_ARCHIVO = "sesiones_admin.db"
+
+# Copia local de la revocación compartida (se relee cada REVOCACION_REFRESCO seg.)
+_lock = threading.Lock()
+_revocados: set[str] = set()                         # jti
+_revocado_antes: dict[int, float] = {}               # admin_id → timestamp
+_leido = 0.0
+
+
+def _db():
+    db = abrir_sqlite(_ARCHIVO)
+    db.execute("CREATE TABLE IF NOT EXISTS tokens_revocados (jti TEXT PRIMARY KEY, expira REAL NOT NULL)")
+    db.execute("CREATE TABLE IF NOT EXISTS admins_revocados (admin_id INTEGER PRIMARY KEY, antes REAL NOT NULL)")
+    return db
+
+
+def _refrescar_revocacion():
+    global _revocados, _revocado_antes, _leido
+    ahora = time.time()
+    if ahora - _leido < REVOCACION_REFRESCO:
+        return
+    with _lock:
+        if ahora - _leido < REVOCACION_REFRESCO:
+            return
+        with closing(_db()) as db:
+            jtis = {f["jti"] for f in db.execute("SELECT jti FROM tokens_revocados WHERE expira > ?", (ahora,))}
+            antes = {f["admin_id"]: f["antes"] for f in db.execute(
+                "SELECT admin_id, antes FROM admins_revocados WHERE antes > ?", (ahora - DURACION,))}
+        _revocados, _revocado_antes, _leido = jtis, antes, ahora
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def _firmar(cuerpo: str) -> str:
+    return _b64(hmac.new(_CLAVE, cuerpo.encode("ascii"), hashlib.sha256).digest())
+
+
+def firma_url(texto: str) -> str:
+    """Firma corta (HMAC con el mismo secreto) para URLs que no pueden llevar el token, ej. <img src>."""
+    return _firmar(texto)[:22]
+
+
+def verificar_firma_url(texto: str, firma: str) -> bool:
+    return hmac.compare_digest(firma or "", firma_url(texto))
+
+
+def _emitir(payload: dict) -> dict:
+    cuerpo = _b64(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return {"token": f"{cuerpo}.{_firmar(cuerpo)}", "expira": payload["exp"]}
+
+
+def emitir_token(admin_id: int, rol: str | None) -> dict:
+    ahora = time.time()
+    return _emitir({
+        "sub": int(admin_id),
+        "rol": rol,
+        "iat": ahora,
+        "exp": int(ahora + DURACION),
+        "jti": secrets.token_hex(8),
+    })
+
+
+def emitir_ticket_sse(sesion: dict) -> dict:
+    """Ticket de 60 s que solo sirve para abrir el stream SSE (va en la URL, no el token de sesión)."""
+    ahora = time.time()
+    return _emitir({
+        "sub": sesion["sub"],
+        "rol": sesion.get("rol"),
+        "iat": ahora,
+        "exp": int(ahora + DURACION_TICKET),
+        "jti": secrets.token_hex(8),
+        "uso": "sse",
+    })
+
+
+def verificar_token(token: str, uso: str | None = None, refrescar: bool = True) -> dict:
+    """
+    Retorna el payload o lanza 401. `uso`: None = token de sesión, "sse" = ticket del stream.
+    refrescar=False: revocación según la copia local, sin abrir el SQLite (para código async).
+    """
+    try:
+        cuerpo, firma = token.split(".")
+        if not hmac.compare_digest(firma, _firmar(cuerpo)):
+            raise ValueError("firma")
+        payload = json.loads(_unb64(cuerpo))
+    except Exception:
+        raise HTTPException(status_code=401, detail="Token de sesión inválido")
+
+    if payload.get("uso") != uso:
+        raise HTTPException(status_code=401, detail="Token de sesión inválido")
+    if payload.get("exp", 0) < time.time():
+        raise HTTPException(status_code=401, detail="La sesión expiró, vuelve a iniciar sesión")
+    if refrescar:
+        _refrescar_revocacion()
+    if payload.get("jti") in _revocados:
+        raise HTTPException(status_code=401, detail="La sesión fue cerrada")
+    if payload.get("iat", 0) <= _revocado_antes.get(payload.get("sub"), 0):
+        raise HTTPException(status_code=401, detail="La sesión ya no es válida, vuelve a iniciar sesión")
+    return payload
+
+
+def revocar_token(payload: dict):
+    ahora = time.time()
+    with closing(_db()) as db:
+        db.execute("INSERT OR REPLACE INTO tokens_revocados (jti, expira) VALUES (?, ?)",
+                   (payload["jti"], payload["exp"]))
+        db.execute("DELETE FROM tokens_revocados WHERE expira <= ?", (ahora,))
+    with _lock:
+        _revocados.add(payload["jti"])
+
+
+def revocar_admin(admin_id: int):
+    """Invalida todos los tokens emitidos hasta ahora para ese admin."""
+    ahora = time.time()
+    with closing(_db()) as db:
+        db.execute("INSERT OR REPLACE INTO admins_revocados (admin_id, antes) VALUES (?, ?)", (int(admin_id), ahora))
+    with _lock:
+        _revocado_antes[int(admin_id)] = ahora
+
+
+def token_de_request(request: Request) -> str | None:
+    """Token de sesión: solo del header (nunca de la URL, que queda en los access logs)."""
+    auth = request.headers.get("Authorization", "")
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip() or None
+    return None
+
+
+def requerir_sesion(request: Request) -> dict | None:
+    """
+    Dependencia para TODAS las rutas admin (menos login / verify-otp).
+    Deja el payload en request.state.admin.
+    """
+    token, uso = token_de_request(request), None
+    if token is None and request.url.path == RUTA_SSE:
+        # EventSource no puede mandar headers: ticket de un solo propósito en la URL
+        token, uso = request.query_params.get("ticket") or None, "sse"
+    if token is None:
+        if OBLIGATORIO:
+            raise HTTPException(status_code=401, detail="Falta el token de sesión")
+        return None
+
+    payload = verificar_token(token, uso)
+    request.state.admin = payload
+    return payload
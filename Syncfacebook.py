@@ -0,0 +1,171 @@
+# Syncfacebook.py
+"""
+Estado local de la sincronización con Facebook (DATOS_LOCALES_DIR/facebook_sync.db)
+
+- estado_sync:  clave → valor (ruta del chromedriver...)
+- posts_vistos: id del post en Facebook → idpublicacion (md5 del contenido);
+                continuo = 1 si se sincronizó sin hueco detrás. Los últimos
+                IDS_PARADA de esos son el watermark: la corrida siguiente
+                para al encontrarlos (un solo id fallaba con un post fijado
+                arriba o con el post borrado)
+- corridas:     historial de cada corrida del bot (tiempos por fase, bytes, posts, errores)
+"""
+import json
+import time
+from contextlib import closing
+from datetime import datetime
+
+from Journallocal import abrir_sqlite
+
+_ARCHIVO = "facebook_sync.db"
+IDS_PARADA = 200
+
+
+def _db():
+    db = abrir_sqlite(_ARCHIVO)
+    db.execute("CREATE TABLE IF NOT EXISTS estado_sync (clave TEXT PRIMARY KEY, valor TEXT)")
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS posts_vistos (
+            id_post       TEXT PRIMARY KEY,
+            idpublicacion TEXT NOT NULL,
+            visto_en      TEXT NOT NULL,
+            continuo      INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    if "continuo" not in {c["name"] for c in db.execute("PRAGMA table_info(posts_vistos)")}:
+        db.execute("ALTER TABLE posts_vistos ADD COLUMN continuo INTEGER NOT NULL DEFAULT 1")   # versión anterior
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS corridas (
+            id             INTEGER PRIMARY KEY AUTOINCREMENT,
+            inicio         TEXT NOT NULL,
+            inicio_ts      REAL NOT NULL,
+            fin            TEXT NOT NULL,
+            duracion_ms    INTEGER NOT NULL,
+            estado         TEXT NOT NULL,
+            fuente         TEXT,
+            revisados      INTEGER,
+            guardadas      INTEGER,
+            omitidas       INTEGER,
+            bytes_html     INTEGER,
+            bytes_fotos    INTEGER,
+            memoria_max_mb INTEGER,
+            fases_ms       TEXT,
+            error          TEXT
+        )
+    """)
+    return db
+
+
+def leer_estado(clave: str) -> str | None:
+    with closing(_db()) as db:
+        fila = db.execute("SELECT valor FROM estado_sync WHERE clave = ?", (clave,)).fetchone()
+    return fila["valor"] if fila else None
+
+
+def guardar_estado(clave: str, valor: str):
+    with closing(_db()) as db:
+        db.execute("INSERT OR REPLACE INTO estado_sync (clave, valor) VALUES (?, ?)", (clave, valor))
+
+
+def ids_sincronizados(limite: int = IDS_PARADA) -> set[str]:
+    """Los últimos posts sincronizados sin hueco: donde para el recorrido del feed."""
+    with closing(_db()) as db:
+        filas = db.execute(
+            "SELECT id_post FROM posts_vistos WHERE continuo = 1 ORDER BY visto_en DESC LIMIT ?", (limite,)
+        ).fetchall()
+    return {f["id_post"] for f in filas}
+
+
+def posts_vistos(ids_post: list[str]) -> set[str]:
+    if not ids_post:
+        return set()
+    with closing(_db()) as db:
+        filas = db.execute(
+            f"SELECT id_post FROM posts_vistos WHERE id_post IN ({','.join('?' * len(ids_post))})",
+            ids_post,
+        ).fetchall()
+    return {f["id_post"] for f in filas}
+
+
+def marcar_sincronizados(posts: list[dict], continuo: bool):
+    """continuo=False (quedó un hueco): sirven para no duplicar, pero no como tope del recorrido."""
+    ahora = datetime.now().isoformat()
+    with closing(_db()) as db:
+        db.execute("BEGIN")
+        db.executemany(
+            "INSERT OR REPLACE INTO posts_vistos (id_post, idpublicacion, visto_en, continuo) VALUES (?, ?, ?, ?)",
+            [(p["id_post"], p["idpublicacion"], ahora, int(continuo)) for p in posts if p["id_post"]],
+        )
+        db.execute("COMMIT")
+
+
+# =============================================
+# HISTORIAL DE CORRIDAS
+# =============================================
+def registrar_corrida(inicio: float, fin: float, resultado: dict, memoria_max_mb: float | None = None) -> int:
+    """inicio / fin: time.time(). `resultado`: el dict de escanear_y_guardar_db (o uno armado si murió)."""
+    with closing(_db()) as db:
+        cursor = db.execute(
+            "INSERT INTO corridas (inicio, inicio_ts, fin, duracion_ms, estado, fuente, revisados, guardadas, "
+            "omitidas, bytes_html, bytes_fotos, memoria_max_mb, fases_ms, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                datetime.fromtimestamp(inicio).isoformat(), inicio, datetime.fromtimestamp(fin).isoformat(),
+                int((fin - inicio) * 1000), resultado.get("estado", "ERROR"), resultado.get("fuente"),
+                resultado.get("revisados"), resultado.get("guardadas"), resultado.get("omitidas"),
+                resultado.get("bytes_html"), resultado.get("bytes_fotos"),
+                int(memoria_max_mb) if memoria_max_mb is not None else None,
+                json.dumps(resultado.get("fases_ms") or {}), (resultado.get("error") or "")[:2000] or None,
+            ),
+        )
+        return cursor.lastrowid
+
+
+def listar_corridas(limite: int = 30) -> list[dict]:
+    with closing(_db()) as db:
+        filas = db.execute(
+            "SELECT id, inicio, fin, duracion_ms, estado, fuente, revisados, guardadas, omitidas, "
+            "bytes_html, bytes_fotos, memoria_max_mb, fases_ms, error "
+            "FROM corridas ORDER BY inicio_ts DESC LIMIT ?",
+            (limite,),
+        ).fetchall()
+    return [dict(f) | {"fases_ms": json.loads(f["fases_ms"] or "{}")} for f in filas]
+
+
+def resumen_corridas(dias: int = 30) -> dict:
+    """Promedios / máximos del período, para seguir el costo del bot en el tiempo."""
+    with closing(_db()) as db:
+        filas = db.execute(
+            "SELECT estado, duracion_ms, guardadas, omitidas, bytes_html, bytes_fotos, memoria_max_mb, fases_ms "
+            "FROM corridas WHERE inicio_ts >= ? ORDER BY inicio_ts",
+            (time.time() - dias * 86400,),
+        ).fetchall()
+    if not filas:
+        return {"dias": dias, "corridas": 0}
+
+    def _prom(valores):
+        valores = [v for v in valores if v is not None]
+        return round(sum(valores) / len(valores), 1) if valores else None
+
+    fases: dict[str, list[int]] = {}
+    for f in filas:
+        for fase, ms in json.loads(f["fases_ms"] or "{}").items():
+            fases.setdefault(fase, []).append(ms)
+    duraciones = sorted(f["duracion_ms"] for f in filas)
+    return {
+        "dias": dias,
+        "corridas": len(filas),
+        "errores": sum(1 for f in filas if f["estado"] == "ERROR"),
+        "duracion_ms": {
+            "promedio": _prom(duraciones),
+            "p50": duraciones[len(duraciones) // 2],
+            "max": duraciones[-1],
+            "ultima": filas[-1]["duracion_ms"],
+        },
+        "fases_ms_promedio": {fase: _prom(valores) for fase, valores in fases.items()},
+        "guardadas_total": sum(f["guardadas"] or 0 for f in filas),
+        "omitidas_total": sum(f["omitidas"] or 0 for f in filas),
+        "bytes_html_promedio": _prom(f["bytes_html"] for f in filas),
+        "bytes_fotos_promedio": _prom(f["bytes_fotos"] for f in filas),
+        "memoria_max_mb": max((f["memoria_max_mb"] for f in filas if f["memoria_max_mb"] is not None), default=None),
+    }
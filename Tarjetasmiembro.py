@@ -0,0 +1,67 @@
+# Tarjetasmiembro.py
+"""
+Cache de tarjetas públicas de miembro (/api/miembros/buscar-por-hash)
+
+Las tarjetas se comparten por QR / links y se leen muchísimo más de lo que
+cambian. Se guarda la respuesta YA renderizada (JSON en bytes) por hash; la
+foto no va inline sino como URL versionada (/api/miembros/foto/{hash}?v=...),
+así el navegador la cachea aparte y la entrada del cache queda en pocos KB.
+
+La invalidación desde admin_usuarios.py (edición, estado/rango, foto) es POR
+PROCESO: los demás workers siguen sirviendo su copia hasta que vence el TTL
+(TARJETAS_CACHE_TTL, 120 s por defecto). Es el desfase máximo aceptado.
+
+Los hashes desconocidos también se cachean (negativo, TTL corto) para que
+el tráfico de enumeración no llegue a la BD.
+"""
+import hashlib
+import os
+import re
+from Cachememoria import CacheTTL
+from Indicemiembros import generar_hash_id
+
+TTL_TARJETA  = float(os.getenv("TARJETAS_CACHE_TTL", "120"))
+TTL_NEGATIVO = float(os.getenv("TARJETAS_NEGATIVO_TTL", "60"))
+MAX_TARJETAS = int(os.getenv("TARJETAS_CACHE_MAX", "5000"))
+
+_tarjetas = CacheTTL(TTL_TARJETA, MAX_TARJETAS)
+_desconocidos = CacheTTL(TTL_NEGATIVO, MAX_TARJETAS * 4)
+
+_RE_HASH = re.compile(r"^[0-9a-f]{32}$")
+
+
+def normalizar_hash(hash_publico: str) -> str | None:
+    """Hash en minúsculas, o None si no tiene formato MD5 (ni vale la pena ir a la BD)."""
+    h = (hash_publico or "").strip().lower()
+    return h if _RE_HASH.match(h) else None
+
+
+def version_foto(contenido: bytes) -> str:
+    """Huella corta de la foto para el ?v= de su URL (cambia solo si cambia la foto)."""
+    return hashlib.md5(contenido).hexdigest()[:12]
+
+
+def obtener(hash_publico: str) -> bytes | None:
+    return _tarjetas.obtener(hash_publico)
+
+
+def guardar(hash_publico: str, contenido: bytes):
+    _tarjetas.guardar(hash_publico, contenido)
+    _desconocidos.invalidar(hash_publico)
+
+
+def es_desconocido(hash_publico: str) -> bool:
+    return _desconocidos.obtener(hash_publico, False)
+
+
+def marcar_desconocido(hash_publico: str):
+    _desconocidos.guardar(hash_publico, True)
+
+
+def invalidar_miembro(id_miembro: int):
+    """Llamar después de cualquier escritura que cambie lo que muestra la tarjeta."""
+    if not id_miembro:
+        return
+    h = generar_hash_id(id_miembro)
+    _tarjetas.invalidar(h)
+    _desconocidos.invalidar(h)
@@ -8,12 +8,16 @@ CRUD de cursos + gestión de inscripciones
 - Nombres de campos consistentes con el frontend
 - Manejo de valores NULL
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from Conexionsql import get_connection
+from Conexionsql import get_connection, filas_como_dicts
+from Sesionadmin import requerir_sesion
+import Metricas
+import Actividadreciente
 
-app = FastAPI()
+# 🔐 Todas las rutas requieren sesión admin (token firmado de verify-otp)
+app = FastAPI(dependencies=[Depends(requerir_sesion)], default_response_class=Metricas.JSONMedido)
 
 # =============================================
 # Función genérica para ejecutar SP
@@ -28,8 +32,7 @@ def _sp(nombre: str, params: tuple = ()):
 
             results = []
             if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                results = [dict(zip(cols, row)) for row in cursor.fetchall()]
+                results = filas_como_dicts(cursor)
 
             # ✅ CLAVE: commit siempre
             conn.commit()
@@ -140,6 +143,8 @@ def crear_curso(curso: CursoCrear):
         curso.fecha_fin,
         curso.admin_id
     ))
+    if resultados[0].get("status") != "ERROR":
+        Actividadreciente.registrar("Curso", "Nuevo curso creado", f"{curso.titulo} — {curso.modalidad}")
     return resultados[0]
 
 
@@ -189,6 +194,8 @@ def actualizar_curso(curso: CursoActualizar):
         curso.fecha_fin,
         curso.admin_id
     ))
+    if resultados[0].get("status") != "ERROR":
+        Actividadreciente.registrar("Curso", "Curso actualizado", curso.titulo)
     return resultados[0]
 
 
@@ -210,6 +217,8 @@ def eliminar_curso(curso: EliminarCurso):
         curso.id_curso,
         curso.admin_id
     ))
+    if resultados[0].get("status") != "ERROR":
+        Actividadreciente.registrar("Curso", "Curso eliminado", f"Curso #{curso.id_curso}")
     return resultados[0]
 
 
@@ -233,4 +242,6 @@ def cambiar_estado_curso(data: CambioEstadoCurso):
         data.nuevo_estado,
         data.admin_id
     ))
+    if resultados[0].get("status") != "ERROR":
+        Actividadreciente.registrar("Curso", f"Curso marcado como {data.nuevo_estado}", f"Curso #{data.id_curso}")
     return resultados[0]
\ No newline at end of file
@@ -4,9 +4,16 @@ Endpoints del Panel Admin — DASHBOARD
 KPIs, gráficos y actividad reciente
 SP usados: SP_DS_KPI_PRINCIPAL, SP_DS_GRAFICO_*,
            SP_DS_ACTIVIDAD_RECIENTE
+Tiempo real: GET /stream (Server-Sent Events, ver Eventosdashboard.py)
 """
-from fastapi import APIRouter, HTTPException
-from Conexionsql import get_connection
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from Conexionsql import get_connection, filas_como_dicts
+import Actividadreciente
+import Contadoreskpi
+import Eventosdashboard
+import Sesionadmin
 
 router = APIRouter()
 
@@ -22,8 +29,7 @@ def _sp(nombre: str, params: tuple = ()):
             sql = f"EXEC {nombre} {placeholders}" if params else f"EXEC {nombre}"
             cursor.execute(sql, params)
             if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                return [dict(zip(cols, row)) for row in cursor.fetchall()]
+                return filas_como_dicts(cursor)
             return [{"status": "SUCCESS"}]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -34,8 +40,12 @@ def _sp(nombre: str, params: tuple = ()):
 # =============================================
 @router.get("/", tags=["Admin - Dashboard"])
 def kpi_principal():
-    rows = _sp("SP_DS_RESUMEN_RANGOS")
-    return {"status": "SUCCESS", "data": rows[0] if rows else {}}
+    # ⚡ Conteos mantenidos en memoria (base del SP en cada reconciliación)
+    data = Contadoreskpi.resumen()
+    if data is None:
+        rows = _sp("SP_DS_RESUMEN_RANGOS")
+        data = rows[0] if rows else {}
+    return {"status": "SUCCESS", "data": data}
 
 
 # =============================================
@@ -46,9 +56,11 @@ def grafico_miembros_por_rango():
     """
     Distribución de miembros por rango (para gráfico de barras/pie).
     
-    SP: SP_DS_GRAFICO_MIEMBROS_RANGO
+    SP: SP_DS_GRAFICO_MIEMBROS_RANGO (o contadores en memoria si están listos)
     Retorna: [{rango: str, cantidad: int}, ...]
     """
+    if Contadoreskpi.esta_listo():
+        return {"status": "SUCCESS", "data": Contadoreskpi.por_rango()}
     return {"status": "SUCCESS", "data": _sp("SP_DS_GRAFICO_MIEMBROS_RANGO")}
 
 
@@ -60,9 +72,11 @@ def grafico_miembros_por_estado():
     """
     Activo / Suspendido / Baja (para gráfico donut).
     
-    SP: SP_DS_GRAFICO_MIEMBROS_ESTADO
+    SP: SP_DS_GRAFICO_MIEMBROS_ESTADO (o contadores en memoria si están listos)
     Retorna: [{estado: str, cantidad: int, porcentaje: decimal}, ...]
     """
+    if Contadoreskpi.esta_listo():
+        return {"status": "SUCCESS", "data": Contadoreskpi.por_estado()}
     return {"status": "SUCCESS", "data": _sp("SP_DS_GRAFICO_MIEMBROS_ESTADO")}
 
 
@@ -126,13 +140,57 @@ def grafico_ocupacion_cursos():
 # GET /actividad-reciente?top=15
 # =============================================
 @router.get("/actividad-reciente", tags=["Admin - Dashboard"])
-def actividad_reciente(top: int = 15):
+def actividad_reciente(top: int = 15, tipo: Optional[str] = None):
     """
-    Feed de los últimos cambios: postulantes, miembros, historial.
+    Feed de los últimos cambios: postulantes, miembros, historial, cursos,
+    eventos, noticias, instructores.
     
-    SP: SP_DS_ACTIVIDAD_RECIENTE
+    SP: SP_DS_ACTIVIDAD_RECIENTE (o buffer en memoria si está listo, ver Actividadreciente.py)
     Parámetros:
         - top: cantidad de registros a retornar (default: 15)
+        - tipo: filtra por tipo (ej. "Miembro", "Postulante", "Curso")
     Retorna: [{tipo: str, descripcion: str, detalle: str, fecha: datetime}, ...]
     """
-    return {"status": "SUCCESS", "data": _sp("SP_DS_ACTIVIDAD_RECIENTE", (top,))}
\ No newline at end of file
+    if Actividadreciente.esta_listo() and top <= Actividadreciente.ACTIVIDAD_MAX:
+        return {"status": "SUCCESS", "data": Actividadreciente.recientes(top, tipo)}
+
+    data = _sp("SP_DS_ACTIVIDAD_RECIENTE", (top,))
+    if tipo:
+        data = [d for d in data if str(d.get("tipo") or "").lower() == tipo.strip().lower()]
+    return {"status": "SUCCESS", "data": data}
+
+
+# =============================================
+# POST /stream/ticket — credencial corta para EventSource
+# =============================================
+@router.post("/stream/ticket", tags=["Admin - Dashboard"])
+def ticket_stream(request: Request):
+    """EventSource no manda headers: en la URL va este ticket (solo sirve para /stream), no el token."""
+    sesion = getattr(request.state, "admin", None)
+    if sesion is None:
+        raise HTTPException(status_code=401, detail="Falta el token de sesión")
+    ticket = Sesionadmin.emitir_ticket_sse(sesion)
+    return {"status": "SUCCESS", "ticket": ticket["token"], "expira": ticket["expira"]}
+
+
+# =============================================
+# GET /stream  — eventos en vivo (SSE)
+# =============================================
+@router.get("/stream", tags=["Admin - Dashboard"])
+async def stream_dashboard(request: Request):
+    """
+    Server-Sent Events: el dashboard recibe los cambios en cuanto ocurren
+    (miembro creado, cambio de estado/rango, nuevo postulante, evento creado...)
+    y solo refresca las tarjetas/gráficos indicados en `afecta`.
+
+    Uso en el frontend (el ticket se pide con el header Authorization y vence en 60 s):
+        const { ticket } = await (await fetch("/api/admin/dashboard/stream/ticket",
+            { method: "POST", headers: { Authorization: `Bearer ${token}` } })).json();
+        const es = new EventSource(`/api/admin/dashboard/stream?ticket=${ticket}`);
+        es.addEventListener("miembro_creado", e => { ... JSON.parse(e.data) ... });
+    """
+    return StreamingResponse(
+        Eventosdashboard.stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
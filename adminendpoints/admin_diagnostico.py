@@ -0,0 +1,37 @@
+# adminendpoints/admin_diagnostico.py
+"""
+Endpoints del Panel Admin — DIAGNÓSTICO
+Modo SET STATISTICS IO/TIME para todos los requests, con vencimiento
+(ver Estadisticassql.py; para un solo request basta el header "X-SQL-Stats: 1")
+"""
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+import Estadisticassql
+
+# 🔥 SIN PREFIX - El prefix se define en main.py
+router = APIRouter(tags=["Admin - Diagnóstico"])
+
+
+class ModoSqlStats(BaseModel):
+    activo: bool
+    minutos: int = 15
+
+
+# ============================================================
+# GET /sql-stats — ¿está activo el modo global? ¿hasta cuándo?
+# ============================================================
+@router.get("/sql-stats")
+async def estado_sql_stats():
+    return {"status": "SUCCESS", "data": await run_in_threadpool(Estadisticassql.estado_global)}
+
+
+# ============================================================
+# POST /sql-stats — {"activo": true, "minutos": 15} (máx. 120)
+# ============================================================
+@router.post("/sql-stats")
+async def fijar_sql_stats(body: ModoSqlStats):
+    minutos = max(body.minutos, 1) if body.activo else 0
+    data = await run_in_threadpool(Estadisticassql.fijar_modo_global, minutos)
+    return {"status": "SUCCESS", "data": data}
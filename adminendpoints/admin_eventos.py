@@ -5,7 +5,9 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import date, time
 
-from Conexionsql import get_connection
+from Conexionsql import get_connection, filas_como_dicts
+import Actividadreciente
+import Eventosdashboard
 
 # 🔥 SIN PREFIX - El prefix se define en main.py
 router = APIRouter(tags=["Admin - Eventos"])
@@ -25,8 +27,7 @@ def _sp(nombre: str, params: tuple = ()):
 
             rows = []
             if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                rows = [dict(zip(cols, r)) for r in cursor.fetchall()]
+                rows = filas_como_dicts(cursor)
 
             conn.commit()  # ✅ SIEMPRE
 
@@ -105,6 +106,13 @@ def crear_evento(body: EventoCrear):
     res = rows[0]
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje"))
+
+    Eventosdashboard.publicar(
+        "evento_creado",
+        {"id_evento": res.get("id_evento"), "titulo": body.titulo, "tipo": body.tipo, "fecha": body.fecha},
+        afecta=["kpi"],
+    )
+    Actividadreciente.registrar("Evento", "Nuevo evento creado", f"{body.titulo} — {body.fecha}")
     
     return res
 
@@ -139,6 +147,7 @@ def actualizar_evento(id_evento: int, body: EventoActualizar):
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje"))
 
+    Actividadreciente.registrar("Evento", "Evento actualizado", body.titulo)
     return res
 
 
@@ -161,6 +170,7 @@ def cambiar_estado_evento(id_evento: int, body: CambioEstadoEvento):
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje"))
 
+    Actividadreciente.registrar("Evento", f"Evento marcado como {body.nuevo_estado}", f"Evento #{id_evento}")
     return res
 
 
@@ -181,4 +191,5 @@ def eliminar_evento(id_evento: int, admin_id: int):
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje"))
 
+    Actividadreciente.registrar("Evento", "Evento eliminado", f"Evento #{id_evento}")
     return res
\ No newline at end of file
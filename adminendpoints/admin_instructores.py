@@ -12,12 +12,16 @@ SP usados (según tu SP real):
 - SP_ASIGNAR_INSTRUCTOR_A_CURSO
 - SP_ASIGNAR_INSTRUCTOR_A_EVENTO
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from Conexionsql import get_connection
+from Conexionsql import get_connection, filas_como_dicts
+from Sesionadmin import requerir_sesion
+import Metricas
+import Actividadreciente
 
-app = FastAPI()
+# 🔐 Todas las rutas requieren sesión admin (token firmado de verify-otp)
+app = FastAPI(dependencies=[Depends(requerir_sesion)], default_response_class=Metricas.JSONMedido)
 
 
 # ============================================================
@@ -33,8 +37,7 @@ def _sp(nombre: str, params: tuple = ()):
 
             rows = []
             if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                rows = [dict(zip(cols, row)) for row in cursor.fetchall()]
+                rows = filas_como_dicts(cursor)
 
             # ✅ clave
             conn.commit()
@@ -70,8 +73,7 @@ def ejecutar_sp_parametros_nombrados(sp_nombre: str, params: dict):
 
             rows = []
             if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                rows = [dict(zip(cols, row)) for row in cursor.fetchall()]
+                rows = filas_como_dicts(cursor)
 
             # ✅ clave
             conn.commit()
@@ -118,15 +120,13 @@ def detalle_instructor(id_instructor: int):
             cursor.nextset()
             cursos = []
             if cursor.description:
-                cols2 = [c[0] for c in cursor.description]
-                cursos = [dict(zip(cols2, r)) for r in cursor.fetchall()]
+                cursos = filas_como_dicts(cursor)
 
             # Result set 3
             cursor.nextset()
             eventos = []
             if cursor.description:
-                cols3 = [c[0] for c in cursor.description]
-                eventos = [dict(zip(cols3, r)) for r in cursor.fetchall()]
+                eventos = filas_como_dicts(cursor)
 
             conn.commit()
 
@@ -169,7 +169,11 @@ def registrar_instructor(instructor: InstructorCrear):
         "@admin_id": instructor.admin_id
     }
     resultados = ejecutar_sp_parametros_nombrados("SP_REGISTRAR_INSTRUCTOR", params)
-    return resultados[0] if resultados else {"status": "SUCCESS"}
+    res = resultados[0] if resultados else {"status": "SUCCESS"}
+    if res.get("status") != "ERROR":
+        Actividadreciente.registrar("Instructor", "Nuevo instructor registrado",
+                                    f"{instructor.nombre_completo} — {instructor.especialidad}")
+    return res
 
 
 # =============================================
@@ -207,7 +211,10 @@ def actualizar_instructor(instr: InstructorActualizar):
         "@admin_id": instr.admin_id
     }
     resultados = ejecutar_sp_parametros_nombrados("SP_ACTUALIZAR_INSTRUCTOR", params)
-    return resultados[0] if resultados else {"status": "SUCCESS"}
+    res = resultados[0] if resultados else {"status": "SUCCESS"}
+    if res.get("status") != "ERROR":
+        Actividadreciente.registrar("Instructor", "Datos de instructor actualizados", instr.nombre_completo)
+    return res
 
 
 # =============================================
@@ -221,7 +228,10 @@ class EliminarInstructor(BaseModel):
 @app.delete("/", tags=["Admin - Instructores"])
 def eliminar_instructor(body: EliminarInstructor):
     rows = _sp("SP_INS_ELIMINAR", (body.id_instructor, body.admin_id))
-    return rows[0] if rows else {"status": "SUCCESS"}
+    res = rows[0] if rows else {"status": "SUCCESS"}
+    if res.get("status") != "ERROR":
+        Actividadreciente.registrar("Instructor", "Instructor dado de baja", f"Instructor #{body.id_instructor}")
+    return res
 
 
 # =============================================
@@ -236,7 +246,11 @@ class AsignarCurso(BaseModel):
 @app.post("/asignar-curso", tags=["Admin - Instructores"])
 def asignar_a_curso(body: AsignarCurso):
     rows = _sp("SP_ASIGNAR_INSTRUCTOR_A_CURSO", (body.id_curso, body.id_instructor, body.admin_id))
-    return rows[0] if rows else {"status": "SUCCESS"}
+    res = rows[0] if rows else {"status": "SUCCESS"}
+    if res.get("status") != "ERROR":
+        Actividadreciente.registrar("Instructor", "Instructor asignado a curso",
+                                    f"Instructor #{body.id_instructor} → Curso #{body.id_curso}")
+    return res
 
 
 # =============================================
@@ -251,4 +265,8 @@ class AsignarEvento(BaseModel):
 @app.post("/asignar-evento", tags=["Admin - Instructores"])
 def asignar_a_evento(body: AsignarEvento):
     rows = _sp("SP_ASIGNAR_INSTRUCTOR_A_EVENTO", (body.id_evento, body.id_instructor, body.admin_id))
-    return rows[0] if rows else {"status": "SUCCESS"}
\ No newline at end of file
+    res = rows[0] if rows else {"status": "SUCCESS"}
+    if res.get("status") != "ERROR":
+        Actividadreciente.registrar("Instructor", "Instructor asignado a evento",
+                                    f"Instructor #{body.id_instructor} → Evento #{body.id_evento}")
+    return res
\ No newline at end of file
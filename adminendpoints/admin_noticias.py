@@ -19,9 +19,11 @@ from fastapi import APIRouter, HTTPException, Form, File, UploadFile
 from fastapi.responses import Response
 from typing import Optional, Any, Dict, List
 from datetime import datetime
-from Conexionsql import get_connection
+from Conexionsql import get_connection, filas_como_dicts
 import base64
 import pyodbc
+import Actividadreciente
+import Metricas
 
 router = APIRouter()
 
@@ -34,7 +36,8 @@ def _bytes_to_b64(b: Optional[bytes]) -> Optional[str]:
     """Convierte bytes a base64 (sin dataURL)."""
     if b is None:
         return None
-    return base64.b64encode(b).decode("utf-8")
+    with Metricas.medir("base64"):
+        return base64.b64encode(b).decode("utf-8")
 
 
 def _parse_fecha(fecha_str: Optional[str]) -> Optional[datetime]:
@@ -60,8 +63,7 @@ def _sp(nombre: str, params: tuple = ()) -> List[Dict[str, Any]]:
 
             results: List[Dict[str, Any]] = []
             if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                results = [dict(zip(cols, row)) for row in cursor.fetchall()]
+                results = filas_como_dicts(cursor)
 
             conn.commit()
             return results if results else [{"status": "SUCCESS"}]
@@ -87,8 +89,7 @@ def ejecutar_sp_con_foto(sp_nombre: str, params: Dict[str, Any]) -> List[Dict[st
 
             results: List[Dict[str, Any]] = []
             if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                results = [dict(zip(cols, row)) for row in cursor.fetchall()]
+                results = filas_como_dicts(cursor)
 
             conn.commit()
             return results if results else [{"status": "SUCCESS", "mensaje": "SP ejecutado correctamente"}]
@@ -266,6 +267,8 @@ async def crear_publicacion(
                 detail=result[0].get("mensaje", "Error al crear publicación")
             )
 
+        Actividadreciente.registrar("Noticia", "Nueva publicación", titulo[:120])
+
         return {
             "status": "SUCCESS",
             "mensaje": result[0].get("mensaje", "Publicación creada correctamente"),
@@ -323,6 +326,8 @@ async def editar_publicacion(
                 detail=result[0].get("mensaje", "Error al editar publicación")
             )
 
+        Actividadreciente.registrar("Noticia", "Publicación editada", titulo[:120])
+
         return {
             "status": "SUCCESS",
             "mensaje": result[0].get("mensaje", "Publicación actualizada correctamente")
@@ -348,6 +353,7 @@ def toggle_destacada(body: dict):
         result = _sp("SP_NOT_TOGGLE_DESTACADA", (idpublicacion,))
         if result and result[0].get("status") == "ERROR":
             raise HTTPException(status_code=400, detail=result[0].get("mensaje"))
+        Actividadreciente.registrar("Noticia", "Publicación destacada/no destacada", f"Publicación {idpublicacion}")
 
         return {"status": "SUCCESS", "mensaje": result[0].get("mensaje", "Estado de destacada actualizado")}
     except HTTPException:
@@ -370,6 +376,7 @@ def toggle_activa(body: dict):
         result = _sp("SP_NOT_TOGGLE_ACTIVA", (idpublicacion,))
         if result and result[0].get("status") == "ERROR":
             raise HTTPException(status_code=400, detail=result[0].get("mensaje"))
+        Actividadreciente.registrar("Noticia", "Publicación activada/desactivada", f"Publicación {idpublicacion}")
 
         return {"status": "SUCCESS", "mensaje": result[0].get("mensaje", "Estado actualizado")}
     except HTTPException:
@@ -392,6 +399,7 @@ def eliminar_publicacion(body: dict):
         result = _sp("SP_NOT_ELIMINAR", (idpublicacion,))
         if result and result[0].get("status") == "ERROR":
             raise HTTPException(status_code=400, detail=result[0].get("mensaje"))
+        Actividadreciente.registrar("Noticia", "Publicación eliminada", f"Publicación {idpublicacion}")
 
         return {"status": "SUCCESS", "mensaje": result[0].get("mensaje", "Publicación eliminada definitivamente")}
     except HTTPException:
@@ -1,11 +1,19 @@
 # adminendpoints/admin_perfil.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
 from Conexionsql import get_connection
+import Indiceunicidad
+import Perfilesadmin
+import Sesionadmin
 
 router = APIRouter()
 
+# Sin dependencia de sesión: el <img> no manda el token. La URL lleva la
+# versión de la foto y una firma HMAC (f=) que solo emite el servidor.
+router_publico = APIRouter()
+
 
 # =============================================
 # MODELOS
@@ -25,12 +33,29 @@ class UsernameValidation(BaseModel):
     admin_id: int | None = None
 
 
+def _disponible_en_memoria(indice, valor: str, admin_id: int | None) -> bool:
+    """
+    True si el índice en memoria garantiza que el valor está libre
+    (no lo usa nadie, o lo usa el mismo admin que se está editando).
+    False → hay que confirmar con el SP.
+    """
+    if not indice.listo:
+        return False
+    dueno = indice.buscar(valor)
+    return dueno is None or (admin_id is not None and dueno == admin_id)
+
+
 # =============================================
 # 1️⃣ OBTENER PERFIL
 # GET /api/admin/perfil/{admin_id}
 # =============================================
 @router.get("/{admin_id}")
-def obtener_perfil(admin_id: int):
+def obtener_perfil(admin_id: int, request: Request):
+    # ⚡ Perfil cacheado (se invalida en cada escritura del perfil)
+    perfil = Perfilesadmin.obtener(admin_id)
+    if perfil is not None:
+        return perfil
+
     try:
         conn = get_connection()
         cursor = conn.cursor()
@@ -42,10 +67,14 @@ def obtener_perfil(admin_id: int):
             raise HTTPException(status_code=404, detail="Administrador no encontrado")
 
         columns = [column[0] for column in cursor.description]
-        result = dict(zip(columns, row))
+        result = Perfilesadmin.preparar_perfil(admin_id, dict(zip(columns, row)),
+                                               base_url=Perfilesadmin.base_publica(request))
+        Perfilesadmin.guardar(admin_id, result)
 
         return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -53,6 +82,40 @@ def obtener_perfil(admin_id: int):
         conn.close()
 
 
+# =============================================
+# 1️⃣.1 FOTO DE PERFIL (binaria, cacheable por el navegador)
+# GET /api/admin/perfil/{admin_id}/foto?v=...&f=...
+# =============================================
+@router_publico.get("/{admin_id}/foto")
+def obtener_foto_perfil(admin_id: int, v: str, f: str = ""):
+    if not Sesionadmin.verificar_firma_url(f"foto-admin:{admin_id}:{v}", f):
+        raise HTTPException(status_code=404, detail="Foto no encontrada")
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT foto_perfil FROM admin_users WHERE id = ?", (admin_id,))
+        row = cursor.fetchone()
+        conn.commit()
+
+    foto = row[0] if row else None
+    if not foto:
+        raise HTTPException(status_code=404, detail="Foto no encontrada")
+
+    contenido = Perfilesadmin.foto_a_bytes(foto)
+    if contenido is None:
+        raise HTTPException(status_code=404, detail="Foto no encontrada")
+
+    data, mime = contenido
+    # La URL cambia con la foto → el navegador puede cachearla sin revalidar.
+    # v= viejo (perfil cacheado en otro worker): se entrega la foto actual, sin cache.
+    vigente = Perfilesadmin.version_foto(foto) == v
+    return Response(
+        content=data,
+        media_type=mime,
+        headers={"Cache-Control": "private, max-age=31536000, immutable" if vigente else "no-cache"},
+    )
+
+
 # =============================================
 # 2️⃣ ACTUALIZAR FOTO
 # PUT /api/admin/perfil/foto
@@ -72,6 +135,8 @@ def actualizar_foto(data: FotoUpdate):
         row = cursor.fetchone()
         conn.commit()
 
+        Perfilesadmin.invalidar(data.admin_id)
+
         columns = [column[0] for column in cursor.description]
         result = dict(zip(columns, row))
 
@@ -90,6 +155,9 @@ def actualizar_foto(data: FotoUpdate):
 # =============================================
 @router.post("/validar-email")
 def validar_email(data: EmailValidation):
+    if _disponible_en_memoria(Indiceunicidad.admin_email, data.email, data.admin_id):
+        return {"disponible": True, "mensaje": "Email disponible"}
+
     try:
         conn = get_connection()
         cursor = conn.cursor()
@@ -119,6 +187,9 @@ def validar_email(data: EmailValidation):
 # =============================================
 @router.post("/validar-username")
 def validar_username(data: UsernameValidation):
+    if _disponible_en_memoria(Indiceunicidad.admin_username, data.username, data.admin_id):
+        return {"disponible": True, "mensaje": "Username disponible"}
+
     try:
         conn = get_connection()
         cursor = conn.cursor()
@@ -0,0 +1,49 @@
+# adminendpoints/admin_programador.py
+"""
+Endpoints del Panel Admin — PROGRAMADOR DE TAREAS
+Ver tareas programadas, su historial y dispararlas a mano (ver Programador.py)
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+
+import Programador
+
+# 🔥 SIN PREFIX - El prefix se define en main.py
+router = APIRouter(tags=["Admin - Programador"])
+
+
+# ============================================================
+# GET /tareas — tareas registradas, próxima y última ejecución
+# ============================================================
+@router.get("/tareas")
+def listar_tareas():
+    return {"status": "SUCCESS", "data": Programador.listar_tareas()}
+
+
+# ============================================================
+# GET /historial?tarea=facebook&limite=50
+# ============================================================
+@router.get("/historial")
+def historial(tarea: Optional[str] = None, limite: int = 50):
+    limite = min(max(limite, 1), 500)
+    return {"status": "SUCCESS", "data": Programador.historial(tarea, limite)}
+
+
+# ============================================================
+# POST /tareas/{nombre}/ejecutar — disparo manual
+# ============================================================
+@router.post("/tareas/{nombre}/ejecutar")
+async def ejecutar_tarea(nombre: str):
+    if nombre not in Programador.nombres_tareas():
+        raise HTTPException(status_code=404, detail=f"No existe la tarea '{nombre}'")
+
+    id_ejecucion = await run_in_threadpool(Programador.ejecutar_ahora, nombre)
+    if id_ejecucion is None:
+        raise HTTPException(status_code=409, detail=f"La tarea '{nombre}' ya está en ejecución")
+
+    return {
+        "status": "SUCCESS",
+        "mensaje": f"Tarea '{nombre}' iniciada",
+        "id_ejecucion": id_ejecucion,
+    }
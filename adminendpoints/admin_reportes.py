@@ -5,12 +5,15 @@ Genera datos listos para exportar a CSV desde el frontend
 Cubre: miembros, postulantes, cursos, instructores, eventos, inscripciones
 SP usados: SP_GU_EXPORTAR_MIEMBROS_CSV, SP_REP_*
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from Conexionsql import get_connection
+from Conexionsql import get_connection, filas_como_dicts
+from Sesionadmin import requerir_sesion
+import Metricas
 
-app = FastAPI()
+# 🔐 Todas las rutas requieren sesión admin (token firmado de verify-otp)
+app = FastAPI(dependencies=[Depends(requerir_sesion)], default_response_class=Metricas.JSONMedido)
 
 
 def _sp(nombre: str, params: tuple = ()):
@@ -21,8 +24,7 @@ def _sp(nombre: str, params: tuple = ()):
             sql = f"EXEC {nombre} {placeholders}" if params else f"EXEC {nombre}"
             cursor.execute(sql, params)
             if cursor.description:
-                cols = [c[0] for c in cursor.description]
-                return [dict(zip(cols, row)) for row in cursor.fetchall()]
+                return filas_como_dicts(cursor)
             conn.commit()
             return [{"status": "SUCCESS"}]
     except Exception as e:
@@ -0,0 +1,31 @@
+# adminendpoints/admin_scraper.py
+"""
+Endpoints del Panel Admin — BOT DE FACEBOOK
+Historial de corridas del scraper: tiempos por fase, bytes, posts y errores
+(ver Ejecutorscraper.py / Syncfacebook.py)
+"""
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+
+import Syncfacebook
+
+# 🔥 SIN PREFIX - El prefix se define en main.py
+router = APIRouter(tags=["Admin - Bot Facebook"])
+
+
+# ============================================================
+# GET /corridas?limite=30 — últimas corridas, la más reciente primero
+# ============================================================
+@router.get("/corridas")
+async def listar_corridas(limite: int = 30):
+    limite = min(max(limite, 1), 500)
+    return {"status": "SUCCESS", "data": await run_in_threadpool(Syncfacebook.listar_corridas, limite)}
+
+
+# ============================================================
+# GET /resumen?dias=30 — promedios del período (para ver regresiones de costo)
+# ============================================================
+@router.get("/resumen")
+async def resumen(dias: int = 30):
+    dias = min(max(dias, 1), 365)
+    return {"status": "SUCCESS", "data": await run_in_threadpool(Syncfacebook.resumen_corridas, dias)}
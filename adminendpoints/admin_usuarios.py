@@ -1,11 +1,26 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from pydantic import BaseModel
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
 from typing import Optional
 from datetime import date
-from Conexionsql import get_connection
+from Conexionsql import get_connection, filas_como_dicts
+from Sesionadmin import requerir_sesion
+from Endpointregistroweb import PostulanteWeb, registrar_postulantes_lote
+import Actividadreciente
+import Contadoreskpi
+import Eventosdashboard
+import Indicemiembros
+import Indiceunicidad
+import Metricas
+import Tarjetasmiembro
 import base64
+import csv
+import io
+import json
+import time
 
-app = FastAPI()
+# 🔐 Todas las rutas requieren sesión admin (token firmado de verify-otp)
+app = FastAPI(dependencies=[Depends(requerir_sesion)], default_response_class=Metricas.JSONMedido)
 
 # ══════════════════════════════════════════════════════════════════
 # HELPER
@@ -27,8 +42,7 @@ def ejecutar_sp(nombre_sp: str, params: tuple = ()):
 
             rows = []
             if cursor.description:
-                columnas = [col[0] for col in cursor.description]
-                rows = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+                rows = filas_como_dicts(cursor)
 
             # ✅ COMMIT SIEMPRE (clave)
             conn.commit()
@@ -39,6 +53,11 @@ def ejecutar_sp(nombre_sp: str, params: tuple = ()):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _publicar_miembro(tipo: str, datos: dict, afecta: list[str]):
+    """Evento SSE del dashboard + los contadores KPI ya actualizados (delta incluido)."""
+    Eventosdashboard.publicar(tipo, {**datos, "kpi": Contadoreskpi.instantanea()}, afecta=afecta)
+
+
 # ══════════════════════════════════════════════════════════════════
 # MODELOS
 # ══════════════════════════════════════════════════════════════════
@@ -124,6 +143,94 @@ def listar_postulantes(
     }
 
 
+def _leer_filas_importacion(contenido: bytes, nombre_archivo: str) -> list[dict]:
+    """CSV (con cabecera = campos de PostulanteWeb) o NDJSON (un objeto JSON por línea)."""
+    try:
+        texto = contenido.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        linea = contenido[:e.start].count(b"\n") + 1
+        raise HTTPException(status_code=400, detail=f"Línea {linea}: el archivo no está en UTF-8")
+    if (nombre_archivo or "").lower().endswith((".ndjson", ".jsonl")):
+        filas = []
+        for n, linea in enumerate(texto.splitlines(), start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Línea {n}: JSON inválido")
+            if not isinstance(fila, dict):
+                raise HTTPException(status_code=400, detail=f"Línea {n}: se esperaba un objeto JSON")
+            filas.append(fila)
+        return filas
+    return list(csv.DictReader(io.StringIO(texto)))
+
+
+def _procesar_importacion(contenido: bytes, nombre_archivo: str) -> dict:
+    inicio = time.perf_counter()
+    filas = _leer_filas_importacion(contenido, nombre_archivo)
+
+    validos: list[tuple[int, PostulanteWeb]] = []
+    errores = []
+    dnis_vistos = set()
+    for n, fila in enumerate(filas, start=1):
+        # Celdas vacías del CSV → usar los defaults del modelo
+        datos = {k: v for k, v in fila.items() if k and v not in ("", None)}
+        try:
+            postulante = PostulanteWeb(**datos)
+        except ValidationError as e:
+            errores.append({
+                "fila": n,
+                "dni": datos.get("dni"),
+                "mensaje": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()),
+            })
+            continue
+
+        dni = postulante.dni.strip()
+        if dni in dnis_vistos:
+            errores.append({"fila": n, "dni": dni, "mensaje": "DNI duplicado dentro del archivo"})
+            continue
+        dnis_vistos.add(dni)
+        validos.append((n, postulante))
+
+    resultados = registrar_postulantes_lote([p for _, p in validos]) if validos else []
+
+    registrados = []
+    for (n, postulante), res in zip(validos, resultados):
+        if res.get("status") == "SUCCESS":
+            registrados.append({"fila": n, "id_postulante": res.get("id_postulante"), "dni": res.get("dni")})
+        else:
+            errores.append({"fila": n, "dni": postulante.dni.strip(), "mensaje": res.get("mensaje")})
+
+    errores.sort(key=lambda e: e["fila"])
+    return {
+        "status": "SUCCESS",
+        "total_filas": len(filas),
+        "registrados": len(registrados),
+        "con_error": len(errores),
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 1),
+        "detalle_registrados": registrados,
+        "errores": errores,
+    }
+
+
+@app.post("/postulantes/importar")
+async def importar_postulantes(archivo: UploadFile = File(...)):
+    """
+    Importación masiva de postulantes (campañas recolectadas offline).
+    Valida cada fila con el mismo modelo del registro web, reporta los errores
+    por fila y registra las válidas en lotes con SP_REGISTRAR_POSTULANTE_WEB.
+    """
+    TAMANO_MAXIMO = 10 * 1024 * 1024  # 10 MB
+
+    contenido = await archivo.read()
+    if len(contenido) > TAMANO_MAXIMO:
+        raise HTTPException(status_code=400, detail="El archivo supera el tamaño máximo de 10 MB")
+
+    # Validación + BD en el threadpool para no bloquear el event loop
+    return await run_in_threadpool(_procesar_importacion, contenido, archivo.filename)
+
+
 @app.get("/postulantes/{id_postulante}")
 def detalle_postulante(id_postulante: int):
     data = ejecutar_sp("SP_GU_DETALLE_POSTULANTE", (id_postulante,))
@@ -166,6 +273,9 @@ def listar_miembros(
 
 @app.post("/miembros")
 def crear_miembro(body: NuevoMiembro):
+    if Indiceunicidad.miembros_dni.ocupado(body.dni.strip()):
+        raise HTTPException(status_code=400, detail="Ya existe un miembro registrado con ese DNI")
+
     resultado = ejecutar_sp("SP_GU_CREAR_MIEMBRO", (
         body.nombre, body.apellido, body.dni,
         body.email, body.telefono, body.fecha_nacimiento, body.genero,
@@ -180,6 +290,20 @@ def crear_miembro(body: NuevoMiembro):
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje", "Error al crear el miembro"))
 
+    Indicemiembros.registrar_miembro(res.get("id_miembro"))
+    Indiceunicidad.miembros_dni.registrar(body.dni, res.get("id_miembro"))
+    Contadoreskpi.alta(res.get("id_miembro"), body.estado, body.rango)
+    _publicar_miembro(
+        "miembro_creado",
+        {"id_miembro": res.get("id_miembro"), "nombre": f"{body.nombre} {body.apellido}",
+         "rango": body.rango, "estado": body.estado, "departamento": body.departamento},
+        afecta=["kpi", "miembros-rango", "miembros-estado", "miembros-departamento",
+                "edades-miembros"],
+    )
+    Actividadreciente.registrar("Miembro", "Nuevo miembro registrado",
+                                f"{body.nombre} {body.apellido} — {body.rango}")
+    Tarjetasmiembro.invalidar_miembro(res.get("id_miembro"))
+
     return {
         "status": "SUCCESS",
         "mensaje": res.get("mensaje"),
@@ -191,14 +315,36 @@ def crear_miembro(body: NuevoMiembro):
 # ── PUT estáticos ────────────────────────────────────────────────
 @app.put("/miembros/estado")
 def cambiar_estado(body: CambioEstado):
-    return ejecutar_sp("SP_GU_CAMBIAR_ESTADO_MIEMBRO",
+    res = ejecutar_sp("SP_GU_CAMBIAR_ESTADO_MIEMBRO",
         (body.id_miembro, body.nuevo_estado, body.motivo, body.admin_id))[0]
+    Tarjetasmiembro.invalidar_miembro(body.id_miembro)
+    if res.get("status") != "ERROR":
+        Contadoreskpi.cambiar_estado(body.id_miembro, body.nuevo_estado)
+        _publicar_miembro(
+            "miembro_estado",
+            {"id_miembro": body.id_miembro, "nuevo_estado": body.nuevo_estado, "motivo": body.motivo},
+            afecta=["kpi", "miembros-estado"],
+        )
+        Actividadreciente.registrar("Historial", f"Cambio de estado a {body.nuevo_estado}",
+                                    f"Miembro #{body.id_miembro}" + (f" — {body.motivo}" if body.motivo else ""))
+    return res
 
 
 @app.put("/miembros/rango")
 def cambiar_rango(body: CambioRango):
-    return ejecutar_sp("SP_GU_CAMBIAR_RANGO_MIEMBRO",
+    res = ejecutar_sp("SP_GU_CAMBIAR_RANGO_MIEMBRO",
         (body.id_miembro, body.nuevo_rango, body.motivo, body.admin_id))[0]
+    Tarjetasmiembro.invalidar_miembro(body.id_miembro)
+    if res.get("status") != "ERROR":
+        Contadoreskpi.cambiar_rango(body.id_miembro, body.nuevo_rango)
+        _publicar_miembro(
+            "miembro_rango",
+            {"id_miembro": body.id_miembro, "nuevo_rango": body.nuevo_rango, "motivo": body.motivo},
+            afecta=["kpi", "miembros-rango"],
+        )
+        Actividadreciente.registrar("Historial", f"Cambio de rango a {body.nuevo_rango}",
+                                    f"Miembro #{body.id_miembro}" + (f" — {body.motivo}" if body.motivo else ""))
+    return res
 
 
 @app.get("/miembros/exportar/csv")
@@ -229,13 +375,14 @@ def detalle_miembro(id_miembro: int):
 
             # Convertir foto_perfil bytes → base64
             foto_bytes = miembro.pop("foto_perfil", None)
-            miembro["foto_base64"] = base64.b64encode(foto_bytes).decode("utf-8") if foto_bytes else None
+            with Metricas.medir("base64"):
+                miembro["foto_base64"] = base64.b64encode(foto_bytes).decode("utf-8") if foto_bytes else None
 
             cursor.nextset()
-            cursos = [dict(zip([c[0] for c in cursor.description], row)) for row in cursor.fetchall()]
+            cursos = filas_como_dicts(cursor)
 
             cursor.nextset()
-            eventos = [dict(zip([c[0] for c in cursor.description], row)) for row in cursor.fetchall()]
+            eventos = filas_como_dicts(cursor)
 
             # ✅ commit por consistencia (aunque sea solo lectura, no estorba)
             conn.commit()
@@ -265,6 +412,20 @@ def editar_miembro(id_miembro: int, body: EditarMiembro):
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje", "Error al editar el miembro"))
 
+    Tarjetasmiembro.invalidar_miembro(id_miembro)
+    Indiceunicidad.miembros_dni.quitar_id(id_miembro)
+    Indiceunicidad.miembros_dni.registrar(body.dni, id_miembro)
+    Contadoreskpi.editar(id_miembro, body.estado, body.rango)
+    _publicar_miembro(
+        "miembro_editado",
+        {"id_miembro": id_miembro, "nombre": f"{body.nombre} {body.apellido}",
+         "rango": body.rango, "estado": body.estado, "departamento": body.departamento},
+        afecta=["kpi", "miembros-rango", "miembros-estado", "miembros-departamento",
+                "edades-miembros"],
+    )
+    Actividadreciente.registrar("Miembro", "Datos de miembro actualizados",
+                                f"{body.nombre} {body.apellido}")
+
     return {
         "status": "SUCCESS",
         "mensaje": res.get("mensaje"),
@@ -288,6 +449,18 @@ def eliminar_miembro_fisico(id_miembro: int, body: EliminarMiembroFisico):
     if not resultado:
         raise HTTPException(status_code=404, detail="El miembro no existe o no fue eliminado")
 
+    Indicemiembros.eliminar_miembro(id_miembro)
+    Indiceunicidad.miembros_dni.quitar_id(id_miembro)
+    Contadoreskpi.baja(id_miembro)
+    _publicar_miembro(
+        "miembro_eliminado",
+        {"id_miembro": id_miembro},
+        afecta=["kpi", "miembros-rango", "miembros-estado", "miembros-departamento",
+                "edades-miembros"],
+    )
+    Actividadreciente.registrar("Miembro", "Miembro eliminado", f"Miembro #{id_miembro}")
+    Tarjetasmiembro.invalidar_miembro(id_miembro)
+
     return {"status": "SUCCESS", "data": resultado[0]}
 
 
@@ -308,9 +481,11 @@ def obtener_foto(id_miembro: int):
         if foto_bytes is None:
             return {"status": "SUCCESS", "foto_base64": None, "tiene_foto": False}
 
+        with Metricas.medir("base64"):
+            foto_base64 = base64.b64encode(foto_bytes).decode("utf-8")
         return {
             "status": "SUCCESS",
-            "foto_base64": base64.b64encode(foto_bytes).decode("utf-8"),
+            "foto_base64": foto_base64,
             "tiene_foto": True
         }
 
@@ -346,6 +521,8 @@ async def actualizar_foto(
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje"))
 
+    Tarjetasmiembro.invalidar_miembro(id_miembro)
+
     return {"status": "SUCCESS", "mensaje": "Foto actualizada correctamente"}
 
 
@@ -360,6 +537,8 @@ def eliminar_foto(id_miembro: int, admin_id: int = 1):
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje"))
 
+    Tarjetasmiembro.invalidar_miembro(id_miembro)
+
     return {"status": "SUCCESS", "mensaje": "Foto eliminada correctamente"}
 
 
@@ -397,4 +576,6 @@ def actualizar_cursos(id_miembro: int, body: ActualizarCursos):
     if res.get("status") == "ERROR":
         raise HTTPException(status_code=400, detail=res.get("mensaje"))
 
+    Tarjetasmiembro.invalidar_miembro(id_miembro)
+
     return {"status": "SUCCESS", "mensaje": "Certificaciones actualizadas correctamente"}
\ No newline at end of file
@@ -0,0 +1,10 @@
+# benchmarks/
+"""
+Benchmarks del API sin SQL Server
+
+    driver_falso.py  → BD falsa con latencias / filas / blobs por SP
+    escenarios.py    → perfiles de SP y mezclas de endpoints
+    emulador_sql.py  → BD emulada sobre SQLite con datos sembrados (SP reales del API)
+    carga.py         → prueba de carga in-process (python -m benchmarks.carga --help)
+    micro.py         → micro-benchmarks de los helpers por fila (línea base: micro_base.json)
+"""
@@ -0,0 +1,267 @@
+# benchmarks/carga.py
+"""
+Prueba de carga de main:app SIN SQL Server ni red
+
+- La BD es benchmarks/driver_falso.py (perfiles por SP en escenarios.py) o,
+  con --bd sqlite, el emulador con datos sembrados (benchmarks/emulador_sql.py)
+- Los requests van directo a la app por ASGI, en el mismo proceso: se mide
+  la app (pool, caches, serialización), no uvicorn ni el socket
+- Carga cerrada: N clientes concurrentes, cada uno pide el siguiente endpoint
+  apenas recibe la respuesta
+- Reporte por endpoint: req/s, p50 / p90 / p99 / máx, errores, tamaño medio,
+  y el promedio de cada fase del header Server-Timing
+
+    python -m benchmarks.carga --escenario mixto --concurrencia 32 --duracion 15
+    python -m benchmarks.carga --sin-latencia --json antes.json   # solo CPU del API
+    python -m benchmarks.carga --bd sqlite --indices               # consultas reales sobre 100k miembros
+
+No corre el startup de la app (programador, colas, correo); --indices construye
+los índices en memoria antes de medir.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+
+# =============================================
+# CLIENTE ASGI MÍNIMO
+# =============================================
+async def pedir(app, metodo: str, ruta: str, cuerpo=None, headers: list | None = None) -> dict:
+    """Un request a la app ASGI. Retorna {"status", "bytes", "server_timing"}."""
+    path, _, query = ruta.partition("?")
+    body = json.dumps(cuerpo).encode("utf-8") if cuerpo is not None else b""
+    cabeceras = [(b"host", b"benchmark"), *(headers or [])]
+    if cuerpo is not None:
+        cabeceras += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": metodo,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": query.encode("utf-8"),
+        "root_path": "",
+        "headers": cabeceras,
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    respuesta = {"status": 0, "bytes": 0, "server_timing": None}
+    terminado = asyncio.Event()
+    leido = False
+
+    async def receive():
+        nonlocal leido
+        if not leido:
+            leido = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await terminado.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.start":
+            respuesta["status"] = mensaje["status"]
+            for clave, valor in mensaje.get("headers", []):
+                if clave.lower() == b"server-timing":
+                    respuesta["server_timing"] = valor.decode("latin-1")
+        elif mensaje["type"] == "http.response.body":
+            respuesta["bytes"] += len(mensaje.get("body", b""))
+            if not mensaje.get("more_body"):
+                terminado.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        terminado.set()
+    return respuesta
+
+
+def _fases(server_timing: str | None) -> dict[str, float]:
+    """'db-exec;dur=12.4;desc="x3", json;dur=0.8' → {"db-exec": 12.4, "json": 0.8}"""
+    fases = {}
+    for entrada in (server_timing or "").split(","):
+        nombre, _, resto = entrada.strip().partition(";")
+        for parametro in resto.split(";"):
+            if parametro.startswith("dur="):
+                fases[nombre] = float(parametro[4:])
+    return fases
+
+
+# =============================================
+# CARGA
+# =============================================
+class Resultados:
+    def __init__(self):
+        self.latencias = defaultdict(list)              # endpoint → [ms]
+        self.errores = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self.fases = defaultdict(lambda: defaultdict(float))
+
+    def agregar(self, endpoint: str, ms: float, respuesta: dict | None):
+        self.latencias[endpoint].append(ms)
+        if respuesta is None or respuesta["status"] >= 400:
+            self.errores[endpoint] += 1
+            return
+        self.bytes[endpoint] += respuesta["bytes"]
+        for fase, dur in _fases(respuesta["server_timing"]).items():
+            self.fases[endpoint][fase] += dur
+
+
+async def _cliente(app, plan, fin: float, resultados: Resultados | None, headers: list):
+    while time.perf_counter() < fin:
+        metodo, ruta, cuerpo = next(plan)
+        inicio = time.perf_counter()
+        try:
+            respuesta = await pedir(app, metodo, ruta, cuerpo, headers)
+        except Exception as e:
+            print(f"❌ {metodo} {ruta}: {type(e).__name__}: {e}", file=sys.stderr)
+            respuesta = None
+        if resultados is not None:
+            resultados.agregar(f"{metodo} {ruta}", (time.perf_counter() - inicio) * 1000, respuesta)
+
+
+async def correr(app, endpoints: list, concurrencia: int, duracion: float, calentamiento: float,
+                 headers: list, hilos: int) -> tuple[Resultados, float]:
+    import anyio.to_thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = hilos
+
+    ponderados = [(m, r, c) for m, r, c, peso in endpoints for _ in range(peso)]
+    plan = itertools.cycle(ponderados)
+
+    if calentamiento:
+        fin = time.perf_counter() + calentamiento
+        await asyncio.gather(*(_cliente(app, plan, fin, None, headers) for _ in range(concurrencia)))
+
+    resultados = Resultados()
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    await asyncio.gather(*(_cliente(app, plan, fin, resultados, headers) for _ in range(concurrencia)))
+    return resultados, time.perf_counter() - inicio
+
+
+# =============================================
+# REPORTE
+# =============================================
+def _percentil(ordenadas: list[float], p: float) -> float:
+    return ordenadas[min(int(len(ordenadas) * p), len(ordenadas) - 1)]
+
+
+def resumen(resultados: Resultados, transcurrido: float) -> dict:
+    endpoints = {}
+    for endpoint, latencias in resultados.latencias.items():
+        ordenadas = sorted(latencias)
+        exitosas = len(latencias) - resultados.errores[endpoint]
+        endpoints[endpoint] = {
+            "requests": len(latencias),
+            "rps": round(len(latencias) / transcurrido, 1),
+            "p50_ms": round(_percentil(ordenadas, 0.50), 2),
+            "p90_ms": round(_percentil(ordenadas, 0.90), 2),
+            "p99_ms": round(_percentil(ordenadas, 0.99), 2),
+            "max_ms": round(ordenadas[-1], 2),
+            "errores": resultados.errores[endpoint],
+            "kb_promedio": round(resultados.bytes[endpoint] / exitosas / 1024, 1) if exitosas else 0,
+            "fases_ms": {f: round(v / exitosas, 2) for f, v in resultados.fases[endpoint].items()} if exitosas else {},
+        }
+    todas = sorted(ms for l in resultados.latencias.values() for ms in l)
+    total = {
+        "requests": len(todas),
+        "rps": round(len(todas) / transcurrido, 1),
+        "p50_ms": round(_percentil(todas, 0.50), 2) if todas else None,
+        "p99_ms": round(_percentil(todas, 0.99), 2) if todas else None,
+        "errores": sum(resultados.errores.values()),
+    }
+    return {"total": total, "endpoints": endpoints}
+
+
+def imprimir(datos: dict):
+    print(f"\n{'endpoint':58} {'req':>6} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'máx':>8} {'err':>5} {'KB':>7}")
+    for endpoint, d in sorted(datos["endpoints"].items()):
+        print(f"{endpoint[:58]:58} {d['requests']:>6} {d['rps']:>8.1f} {d['p50_ms']:>8.1f} {d['p90_ms']:>8.1f} "
+              f"{d['p99_ms']:>8.1f} {d['max_ms']:>8.1f} {d['errores']:>5} {d['kb_promedio']:>7.1f}")
+    t = datos["total"]
+    print(f"{'TOTAL':58} {t['requests']:>6} {t['rps']:>8.1f} {t['p50_ms'] or 0:>8.1f} {'':>8} "
+          f"{t['p99_ms'] or 0:>8.1f} {'':>8} {t['errores']:>5}")
+
+    fases = sorted({f for d in datos["endpoints"].values() for f in d["fases_ms"] if f != "total"})
+    if fases:
+        print(f"\nServer-Timing promedio (ms)\n{'endpoint':58} " + " ".join(f"{f:>10}" for f in fases))
+        for endpoint, d in sorted(datos["endpoints"].items()):
+            print(f"{endpoint[:58]:58} " + " ".join(f"{d['fases_ms'].get(f, 0):>10.2f}" for f in fases))
+
+
+# =============================================
+# CLI
+# =============================================
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de main:app con BD falsa")
+    parser.add_argument("--escenario", default="mixto", help="publico | admin | mixto (ver escenarios.py)")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--duracion", type=float, default=10, help="segundos medidos")
+    parser.add_argument("--calentamiento", type=float, default=2, help="segundos descartados al inicio")
+    parser.add_argument("--hilos", type=int, default=40, help="threadpool de los endpoints síncronos")
+    parser.add_argument("--bd", choices=("falsa", "sqlite"), default="falsa", help="driver falso o emulador SQLite")
+    parser.add_argument("--base", default=None, help="archivo de la base emulada (--bd sqlite)")
+    parser.add_argument("--rehacer", action="store_true", help="re-sembrar la base emulada aunque exista")
+    parser.add_argument("--pool", type=int, default=None, help="pool_size del pool de conexiones")
+    parser.add_argument("--overflow", type=int, default=None, help="max_overflow del pool")
+    parser.add_argument("--conectar-ms", type=float, default=5, help="costo de abrir una conexión nueva")
+    parser.add_argument("--sin-latencia", action="store_true", help="SP instantáneos: mide solo el API")
+    parser.add_argument("--indices", action="store_true", help="construir índices / caches en memoria antes")
+    parser.add_argument("--json", help="guardar el resumen en este archivo")
+    args = parser.parse_args()
+
+    # Antes de importar la app: nada de escribir en datos_locales/ ni en el log de SQL lento
+    os.environ.setdefault("DATOS_LOCALES_DIR", tempfile.mkdtemp(prefix="benchmark-"))
+    os.environ.setdefault("ADMIN_TOKEN_SECRET", "benchmark")
+    os.environ.setdefault("SQL_MUESTREO", "0")
+    os.environ.setdefault("SQL_LENTO_MS", "1e12")
+
+    from dataclasses import replace
+    from benchmarks import driver_falso, escenarios
+
+    if args.bd == "sqlite":
+        from benchmarks import emulador_sql
+        base = emulador_sql.crear_base(args.base or emulador_sql.BASE_DEFECTO, rehacer=args.rehacer)
+        emulador_sql.instalar(base, pool_size=args.pool, max_overflow=args.overflow)
+    else:
+        perfiles, defecto = escenarios.PERFILES, escenarios.PERFIL_DEFECTO
+        if args.sin_latencia:
+            perfiles = {sp: replace(p, latencia_ms=0, jitter_ms=0) for sp, p in perfiles.items()}
+            defecto = replace(defecto, latencia_ms=0, jitter_ms=0)
+        driver_falso.instalar(perfiles, defecto, conectar_ms=0 if args.sin_latencia else args.conectar_ms,
+                              pool_size=args.pool, max_overflow=args.overflow)
+
+    import main as api
+    import Sesionadmin
+
+    token = Sesionadmin.emitir_token(1, "benchmark")["token"]
+    headers = [(b"authorization", f"Bearer {token}".encode("ascii"))]
+    endpoints = escenarios.ESCENARIOS[args.escenario]
+
+    async def _todo():
+        if args.indices:
+            await api.construir_indices()
+        return await correr(api.app, endpoints, args.concurrencia, args.duracion, args.calentamiento,
+                            headers, args.hilos)
+
+    print(f"🏋️ Escenario '{args.escenario}' (BD {args.bd}): {len(endpoints)} endpoints, {args.concurrencia} clientes, "
+          f"{args.duracion:.0f}s (+{args.calentamiento:.0f}s de calentamiento)...")
+    resultados, transcurrido = asyncio.run(_todo())
+    datos = resumen(resultados, transcurrido)
+    datos["config"] = {k: v for k, v in vars(args).items() if k != "json"}
+    imprimir(datos)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resumen guardado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
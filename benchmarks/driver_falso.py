@@ -0,0 +1,186 @@
+# benchmarks/driver_falso.py
+"""
+Driver falso de SQL Server (imita lo que el código usa de pyodbc)
+
+Cada SP se responde según su PerfilSP: latencia (con time.sleep, como una
+espera de red: libera el GIL), result sets con N filas de columnas tipadas,
+blobs de tamaño fijo. Todo determinista: mismas filas en cada corrida.
+
+    from benchmarks.driver_falso import PerfilSP, instalar
+    instalar({"SP_GU_LISTAR_MIEMBROS": PerfilSP(latencia_ms=8, filas=10)})
+
+Tipos de columna: int, str, fecha, bool, decimal, blob.
+"""
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import Conexionsql
+
+_RE_SP = re.compile(r"^\s*EXEC(?:UTE)?\s+(?:@\w+\s*=\s*)?([\w.\[\]]+)", re.IGNORECASE)
+_COLUMNAS_DEFECTO = (("id", "int"), ("nombre", "str"), ("fecha", "fecha"), ("estado", "str"))
+_FECHA_BASE = datetime(2024, 1, 1, 8, 0)
+
+
+@dataclass
+class ResultSet:
+    columnas: tuple = _COLUMNAS_DEFECTO    # ((nombre, tipo), ...); () = sin filas (solo status)
+    filas: int = 10
+
+
+@dataclass
+class PerfilSP:
+    latencia_ms: float = 2.0
+    filas: int = 10
+    columnas: tuple = _COLUMNAS_DEFECTO
+    blob_bytes: int = 0                         # tamaño de cada columna "blob"
+    jitter_ms: float = 0.0                      # ± uniforme (semilla fija)
+    extra: list[ResultSet] = field(default_factory=list)   # result sets 2..n (p. ej. un total)
+    error: str | None = None                    # simula una excepción del driver
+
+    def result_sets(self) -> list[ResultSet]:
+        return [ResultSet(self.columnas, self.filas), *self.extra]
+
+
+class ErrorFalso(Exception):
+    pass
+
+
+_blobs: dict[int, bytes] = {}
+
+
+def _blob(tamano: int) -> bytes:
+    if tamano not in _blobs:
+        # cabecera JPEG para que serializar_fila / Perfilesadmin detecten el mime
+        _blobs[tamano] = (b"\xff\xd8\xff\xe0" + bytes(range(256)) * (tamano // 256 + 1))[:tamano]
+    return _blobs[tamano]
+
+
+def _valor(tipo: str, nombre: str, i: int, blob_bytes: int):
+    if tipo == "int":
+        return i + 1
+    if tipo == "str":
+        return f"{nombre}-{i + 1:05d}"
+    if tipo == "fecha":
+        return _FECHA_BASE + timedelta(days=i)
+    if tipo == "bool":
+        return i % 2 == 0
+    if tipo == "decimal":
+        return Decimal(i * 10) / 3
+    if tipo == "blob":
+        return _blob(blob_bytes) if blob_bytes else None
+    raise ValueError(f"Tipo de columna desconocido: {tipo}")
+
+
+def _filas(rs: ResultSet, blob_bytes: int) -> list[tuple]:
+    return [tuple(_valor(t, n, i, blob_bytes) for n, t in rs.columnas) for i in range(rs.filas)]
+
+
+class CursorFalso:
+    def __init__(self, conexion: "ConexionFalsa"):
+        self._conexion = conexion
+        self._sets: list[tuple[tuple, list]] = []
+        self._filas: list = []
+        self.description = None
+        self.messages = []
+        self.rowcount = -1
+
+    def execute(self, sql: str, *params):
+        conexion = self._conexion
+        conexion.ejecutadas += 1
+        m = _RE_SP.match(sql)
+        nombre = m.group(1).replace("[", "").replace("]", "").rsplit(".", 1)[-1] if m else None
+        perfil = conexion.perfiles.get(nombre, conexion.defecto) if nombre else conexion.sql_suelto
+
+        latencia = perfil.latencia_ms
+        if perfil.jitter_ms:
+            latencia += conexion.azar.uniform(-perfil.jitter_ms, perfil.jitter_ms)
+        if latencia > 0:
+            time.sleep(latencia / 1000)
+        if perfil.error:
+            raise ErrorFalso(perfil.error)
+
+        clave = (nombre, id(perfil))
+        if clave not in conexion.cache:
+            conexion.cache[clave] = [
+                (tuple((n, None, None, None, None, None, True) for n, _ in rs.columnas), _filas(rs, perfil.blob_bytes))
+                for rs in perfil.result_sets()
+            ]
+        self._sets = list(conexion.cache[clave])
+        self._cargar()
+        return self
+
+    def _cargar(self):
+        if self._sets:
+            descripcion, filas = self._sets.pop(0)
+            self.description = descripcion or None
+            self._filas = list(filas) if descripcion else []
+            self.rowcount = len(self._filas) if descripcion else 1
+        else:
+            self.description, self._filas, self.rowcount = None, [], -1
+
+    def nextset(self):
+        if not self._sets:
+            self.description, self._filas = None, []
+            return False
+        self._cargar()
+        return True
+
+    def fetchone(self):
+        return self._filas.pop(0) if self._filas else None
+
+    def fetchall(self):
+        filas, self._filas = self._filas, []
+        return filas
+
+    def fetchmany(self, cantidad: int = 1):
+        filas, self._filas = self._filas[:cantidad], self._filas[cantidad:]
+        return filas
+
+    def commit(self):
+        self._conexion.commit()
+
+    def close(self):
+        self._sets, self._filas = [], []
+
+
+class ConexionFalsa:
+    def __init__(self, perfiles: dict[str, PerfilSP], defecto: PerfilSP, sql_suelto: PerfilSP, cache: dict):
+        self.perfiles, self.defecto, self.sql_suelto, self.cache = perfiles, defecto, sql_suelto, cache
+        self.azar = random.Random(1234)
+        self.ejecutadas = 0
+
+    def cursor(self):
+        return CursorFalso(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def instalar(perfiles: dict[str, PerfilSP] | None = None, defecto: PerfilSP | None = None,
+             sql_suelto: PerfilSP | None = None, conectar_ms: float = 0.0,
+             pool_size: int | None = None, max_overflow: int | None = None):
+    """
+    Conecta Conexionsql al driver falso. `conectar_ms`: costo de abrir una conexión
+    nueva (lo que el pool ahorra); las filas generadas se comparten entre conexiones.
+    """
+    perfiles = perfiles or {}
+    defecto = defecto or PerfilSP()
+    sql_suelto = sql_suelto or PerfilSP(latencia_ms=1.0, filas=0, columnas=(("id", "int"),))
+    cache: dict = {}
+
+    def _crear():
+        if conectar_ms:
+            time.sleep(conectar_ms / 1000)
+        return ConexionFalsa(perfiles, defecto, sql_suelto, cache)
+
+    Conexionsql.usar_creador(_crear, pool_size, max_overflow)
@@ -0,0 +1,1001 @@
+# benchmarks/emulador_sql.py
+"""
+Emulador de la BD de SQL Server sobre SQLite (pruebas de carga / perfiles en local)
+
+Las tablas y los SP que usa el API, con datos sembrados en volúmenes de producción
+(100k miembros, 10k postulantes, fotos reales en tamaño). Se conecta detrás de
+Conexionsql.get_connection (pool, cursor medido, métricas: todo igual que en prod).
+
+    python -m benchmarks.emulador_sql crear  --miembros 100000 --postulantes 10000
+    python -m benchmarks.emulador_sql servir --puerto 8000          # uvicorn con startup completo
+    python -m benchmarks.carga --bd sqlite --indices                 # carga in-process
+
+- Cada SP es una función Python registrada con @procedimiento (mismos parámetros,
+  mismas columnas y result sets que consume el API). Soporta EXEC posicional,
+  @nombre=?, literales, y batches "SET NOCOUNT ON; EXEC ...; EXEC ..." con nextset()
+- SQL suelto (SELECT id FROM miembros, ...) va directo a SQLite: miembros y
+  publicaciones son vistas que exponen foto_perfil / foto desde un pool de fotos
+- Un SP no emulado levanta pyodbc.ProgrammingError como SQL Server (error 2812)
+
+No emula costos de red ni planes de SQL Server: sirve para encontrar el cuello de
+botella del API y comparar cambios, no para dimensionar la BD de producción.
+"""
+import argparse
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pyodbc
+
+# Herramienta local: sin .env no hay secreto de tokens y Sesionadmin (vía Conexionsql) no arranca
+os.environ.setdefault("ADMIN_TOKEN_SECRET", "emulador")
+
+import Conexionsql
+from Indicemiembros import generar_hash_id
+
+BASE_DEFECTO = os.path.join(tempfile.gettempdir(), "cgpvp_emulador.db")
+_VERSION = 1
+
+VOLUMENES = {
+    "miembros": 100_000,
+    "postulantes": 10_000,
+    "publicaciones": 800,
+    "cursos": 60,
+    "eventos": 120,
+    "instructores": 40,
+    "fotos": 60,            # pool de fotos distintas (se comparten entre filas)
+}
+
+# Tipos declarados → tipos de pyodbc (datetime / date / bool) al leer
+sqlite3.register_converter("FECHAHORA", lambda b: datetime.fromisoformat(b.decode()))
+sqlite3.register_converter("FECHA", lambda b: date.fromisoformat(b.decode()[:10]))
+sqlite3.register_converter("BIT", lambda b: b not in (b"0", b""))
+
+
+# =============================================
+# ESQUEMA
+# =============================================
+_ESQUEMA = """
+CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE fotos (id INTEGER PRIMARY KEY, datos BLOB NOT NULL);
+
+CREATE TABLE miembros_datos (
+    id INTEGER PRIMARY KEY, nombre TEXT, apellido TEXT, dni TEXT UNIQUE, email TEXT,
+    telefono TEXT, fecha_nacimiento FECHA, genero TEXT, departamento TEXT, distrito TEXT,
+    direccion TEXT, profesion TEXT, rango TEXT, jefatura TEXT, estado TEXT,
+    cursos_certificaciones TEXT, fecha_ingreso FECHAHORA, foto_id INTEGER
+);
+CREATE INDEX ix_miembros_estado ON miembros_datos (estado);
+CREATE INDEX ix_miembros_rango ON miembros_datos (rango);
+CREATE INDEX ix_miembros_departamento ON miembros_datos (departamento);
+CREATE INDEX ix_miembros_ingreso ON miembros_datos (fecha_ingreso);
+CREATE VIEW miembros AS
+    SELECT m.*, f.datos AS foto_perfil FROM miembros_datos m LEFT JOIN fotos f ON f.id = m.foto_id;
+
+CREATE TABLE postulantes (
+    id INTEGER PRIMARY KEY, nombre TEXT, apellido TEXT, dni TEXT UNIQUE, fecha_nacimiento FECHA,
+    genero TEXT, email TEXT UNIQUE, telefono TEXT, direccion TEXT, departamento TEXT, distrito TEXT,
+    nivel_educativo TEXT, profesion TEXT, motivacion TEXT, experiencia BIT, experiencia_detalle TEXT,
+    estado TEXT, fecha_registro FECHAHORA
+);
+CREATE INDEX ix_postulantes_registro ON postulantes (fecha_registro);
+
+CREATE TABLE historial_miembros (
+    id INTEGER PRIMARY KEY, id_miembro INTEGER, tipo TEXT, valor_anterior TEXT, valor_nuevo TEXT,
+    motivo TEXT, admin_id INTEGER, fecha FECHAHORA
+);
+CREATE INDEX ix_historial_fecha ON historial_miembros (fecha);
+
+CREATE TABLE instructores (
+    id INTEGER PRIMARY KEY, nombre TEXT, apellido TEXT, rango TEXT, especialidad TEXT,
+    certificaciones TEXT, biografia TEXT, foto TEXT, email TEXT, experiencia_anios INTEGER, activo BIT
+);
+
+CREATE TABLE cursos (
+    id_curso INTEGER PRIMARY KEY, titulo TEXT, categoria TEXT, modalidad TEXT, duracion TEXT,
+    fecha_inicio FECHA, fecha_fin FECHA, descripcion TEXT, requisitos TEXT, direccion TEXT,
+    enlace TEXT, capacidad INTEGER, inscritos INTEGER, estado TEXT, id_instructor INTEGER
+);
+
+CREATE TABLE eventos (
+    id INTEGER PRIMARY KEY, titulo TEXT, tipo TEXT, descripcion TEXT, fecha FECHA, hora_inicio TEXT,
+    hora_fin TEXT, ubicacion TEXT, modalidad TEXT, capacidad INTEGER, inscritos INTEGER, estado TEXT,
+    id_instructor INTEGER, imagen TEXT, icono TEXT
+);
+
+CREATE TABLE miembros_cursos (id_miembro INTEGER, id_curso INTEGER, fecha FECHAHORA);
+CREATE INDEX ix_miembros_cursos ON miembros_cursos (id_miembro);
+CREATE TABLE miembros_eventos (id_miembro INTEGER, id_evento INTEGER, fecha FECHAHORA);
+CREATE INDEX ix_miembros_eventos ON miembros_eventos (id_miembro);
+
+CREATE TABLE publicaciones_datos (
+    idpublicacion TEXT PRIMARY KEY, titulo TEXT, contenido TEXT, foto_id INTEGER, fecha FECHAHORA,
+    destacada BIT, activa BIT, creado_por TEXT, fecha_creacion FECHAHORA
+);
+CREATE INDEX ix_publicaciones_fecha ON publicaciones_datos (fecha);
+CREATE VIEW publicaciones AS
+    SELECT p.*, f.datos AS foto FROM publicaciones_datos p LEFT JOIN fotos f ON f.id = p.foto_id;
+
+CREATE TABLE admin_users (
+    id INTEGER PRIMARY KEY, username TEXT UNIQUE, nombre_completo TEXT, email TEXT UNIQUE, rol TEXT,
+    foto_perfil BLOB, activo BIT, ultimo_login FECHAHORA
+);
+"""
+
+_NOMBRES = ("José", "Luis", "Carlos", "Jorge", "Miguel", "Juan", "Pedro", "Rosa", "María", "Ana",
+            "Carmen", "Lucía", "Diana", "Elena", "Raúl", "Víctor", "César", "Patricia", "Sofía", "Andrea")
+_APELLIDOS = ("Quispe", "Flores", "Sánchez", "Rodríguez", "García", "Huamán", "Mamani", "Chávez",
+              "Ramírez", "Torres", "Rojas", "Vargas", "Castillo", "Mendoza", "Gutiérrez", "Díaz")
+_DEPARTAMENTOS = (("Lima", 40), ("Arequipa", 9), ("La Libertad", 8), ("Piura", 7), ("Cusco", 6),
+                  ("Lambayeque", 6), ("Junín", 5), ("Ica", 5), ("Áncash", 4), ("Puno", 4),
+                  ("Cajamarca", 3), ("Tacna", 3))
+_RANGOS = (("Seccionario", 55), ("Subteniente", 18), ("Teniente", 12), ("Capitán", 8),
+           ("Teniente Brigadier", 4), ("Brigadier", 2), ("Brigadier Mayor", 1))
+_ESTADOS = (("Activo", 82), ("Suspendido", 6), ("Baja", 12))
+_PROFESIONES = ("Ingeniero", "Técnico", "Estudiante", "Enfermera", "Médico", "Docente", "Abogado",
+                "Contador", "Administrador", "Chofer")
+_CERTIFICACIONES = ("BLS", "ACLS", "Primeros Auxilios", "MATPEL", "Rescate Vehicular", "Incendios Estructurales")
+_CATEGORIAS = ("Básico", "Intermedio", "Avanzado", "Especializado")
+_MODALIDADES = ("Virtual", "Presencial", "Semipresencial")
+_PALABRAS = ("incendio", "rescate", "emergencia", "compañía", "voluntarios", "capacitación", "unidad",
+             "simulacro", "estación", "comunidad", "prevención", "materiales", "peligrosos", "servicio")
+
+
+def _ponderado(azar: random.Random, opciones) -> str:
+    return azar.choices([o for o, _ in opciones], weights=[p for _, p in opciones])[0]
+
+
+def _texto(azar: random.Random, palabras: int) -> str:
+    return " ".join(azar.choice(_PALABRAS) for _ in range(palabras)).capitalize() + "."
+
+
+def _foto(azar: random.Random, tamano: int) -> bytes:
+    # cabecera JPEG (serializar_fila / Perfilesadmin detectan el mime) + relleno poco comprimible
+    return b"\xff\xd8\xff\xe0" + azar.randbytes(tamano - 4)
+
+
+def _meta_esperada(volumenes: dict, semilla: int) -> dict:
+    return {"version": str(_VERSION), "semilla": str(semilla), **{k: str(v) for k, v in volumenes.items()}}
+
+
+def crear_base(ruta: str = BASE_DEFECTO, volumenes: dict | None = None, semilla: int = 7,
+               rehacer: bool = False) -> str:
+    """
+    Crea y siembra la base. Si ya existe se usa tal cual (aunque tenga otros volúmenes o semilla):
+    solo se re-siembra con rehacer=True o si es de otra versión del emulador (_VERSION).
+    Todo determinista: misma semilla → mismos ids, DNIs, fotos.
+    """
+    pedidos = volumenes
+    volumenes = {**VOLUMENES, **(volumenes or {})}
+    esperada = _meta_esperada(volumenes, semilla)
+    if os.path.exists(ruta) and not rehacer:
+        try:
+            with sqlite3.connect(ruta) as db:
+                meta = dict(db.execute("SELECT clave, valor FROM meta").fetchall())
+        except sqlite3.Error:
+            meta = {}
+        if meta.get("version") == str(_VERSION):
+            if pedidos is not None and meta != esperada:
+                print(f"⚠️ {ruta} ya existe con otros volúmenes / semilla: se usa tal cual (--rehacer para re-sembrar)")
+            return ruta
+        print(f"♻️ {ruta} es de otra versión del emulador ({meta.get('version', '?')} ≠ {_VERSION}): se re-siembra")
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+
+    inicio = time.perf_counter()
+    print(f"🌱 Sembrando {ruta} ({volumenes['miembros']} miembros, {volumenes['postulantes']} postulantes)...")
+    azar = random.Random(semilla)
+    hoy = datetime.now().replace(microsecond=0)
+    db = sqlite3.connect(ruta)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=OFF")
+    db.executescript(_ESQUEMA)
+
+    # --- fotos: 30 KB – 250 KB, como las de perfil / publicaciones reales ---
+    db.executemany("INSERT INTO fotos (id, datos) VALUES (?, ?)",
+                   ((i, _foto(azar, azar.randint(30_000, 250_000))) for i in range(1, volumenes["fotos"] + 1)))
+
+    def _persona(i: int) -> tuple:
+        nacimiento = date(1960, 1, 1) + timedelta(days=azar.randint(0, 16_000))
+        return (azar.choice(_NOMBRES), f"{azar.choice(_APELLIDOS)} {azar.choice(_APELLIDOS)}",
+                nacimiento.isoformat(), azar.choice(("masculino", "femenino")),
+                _ponderado(azar, _DEPARTAMENTOS), f"Distrito {azar.randint(1, 40)}",
+                f"Av. {azar.choice(_APELLIDOS)} {azar.randint(100, 3000)}", azar.choice(_PROFESIONES))
+
+    def _miembros():
+        for i in range(1, volumenes["miembros"] + 1):
+            nombre, apellido, nacimiento, genero, departamento, distrito, direccion, profesion = _persona(i)
+            yield (i, nombre, apellido, f"{10_000_000 + i * 7:08d}", f"miembro{i}@cgpvp.pe",
+                   f"9{azar.randint(10_000_000, 99_999_999)}", nacimiento, genero, departamento, distrito,
+                   direccion, profesion, _ponderado(azar, _RANGOS), f"Compañía B-{azar.randint(1, 250)}",
+                   _ponderado(azar, _ESTADOS), ", ".join(azar.sample(_CERTIFICACIONES, azar.randint(0, 3))),
+                   (hoy - timedelta(days=azar.randint(0, 9_000), minutes=azar.randint(0, 1440))).isoformat(" "),
+                   azar.randint(1, volumenes["fotos"]) if azar.random() < 0.6 else None)
+
+    db.executemany("INSERT INTO miembros_datos VALUES (" + ",".join("?" * 18) + ")", _miembros())
+
+    def _postulantes():
+        for i in range(1, volumenes["postulantes"] + 1):
+            nombre, apellido, nacimiento, genero, departamento, distrito, direccion, profesion = _persona(i)
+            experiencia = azar.random() < 0.3
+            yield (i, nombre, apellido, f"{70_000_000 + i * 3:08d}", nacimiento, genero, f"postulante{i}@correo.pe",
+                   f"9{azar.randint(10_000_000, 99_999_999)}", direccion, departamento, distrito,
+                   azar.choice(("secundaria", "tecnico", "universitario", "postgrado")), profesion,
+                   _texto(azar, 25), int(experiencia), _texto(azar, 12) if experiencia else None,
+                   _ponderado(azar, (("Pendiente", 35), ("Aprobado", 50), ("Rechazado", 15))),
+                   (hoy - timedelta(days=azar.randint(0, 730), minutes=azar.randint(0, 1440))).isoformat(" "))
+
+    db.executemany("INSERT INTO postulantes VALUES (" + ",".join("?" * 18) + ")", _postulantes())
+
+    def _historial():
+        for i in range(1, volumenes["miembros"] // 5 + 1):
+            tipo = azar.choice(("estado", "rango"))
+            opciones = _ESTADOS if tipo == "estado" else _RANGOS
+            yield (i, azar.randint(1, volumenes["miembros"]), tipo, _ponderado(azar, opciones),
+                   _ponderado(azar, opciones), _texto(azar, 6), 1,
+                   (hoy - timedelta(days=azar.randint(0, 1_500), minutes=azar.randint(0, 1440))).isoformat(" "))
+
+    db.executemany("INSERT INTO historial_miembros VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _historial())
+
+    db.executemany("INSERT INTO instructores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+        (i, azar.choice(_NOMBRES), azar.choice(_APELLIDOS), _ponderado(azar, _RANGOS[2:]),
+         azar.choice(_CERTIFICACIONES), ", ".join(azar.sample(_CERTIFICACIONES, 3)), _texto(azar, 60),
+         f"/static/instructores/{i}.jpg", f"instructor{i}@cgpvp.pe", azar.randint(3, 30), int(azar.random() < 0.9))
+        for i in range(1, volumenes["instructores"] + 1)))
+
+    def _cursos():
+        for i in range(1, volumenes["cursos"] + 1):
+            inicio_curso = hoy.date() + timedelta(days=azar.randint(-180, 180))
+            capacidad = azar.choice((20, 30, 40, 60))
+            modalidad = azar.choice(_MODALIDADES)
+            yield (i, f"Curso de {azar.choice(_CERTIFICACIONES)} {i}", azar.choice(_CATEGORIAS), modalidad,
+                   f"{azar.randint(2, 12)} semanas", inicio_curso.isoformat(),
+                   (inicio_curso + timedelta(weeks=azar.randint(2, 12))).isoformat(), _texto(azar, 80),
+                   _texto(azar, 15), f"Estación B-{azar.randint(1, 250)}" if modalidad != "Virtual" else None,
+                   f"https://aula.cgpvp.pe/{i}" if modalidad != "Presencial" else None, capacidad,
+                   azar.randint(0, capacidad), _ponderado(azar, (("Activo", 60), ("Programado", 15),
+                                                                   ("Finalizado", 20), ("Cancelado", 5))),
+                   azar.randint(1, volumenes["instructores"]))
+
+    db.executemany("INSERT INTO cursos VALUES (" + ",".join("?" * 15) + ")", _cursos())
+
+    def _eventos():
+        for i in range(1, volumenes["eventos"] + 1):
+            capacidad = azar.choice((30, 50, 100, 200))
+            hora = azar.randint(8, 17)
+            yield (i, f"{azar.choice(('Taller', 'Simulacro', 'Charla'))} {i}", azar.choice(("Taller", "Simulacro", "Charla")),
+                   _texto(azar, 40), (hoy.date() + timedelta(days=azar.randint(-120, 120))).isoformat(),
+                   f"{hora:02d}:00", f"{hora + 2:02d}:00", f"Estación B-{azar.randint(1, 250)}",
+                   azar.choice(_MODALIDADES), capacidad, azar.randint(0, capacidad),
+                   azar.choice(("Programado", "Programado", "En Curso", "Finalizado")),
+                   azar.randint(1, volumenes["instructores"]), f"/static/eventos/{i}.jpg", "🔥")
+
+    db.executemany("INSERT INTO eventos VALUES (" + ",".join("?" * 15) + ")", _eventos())
+
+    def _inscripciones(tabla_max: int, promedio: int):
+        for i in range(1, volumenes["miembros"] + 1):
+            for _ in range(azar.randint(0, promedio * 2)):
+                yield (i, azar.randint(1, tabla_max),
+                       (hoy - timedelta(days=azar.randint(0, 2_000))).isoformat(" "))
+
+    db.executemany("INSERT INTO miembros_cursos VALUES (?, ?, ?)", _inscripciones(volumenes["cursos"], 2))
+    db.executemany("INSERT INTO miembros_eventos VALUES (?, ?, ?)", _inscripciones(volumenes["eventos"], 1))
+
+    db.executemany("INSERT INTO publicaciones_datos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+        (f"{100_000_000_000 + i}_{i * 31}", f"{_texto(azar, 6)[:-1]}", _texto(azar, 120),
+         azar.randint(1, volumenes["fotos"]) if azar.random() < 0.9 else None,
+         (hoy - timedelta(hours=i * 11)).isoformat(" "), int(i % 40 == 1), int(azar.random() < 0.95),
+         "Facebook" if azar.random() < 0.8 else "Admin", (hoy - timedelta(hours=i * 11 - 1)).isoformat(" "))
+        for i in range(1, volumenes["publicaciones"] + 1)))
+
+    db.executemany("INSERT INTO admin_users VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+        (i, f"admin{i}", f"{azar.choice(_NOMBRES)} {azar.choice(_APELLIDOS)}", f"admin{i}@cgpvp.pe",
+         "superadmin" if i == 1 else "admin", None, 1, hoy.isoformat(" ")) for i in range(1, 6)))
+
+    db.executemany("INSERT INTO meta VALUES (?, ?)", esperada.items())
+    db.commit()
+    db.execute("ANALYZE")
+    db.close()
+    print(f"✅ Base sembrada en {time.perf_counter() - inicio:.1f}s ({os.path.getsize(ruta) / 1024 / 1024:.0f} MB)")
+    return ruta
+
+
+# =============================================
+# SP EMULADOS
+# =============================================
+PROCEDIMIENTOS: dict[str, tuple[tuple[str, ...], object]] = {}
+
+
+def procedimiento(nombre: str, *parametros: str):
+    """Registra un SP: parámetros en el orden de la firma de SQL Server (sin @)."""
+    def registrar(funcion):
+        PROCEDIMIENTOS[nombre.upper()] = (parametros, funcion)
+        return funcion
+    return registrar
+
+
+def _valor_sqlite(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat(" ")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, bool):
+        return int(valor)
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (bytearray, memoryview)):
+        return bytes(valor)
+    return valor
+
+
+def _q(db, sql: str, params=()) -> tuple:
+    """SELECT → result set (description, filas)."""
+    cursor = db.execute(sql, [_valor_sqlite(p) for p in params])
+    return cursor.description, cursor.fetchall()
+
+
+def _fila(columnas: tuple, *valores) -> tuple:
+    """Result set de una fila armado en Python (status / mensaje / ids)."""
+    return tuple((c, None, None, None, None, None, True) for c in columnas), [tuple(valores)]
+
+
+def _status(status: str, mensaje: str, **extra) -> tuple:
+    return _fila(("status", "mensaje", *extra), status, mensaje, *extra.values())
+
+
+def _like(texto) -> str | None:
+    return f"%{texto}%" if texto else None
+
+
+def _pagina(pagina, por_pagina) -> tuple[int, int]:
+    por_pagina = max(int(por_pagina or 10), 1)
+    return por_pagina, (max(int(pagina or 1), 1) - 1) * por_pagina
+
+
+# --- miembros (web pública) ---
+_MIEMBRO_PUBLICO = """
+    SELECT id, nombre || ' ' || apellido AS nombre_completo, dni, rango, estado, departamento,
+           jefatura, fecha_ingreso, cursos_certificaciones, foto_perfil
+    FROM miembros
+"""
+
+
+@procedimiento("SP_BUSCAR_MIEMBRO", "criterio_busqueda")
+def _buscar_miembro(db, criterio_busqueda):
+    criterio = (criterio_busqueda or "").strip()
+    return [_q(db, _MIEMBRO_PUBLICO + """
+        WHERE dni = ? OR (nombre || ' ' || apellido) LIKE ?
+        ORDER BY apellido, nombre LIMIT 20
+    """, (criterio, f"%{criterio}%"))]
+
+
+@procedimiento("SP_BUSCAR_MIEMBRO_POR_ID", "id")
+def _buscar_miembro_por_id(db, id):
+    return [_q(db, _MIEMBRO_PUBLICO + " WHERE id = ?", (id,))]
+
+
+@procedimiento("SP_BUSCAR_MIEMBRO_POR_HASH", "hash")
+def _buscar_miembro_por_hash(db, hash):
+    # Igual que en SQL Server: HASHBYTES sobre cada id (full scan)
+    return [_q(db, _MIEMBRO_PUBLICO + " WHERE HASH_ID(id) = ?", ((hash or "").lower(),))]
+
+
+# --- miembros (admin) ---
+_FILTRO_MIEMBROS = """
+    WHERE (? IS NULL OR nombre LIKE ? OR apellido LIKE ? OR dni LIKE ? OR email LIKE ?)
+      AND (? IS NULL OR estado = ?) AND (? IS NULL OR rango = ?) AND (? IS NULL OR departamento = ?)
+"""
+
+
+def _params_miembros(busqueda, estado, rango, departamento) -> tuple:
+    like = _like(busqueda)
+    return (like, like, like, like, like, estado, estado, rango, rango, departamento, departamento)
+
+
+@procedimiento("SP_GU_LISTAR_MIEMBROS", "busqueda", "estado", "rango", "departamento", "pagina", "por_pagina")
+def _listar_miembros(db, busqueda, estado, rango, departamento, pagina, por_pagina):
+    limite, desde = _pagina(pagina, por_pagina)
+    return [_q(db, """
+        SELECT id, nombre, apellido, dni, email, telefono, departamento, distrito, rango, jefatura,
+               estado, fecha_ingreso
+        FROM miembros_datos""" + _FILTRO_MIEMBROS + """
+        ORDER BY fecha_ingreso DESC LIMIT ? OFFSET ?
+    """, _params_miembros(busqueda, estado, rango, departamento) + (limite, desde))]
+
+
+@procedimiento("SP_GU_CONTAR_MIEMBROS", "busqueda", "estado", "rango", "departamento")
+def _contar_miembros(db, busqueda, estado, rango, departamento):
+    return [_q(db, "SELECT COUNT(*) AS total FROM miembros_datos" + _FILTRO_MIEMBROS,
+               _params_miembros(busqueda, estado, rango, departamento))]
+
+
+@procedimiento("SP_GU_DETALLE_MIEMBRO", "id_miembro")
+def _detalle_miembro(db, id_miembro):
+    return [
+        _q(db, "SELECT * FROM miembros WHERE id = ?", (id_miembro,)),
+        _q(db, """
+            SELECT c.id_curso, c.titulo AS curso, c.categoria, mc.fecha
+            FROM miembros_cursos mc JOIN cursos c ON c.id_curso = mc.id_curso
+            WHERE mc.id_miembro = ? ORDER BY mc.fecha DESC
+        """, (id_miembro,)),
+        _q(db, """
+            SELECT e.id AS id_evento, e.titulo AS evento, e.tipo, me.fecha
+            FROM miembros_eventos me JOIN eventos e ON e.id = me.id_evento
+            WHERE me.id_miembro = ? ORDER BY me.fecha DESC
+        """, (id_miembro,)),
+    ]
+
+
+@procedimiento("SP_GU_EXPORTAR_MIEMBROS", "estado", "rango", "departamento")
+def _exportar_miembros(db, estado, rango, departamento):
+    return [_q(db, """
+        SELECT id, nombre, apellido, dni, email, telefono, fecha_nacimiento, genero, departamento,
+               distrito, direccion, profesion, rango, jefatura, estado, fecha_ingreso
+        FROM miembros_datos
+        WHERE (? IS NULL OR estado = ?) AND (? IS NULL OR rango = ?) AND (? IS NULL OR departamento = ?)
+        ORDER BY apellido, nombre
+    """, (estado, estado, rango, rango, departamento, departamento))]
+
+
+def _cambiar_miembro(db, columna: str, id_miembro, nuevo, motivo, admin_id):
+    fila = db.execute(f"SELECT {columna} FROM miembros_datos WHERE id = ?", (id_miembro,)).fetchone()
+    if fila is None:
+        return [_status("ERROR", "Miembro no encontrado")]
+    db.execute(f"UPDATE miembros_datos SET {columna} = ? WHERE id = ?", (nuevo, id_miembro))
+    db.execute("""
+        INSERT INTO historial_miembros (id_miembro, tipo, valor_anterior, valor_nuevo, motivo, admin_id, fecha)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (id_miembro, columna, fila[0], nuevo, motivo, admin_id, datetime.now().isoformat(" ")))
+    return [_status("SUCCESS", f"{columna.capitalize()} actualizado", id_miembro=id_miembro)]
+
+
+@procedimiento("SP_GU_CAMBIAR_ESTADO_MIEMBRO", "id_miembro", "nuevo_estado", "motivo", "admin_id")
+def _cambiar_estado_miembro(db, id_miembro, nuevo_estado, motivo, admin_id):
+    return _cambiar_miembro(db, "estado", id_miembro, nuevo_estado, motivo, admin_id)
+
+
+@procedimiento("SP_GU_CAMBIAR_RANGO_MIEMBRO", "id_miembro", "nuevo_rango", "motivo", "admin_id")
+def _cambiar_rango_miembro(db, id_miembro, nuevo_rango, motivo, admin_id):
+    return _cambiar_miembro(db, "rango", id_miembro, nuevo_rango, motivo, admin_id)
+
+
+# --- postulantes ---
+_FILTRO_POSTULANTES = """
+    WHERE (? IS NULL OR nombre LIKE ? OR apellido LIKE ? OR dni LIKE ? OR email LIKE ?)
+      AND (? IS NULL OR departamento = ?) AND (? = 0 OR estado = 'Pendiente')
+"""
+
+
+def _params_postulantes(busqueda, departamento, solo_pendientes) -> tuple:
+    like = _like(busqueda)
+    return (like, like, like, like, like, departamento, departamento, int(solo_pendientes or 0))
+
+
+@procedimiento("SP_GU_LISTAR_POSTULANTES", "busqueda", "departamento", "solo_pendientes", "pagina", "por_pagina")
+def _listar_postulantes(db, busqueda, departamento, solo_pendientes, pagina, por_pagina):
+    limite, desde = _pagina(pagina, por_pagina)
+    return [_q(db, """
+        SELECT id, nombre, apellido, dni, email, telefono, departamento, distrito, nivel_educativo,
+               profesion, estado, fecha_registro
+        FROM postulantes""" + _FILTRO_POSTULANTES + """
+        ORDER BY fecha_registro DESC LIMIT ? OFFSET ?
+    """, _params_postulantes(busqueda, departamento, solo_pendientes) + (limite, desde))]
+
+
+@procedimiento("SP_GU_CONTAR_POSTULANTES", "busqueda", "departamento", "solo_pendientes")
+def _contar_postulantes(db, busqueda, departamento, solo_pendientes):
+    return [_q(db, "SELECT COUNT(*) AS total FROM postulantes" + _FILTRO_POSTULANTES,
+               _params_postulantes(busqueda, departamento, solo_pendientes))]
+
+
+@procedimiento("SP_GU_DETALLE_POSTULANTE", "id_postulante")
+def _detalle_postulante(db, id_postulante):
+    return [_q(db, "SELECT * FROM postulantes WHERE id = ?", (id_postulante,))]
+
+
+_REGISTRO = ("status", "id_postulante", "nombre_completo", "dni", "email", "fecha_registro", "edad", "mensaje")
+
+
+@procedimiento("SP_REGISTRAR_POSTULANTE_WEB", "nombre", "apellido", "dni", "fecha_nacimiento", "genero",
+               "email", "telefono", "direccion", "departamento", "distrito", "nivel_educativo",
+               "profesion", "motivacion", "experiencia", "experiencia_detalle")
+def _registrar_postulante(db, nombre, apellido, dni, fecha_nacimiento, genero, email, telefono, direccion,
+                          departamento, distrito, nivel_educativo, profesion, motivacion, experiencia,
+                          experiencia_detalle):
+    for columna, valor, mensaje in (("dni", dni, "Ya existe un postulante registrado con ese DNI"),
+                                    ("email", email, "Ya existe un postulante registrado con ese email")):
+        if db.execute(f"SELECT 1 FROM postulantes WHERE {columna} = ?", (valor,)).fetchone():
+            return [_fila(_REGISTRO, "ERROR", None, mensaje, None, None, None, None, None)]
+
+    ahora = datetime.now().replace(microsecond=0)
+    nacimiento = fecha_nacimiento if isinstance(fecha_nacimiento, date) else date.fromisoformat(str(fecha_nacimiento)[:10])
+    edad = ahora.year - nacimiento.year - ((ahora.month, ahora.day) < (nacimiento.month, nacimiento.day))
+    cursor = db.execute("""
+        INSERT INTO postulantes (nombre, apellido, dni, fecha_nacimiento, genero, email, telefono, direccion,
+                                 departamento, distrito, nivel_educativo, profesion, motivacion, experiencia,
+                                 experiencia_detalle, estado, fecha_registro)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'Pendiente', ?)
+    """, [_valor_sqlite(v) for v in (nombre, apellido, dni, nacimiento, genero, email, telefono, direccion,
+                                     departamento, distrito, nivel_educativo, profesion, motivacion,
+                                     experiencia, experiencia_detalle, ahora)])
+    return [_fila(_REGISTRO, "SUCCESS", cursor.lastrowid, f"{nombre} {apellido}", dni, email, ahora, edad,
+                  "Postulante registrado correctamente")]
+
+
+# --- dashboard ---
+@procedimiento("SP_DS_RESUMEN_RANGOS")
+def _resumen_rangos(db):
+    return [_q(db, """
+        SELECT (SELECT COUNT(*) FROM miembros_datos) AS total_miembros,
+               (SELECT COUNT(*) FROM miembros_datos WHERE estado = 'Activo') AS miembros_activos,
+               (SELECT COUNT(*) FROM miembros_datos WHERE estado = 'Suspendido') AS miembros_suspendidos,
+               (SELECT COUNT(*) FROM miembros_datos WHERE estado = 'Baja') AS miembros_baja,
+               (SELECT COUNT(*) FROM postulantes) AS total_postulantes,
+               (SELECT COUNT(*) FROM postulantes WHERE estado = 'Pendiente') AS postulantes_pendientes,
+               (SELECT COUNT(*) FROM cursos WHERE estado = 'Activo') AS cursos_activos,
+               (SELECT COUNT(*) FROM eventos WHERE estado IN ('Programado', 'En Curso')) AS eventos_programados,
+               (SELECT COUNT(DISTINCT rango) FROM miembros_datos) AS total_rangos
+    """)]
+
+
+@procedimiento("SP_DS_GRAFICO_MIEMBROS_ESTADO")
+def _grafico_estado(db):
+    return [_q(db, """
+        SELECT estado, COUNT(*) AS cantidad,
+               ROUND(100.0 * COUNT(*) / (SELECT COUNT(*) FROM miembros_datos), 2) AS porcentaje
+        FROM miembros_datos GROUP BY estado ORDER BY cantidad DESC
+    """)]
+
+
+@procedimiento("SP_DS_GRAFICO_MIEMBROS_RANGO")
+def _grafico_rango(db):
+    return [_q(db, "SELECT rango, COUNT(*) AS cantidad FROM miembros_datos GROUP BY rango ORDER BY cantidad DESC")]
+
+
+@procedimiento("SP_DS_GRAFICO_MIEMBROS_DEPARTAMENTO")
+def _grafico_departamento(db):
+    return [_q(db, """
+        SELECT departamento, COUNT(*) AS cantidad FROM miembros_datos
+        GROUP BY departamento ORDER BY cantidad DESC
+    """)]
+
+
+@procedimiento("SP_DS_GRAFICO_EDADES_MIEMBROS")
+def _grafico_edades(db):
+    return [_q(db, """
+        SELECT CASE WHEN edad < 26 THEN '18-25' WHEN edad < 36 THEN '26-35' WHEN edad < 46 THEN '36-45'
+                    WHEN edad < 56 THEN '46-55' ELSE '56+' END AS rango_edad,
+               COUNT(*) AS cantidad
+        FROM (SELECT CAST((julianday('now') - julianday(fecha_nacimiento)) / 365.25 AS INTEGER) AS edad
+              FROM miembros_datos)
+        GROUP BY rango_edad ORDER BY rango_edad
+    """)]
+
+
+@procedimiento("SP_DS_GRAFICO_POSTULANTES_MES")
+def _grafico_postulantes_mes(db):
+    return [_q(db, """
+        SELECT strftime('%Y-%m', fecha_registro) AS mes, COUNT(*) AS cantidad
+        FROM postulantes WHERE fecha_registro >= date('now', 'start of month', '-11 months')
+        GROUP BY mes ORDER BY mes
+    """)]
+
+
+@procedimiento("SP_DS_GRAFICO_OCUPACION_CURSOS")
+def _grafico_ocupacion(db):
+    return [_q(db, """
+        SELECT titulo AS curso, capacidad, inscritos,
+               ROUND(100.0 * inscritos / NULLIF(capacidad, 0), 2) AS porcentaje_ocupacion
+        FROM cursos WHERE estado = 'Activo' ORDER BY porcentaje_ocupacion DESC
+    """)]
+
+
+@procedimiento("SP_DS_ACTIVIDAD_RECIENTE", "top")
+def _actividad_reciente(db, top):
+    return [_q(db, """
+        SELECT tipo, descripcion, detalle, fecha AS "fecha [FECHAHORA]" FROM (
+            SELECT * FROM (SELECT 'Postulante' AS tipo, 'Nuevo postulante registrado' AS descripcion,
+                                  nombre || ' ' || apellido AS detalle, fecha_registro AS fecha
+                           FROM postulantes ORDER BY fecha_registro DESC LIMIT :top)
+            UNION ALL
+            SELECT * FROM (SELECT 'Miembro', 'Nuevo miembro registrado', nombre || ' ' || apellido || ' — ' || rango,
+                                  fecha_ingreso
+                           FROM miembros_datos ORDER BY fecha_ingreso DESC LIMIT :top)
+            UNION ALL
+            SELECT * FROM (SELECT 'Historial', 'Cambio de ' || tipo || ' a ' || valor_nuevo,
+                                  'Miembro #' || id_miembro || COALESCE(' — ' || motivo, ''), fecha
+                           FROM historial_miembros ORDER BY fecha DESC LIMIT :top)
+        ) ORDER BY fecha DESC LIMIT :top
+    """.replace(":top", str(max(int(top or 15), 0))))]
+
+
+# --- cursos / eventos (web) ---
+_CURSO_WEB = """
+    SELECT c.id_curso, c.titulo, c.categoria, c.duracion, c.modalidad, c.fecha_inicio, c.fecha_fin,
+           i.nombre || ' ' || i.apellido AS instructor, c.capacidad, c.inscritos, c.estado
+"""
+
+
+@procedimiento("SP_LISTAR_CURSOSWEB", "categoria", "modalidad", "estado", "busqueda")
+def _listar_cursosweb(db, categoria, modalidad, estado, busqueda):
+    return [_q(db, _CURSO_WEB + """
+        FROM cursos c LEFT JOIN instructores i ON i.id = c.id_instructor
+        WHERE (? IS NULL OR c.categoria = ?) AND (? IS NULL OR c.modalidad = ?)
+          AND (? IS NULL OR c.estado = ?) AND (? IS NULL OR c.titulo LIKE ?)
+        ORDER BY c.fecha_inicio
+    """, (categoria, categoria, modalidad, modalidad, estado, estado, busqueda, _like(busqueda)))]
+
+
+@procedimiento("SP_OBTENER_CURSOWEB", "id_curso")
+def _obtener_cursoweb(db, id_curso):
+    return [_q(db, _CURSO_WEB + """, c.descripcion, c.requisitos, c.direccion, c.enlace
+        FROM cursos c LEFT JOIN instructores i ON i.id = c.id_instructor WHERE c.id_curso = ?
+    """, (id_curso,))]
+
+
+@procedimiento("SP_PROXIMOS_EVENTOS_WEB", "limite")
+def _proximos_eventos(db, limite):
+    return [_q(db, """
+        SELECT e.id, e.titulo, e.tipo, e.descripcion, e.fecha, e.hora_inicio, e.hora_fin, e.ubicacion,
+               i.nombre || ' ' || i.apellido AS instructor, e.capacidad, e.inscritos,
+               e.capacidad - e.inscritos AS cupos_disponibles, e.estado, e.imagen, e.icono, e.modalidad
+        FROM eventos e LEFT JOIN instructores i ON i.id = e.id_instructor
+        WHERE e.fecha >= date('now') AND e.estado IN ('Programado', 'En Curso') AND e.inscritos < e.capacidad
+        ORDER BY e.fecha, e.hora_inicio LIMIT ?
+    """, (int(limite or 3),))]
+
+
+# --- instructores ---
+_INSTRUCTOR = """
+    SELECT id, nombre || ' ' || apellido AS nombre_completo, rango, especialidad, certificaciones,
+           biografia, foto, email, experiencia_anios
+    FROM instructores
+"""
+
+
+@procedimiento("SP_ObtenerTodosInstructores")
+def _todos_instructores(db):
+    return [_q(db, _INSTRUCTOR + " WHERE activo = 1 ORDER BY apellido, nombre")]
+
+
+@procedimiento("SP_ObtenerInstructorPorId", "id")
+def _instructor_por_id(db, id):
+    return [_q(db, _INSTRUCTOR + " WHERE id = ?", (id,))]
+
+
+@procedimiento("SP_BuscarInstructores", "termino")
+def _buscar_instructores(db, termino):
+    like = _like(termino)
+    return [_q(db, _INSTRUCTOR + """
+        WHERE activo = 1 AND (nombre || ' ' || apellido LIKE ? OR rango LIKE ? OR certificaciones LIKE ?)
+        ORDER BY apellido, nombre
+    """, (like, like, like))]
+
+
+@procedimiento("SP_FiltrarPorEspecialidad", "especialidad")
+def _filtrar_especialidad(db, especialidad):
+    return [_q(db, _INSTRUCTOR + " WHERE activo = 1 AND (? IS NULL OR especialidad = ?) ORDER BY apellido, nombre",
+               (especialidad, especialidad))]
+
+
+# --- noticias (web) ---
+_PUBLICACION = "SELECT idpublicacion, titulo, contenido, foto, fecha, destacada, activa, creado_por FROM publicaciones"
+_ORDEN_PUBLICACIONES = {"reciente": "fecha DESC", "antiguo": "fecha ASC", "titulo": "titulo ASC"}
+
+
+@procedimiento("SP_LISTAR_PUBLICACIONES_CON_FILTROS", "pagina", "cantidadporpagina", "solodestacadas",
+               "soloactivas", "busqueda", "ordenar_por")
+def _listar_publicaciones(db, pagina, cantidadporpagina, solodestacadas, soloactivas, busqueda, ordenar_por):
+    limite, desde = _pagina(pagina, cantidadporpagina)
+    filtro = """
+        WHERE (? = 0 OR destacada = 1) AND (? = 0 OR activa = 1)
+          AND (? IS NULL OR titulo LIKE ? OR contenido LIKE ?)
+    """
+    like = _like(busqueda)
+    params = (int(solodestacadas or 0), int(soloactivas or 0), like, like, like)
+    orden = _ORDEN_PUBLICACIONES.get((ordenar_por or "reciente").lower(), "fecha DESC")
+    return [
+        _q(db, f"{_PUBLICACION} {filtro} ORDER BY {orden} LIMIT ? OFFSET ?", params + (limite, desde)),
+        _q(db, f"SELECT COUNT(*) AS total FROM publicaciones_datos {filtro}", params),
+    ]
+
+
+@procedimiento("SP_OBTENER_PUBLICACION_DESTACADA")
+def _publicacion_destacada(db):
+    return [_q(db, f"{_PUBLICACION} WHERE destacada = 1 AND activa = 1 ORDER BY fecha DESC LIMIT 1")]
+
+
+@procedimiento("SP_OBTENER_PUBLICACION_POR_ID", "idpublicacion")
+def _publicacion_por_id(db, idpublicacion):
+    return [_q(db, f"{_PUBLICACION} WHERE idpublicacion = ?", (idpublicacion,))]
+
+
+@procedimiento("SP_OBTENER_PUBLICACIONES_RECIENTES", "cantidad")
+def _publicaciones_recientes(db, cantidad):
+    return [_q(db, f"{_PUBLICACION} WHERE activa = 1 ORDER BY fecha DESC LIMIT ?", (int(cantidad or 5),))]
+
+
+@procedimiento("SP_INSERTAR_ACTUALIZAR_PUBLICACION", "idpublicacion", "titulo", "contenido", "foto", "fecha",
+               "creado_por")
+def _insertar_actualizar_publicacion(db, idpublicacion, titulo, contenido, foto, fecha, creado_por):
+    foto_id = db.execute("INSERT INTO fotos (datos) VALUES (?)", (_valor_sqlite(foto),)).lastrowid if foto else None
+    ahora = datetime.now().isoformat(" ")
+    db.execute("""
+        INSERT INTO publicaciones_datos (idpublicacion, titulo, contenido, foto_id, fecha, destacada, activa,
+                                         creado_por, fecha_creacion)
+        VALUES (?, ?, ?, ?, ?, 0, 1, ?, ?)
+        ON CONFLICT (idpublicacion) DO UPDATE SET
+            titulo = excluded.titulo, contenido = excluded.contenido,
+            foto_id = COALESCE(excluded.foto_id, foto_id), fecha = excluded.fecha
+    """, (idpublicacion, titulo, contenido, foto_id, _valor_sqlite(fecha), creado_por or "Facebook", ahora))
+    return [_status("SUCCESS", "Publicación guardada", idpublicacion=idpublicacion)]
+
+
+# --- noticias (admin) ---
+_FILTRO_NOTICIAS = """
+    WHERE (? IS NULL OR titulo LIKE ? OR contenido LIKE ?) AND (? IS NULL OR creado_por = ?)
+      AND (? = 0 OR activa = 1) AND (? = 0 OR destacada = 1)
+      AND (? IS NULL OR fecha >= ?) AND (? IS NULL OR fecha < date(?, '+1 day'))
+"""
+
+
+def _params_noticias(busqueda, creado_por, solo_activas, solo_destacadas, desde, hasta) -> tuple:
+    like = _like(busqueda)
+    return (like, like, like, creado_por, creado_por, int(solo_activas or 0), int(solo_destacadas or 0),
+            desde, desde, hasta, hasta)
+
+
+@procedimiento("SP_NOT_LISTAR", "busqueda", "creado_por", "solo_activas", "solo_destacadas", "desde", "hasta",
+               "pagina", "por_pagina")
+def _not_listar(db, busqueda, creado_por, solo_activas, solo_destacadas, desde, hasta, pagina, por_pagina):
+    limite, salto = _pagina(pagina, por_pagina)
+    return [_q(db, f"""
+        SELECT idpublicacion, titulo, contenido, foto, fecha, destacada, activa, creado_por, fecha_creacion
+        FROM publicaciones {_FILTRO_NOTICIAS} ORDER BY fecha DESC LIMIT ? OFFSET ?
+    """, _params_noticias(busqueda, creado_por, solo_activas, solo_destacadas, desde, hasta) + (limite, salto))]
+
+
+@procedimiento("SP_NOT_CONTAR", "busqueda", "creado_por", "solo_activas", "solo_destacadas", "desde", "hasta")
+def _not_contar(db, busqueda, creado_por, solo_activas, solo_destacadas, desde, hasta):
+    return [_q(db, f"SELECT COUNT(*) AS total FROM publicaciones_datos {_FILTRO_NOTICIAS}",
+               _params_noticias(busqueda, creado_por, solo_activas, solo_destacadas, desde, hasta))]
+
+
+@procedimiento("SP_NOT_DETALLE", "idpublicacion")
+def _not_detalle(db, idpublicacion):
+    return [_q(db, "SELECT * FROM publicaciones WHERE idpublicacion = ?", (idpublicacion,))]
+
+
+# --- perfil admin ---
+def _disponible(db, columna: str, valor, admin_id) -> list:
+    ocupado = db.execute(f"SELECT 1 FROM admin_users WHERE {columna} = ? AND id <> ?",
+                         (valor, admin_id or 0)).fetchone()
+    etiqueta = "Email" if columna == "email" else "Username"
+    return [_fila(("disponible", "mensaje"), not ocupado,
+                  f"{etiqueta} ya está en uso" if ocupado else f"{etiqueta} disponible")]
+
+
+@procedimiento("SP_VALIDAR_EMAIL_DISPONIBLE", "email", "admin_id")
+def _validar_email(db, email, admin_id):
+    return _disponible(db, "email", email, admin_id)
+
+
+@procedimiento("SP_VALIDAR_USERNAME_DISPONIBLE", "username", "admin_id")
+def _validar_username(db, username, admin_id):
+    return _disponible(db, "username", username, admin_id)
+
+
+# =============================================
+# T-SQL → SP EMULADOS
+# =============================================
+_RE_EXEC = re.compile(r"^\s*EXEC(?:UTE)?\s+(?:\[?dbo\]?\.)?\[?(\w+)\]?\s*(.*)$", re.IGNORECASE | re.DOTALL)
+_RE_NOMBRADO = re.compile(r"^@(\w+)\s*=\s*(.*)$", re.DOTALL)
+
+
+def _partir(texto: str, separador: str) -> list[str]:
+    """Parte por `separador` fuera de literales '...'."""
+    partes, actual, en_literal = [], [], False
+    for caracter in texto:
+        if caracter == "'":
+            en_literal = not en_literal
+        if caracter == separador and not en_literal:
+            partes.append("".join(actual))
+            actual = []
+        else:
+            actual.append(caracter)
+    partes.append("".join(actual))
+    return [p.strip() for p in partes if p.strip()]
+
+
+def _literal(texto: str, params: list):
+    if texto == "?":
+        return params.pop(0)
+    if texto.upper() == "NULL":
+        return None
+    if texto[:2].upper() == "N'":
+        texto = texto[1:]
+    if texto.startswith("'"):
+        return texto[1:-1].replace("''", "'")
+    return float(texto) if "." in texto else int(texto)
+
+
+def _ejecutar_sp(db, nombre: str, argumentos: str, params: list) -> list:
+    entrada = PROCEDIMIENTOS.get(nombre.upper())
+    if entrada is None:
+        raise pyodbc.ProgrammingError(
+            "42000", f"[42000] Could not find stored procedure '{nombre}'. (2812) [emulador SQLite]")
+    firma, funcion = entrada
+    valores = dict.fromkeys(firma)
+    for posicion, argumento in enumerate(_partir(argumentos, ",")):
+        m = _RE_NOMBRADO.match(argumento)
+        if m:
+            clave = m.group(1).lower()
+            if clave not in valores:
+                raise pyodbc.ProgrammingError(
+                    "42000", f"[42000] Procedure {nombre} has no parameter named '@{m.group(1)}'. (8145)")
+            valores[clave] = _literal(m.group(2).strip(), params)
+        else:
+            if posicion >= len(firma):
+                raise pyodbc.ProgrammingError(
+                    "42000", f"[42000] Procedure or function {nombre} has too many arguments specified. (8144)")
+            valores[firma[posicion]] = _literal(argumento, params)
+    return funcion(db, **valores)
+
+
+def _ejecutar_lote(db, sql: str, params: list) -> list:
+    """Batch T-SQL → result sets (una lista por sentencia que devuelve filas)."""
+    result_sets = []
+    for sentencia in _partir(sql, ";"):
+        if sentencia.upper().startswith("SET "):
+            continue                      # SET NOCOUNT / SET STATISTICS: sin efecto en SQLite
+        m = _RE_EXEC.match(sentencia)
+        if m:
+            result_sets.extend(_ejecutar_sp(db, m.group(1), m.group(2), params))
+            continue
+        cantidad = sentencia.count("?")
+        propios = params[:cantidad]
+        del params[:cantidad]
+        cursor = db.execute(sentencia, [_valor_sqlite(p) for p in propios])
+        if cursor.description:
+            result_sets.append((cursor.description, cursor.fetchall()))
+    return result_sets
+
+
+def _error_pyodbc(e: sqlite3.Error) -> pyodbc.Error:
+    if isinstance(e, sqlite3.IntegrityError):
+        return pyodbc.IntegrityError("23000", f"[23000] {e} [emulador SQLite]")
+    if isinstance(e, sqlite3.OperationalError) and "locked" in str(e):
+        return pyodbc.OperationalError("HYT00", f"[HYT00] {e} [emulador SQLite]")
+    return pyodbc.ProgrammingError("42000", f"[42000] {e} [emulador SQLite]")
+
+
+# =============================================
+# CONEXIÓN / CURSOR (lo que el código usa de pyodbc)
+# =============================================
+class CursorEmulado:
+    def __init__(self, conexion: "ConexionEmulada"):
+        self._conexion = conexion
+        self._sets: list = []
+        self._filas: list = []
+        self.description = None
+        self.messages = []
+        self.rowcount = -1
+
+    def execute(self, sql: str, *params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        try:
+            self._sets = _ejecutar_lote(self._conexion.db, sql, list(params))
+        except sqlite3.Error as e:
+            raise _error_pyodbc(e) from e
+        self._cargar()
+        return self
+
+    def _cargar(self):
+        if self._sets:
+            self.description, filas = self._sets.pop(0)
+            self._filas = list(filas)
+            self.rowcount = len(self._filas)
+        else:
+            self.description, self._filas, self.rowcount = None, [], -1
+
+    def nextset(self):
+        if not self._sets:
+            self.description, self._filas = None, []
+            return False
+        self._cargar()
+        return True
+
+    def fetchone(self):
+        return self._filas.pop(0) if self._filas else None
+
+    def fetchall(self):
+        filas, self._filas = self._filas, []
+        return filas
+
+    def fetchmany(self, cantidad: int = 1):
+        filas, self._filas = self._filas[:cantidad], self._filas[cantidad:]
+        return filas
+
+    def commit(self):
+        self._conexion.commit()
+
+    def close(self):
+        self._sets, self._filas = [], []
+
+
+class ConexionEmulada:
+    def __init__(self, ruta: str):
+        self.db = sqlite3.connect(ruta, timeout=5, check_same_thread=False,
+                                  detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+        self.db.execute("PRAGMA busy_timeout=5000")
+        self.db.execute("PRAGMA cache_size=-65536")
+        self.db.create_function("HASH_ID", 1, generar_hash_id, deterministic=True)
+
+    def cursor(self):
+        return CursorEmulado(self)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def close(self):
+        self.db.close()
+
+
+def instalar(ruta: str = BASE_DEFECTO, pool_size: int | None = None, max_overflow: int | None = None):
+    """Conecta Conexionsql a la base emulada (crearla antes con crear_base)."""
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"No existe {ruta}: python -m benchmarks.emulador_sql crear")
+    Conexionsql.usar_creador(lambda: ConexionEmulada(ruta), pool_size, max_overflow)
+
+
+# =============================================
+# CLI
+# =============================================
+def main():
+    parser = argparse.ArgumentParser(description="BD SQL Server emulada sobre SQLite")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    crear = sub.add_parser("crear", help="crear / re-sembrar la base")
+    crear.add_argument("--base", default=BASE_DEFECTO)
+    crear.add_argument("--semilla", type=int, default=7)
+    crear.add_argument("--rehacer", action="store_true", help="re-sembrar aunque exista")
+    for clave, valor in VOLUMENES.items():
+        crear.add_argument(f"--{clave}", type=int, default=valor)
+
+    servir = sub.add_parser("servir", help="levantar main:app con uvicorn sobre la base emulada")
+    servir.add_argument("--base", default=BASE_DEFECTO)
+    servir.add_argument("--rehacer", action="store_true", help="re-sembrar la base antes de servir")
+    servir.add_argument("--host", default="127.0.0.1")
+    servir.add_argument("--puerto", type=int, default=8000)
+    servir.add_argument("--pool", type=int, default=None)
+    servir.add_argument("--overflow", type=int, default=None)
+
+    sub.add_parser("procedimientos", help="listar los SP emulados")
+    args = parser.parse_args()
+
+    if args.comando == "crear":
+        crear_base(args.base, {k: getattr(args, k) for k in VOLUMENES}, args.semilla, args.rehacer)
+    elif args.comando == "procedimientos":
+        for nombre, (firma, _) in sorted(PROCEDIMIENTOS.items()):
+            print(f"{nombre:40} {', '.join('@' + p for p in firma)}")
+    else:
+        import uvicorn
+        crear_base(args.base, rehacer=args.rehacer)
+        instalar(args.base, args.pool, args.overflow)
+        import main as api
+        print(f"🧪 API sobre la BD emulada {args.base} → http://{args.host}:{args.puerto}")
+        uvicorn.run(api.app, host=args.host, port=args.puerto, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/escenarios.py
+"""
+Perfiles de SP y mezclas de endpoints para benchmarks/carga.py
+
+Latencias / tamaños aproximan lo visto en producción (log de SQL lento,
+/metrics); ajustarlos acá, no en el código de la carga. Los SP que no
+aparecen usan PERFIL_DEFECTO.
+"""
+from benchmarks.driver_falso import PerfilSP, ResultSet
+
+PERFIL_DEFECTO = PerfilSP(latencia_ms=3, filas=10)
+
+_MIEMBRO = (("id", "int"), ("nombres", "str"), ("apellidos", "str"), ("dni", "str"), ("rango", "str"),
+            ("estado", "str"), ("departamento", "str"), ("fecha_ingreso", "fecha"))
+_PUBLICACION = (("idpublicacion", "str"), ("titulo", "str"), ("contenido", "str"), ("foto", "blob"),
+                ("fecha", "fecha"), ("destacada", "bool"), ("activa", "bool"), ("creado_por", "str"))
+_CURSO = (("id_curso", "int"), ("titulo", "str"), ("categoria", "str"), ("modalidad", "str"),
+          ("duracion", "str"), ("fecha_inicio", "fecha"), ("fecha_fin", "fecha"), ("instructor", "str"))
+_TOTAL = ResultSet(columnas=(("total", "int"),), filas=1)
+
+PERFILES = {
+    # --- miembros (admin) ---
+    "SP_GU_LISTAR_MIEMBROS":   PerfilSP(latencia_ms=12, filas=10, columnas=_MIEMBRO, jitter_ms=4),
+    "SP_GU_CONTAR_MIEMBROS":   PerfilSP(latencia_ms=6, filas=1, columnas=(("total", "int"),)),
+    "SP_GU_DETALLE_MIEMBRO":   PerfilSP(
+        latencia_ms=8, filas=1, columnas=_MIEMBRO + (("foto_perfil", "blob"),), blob_bytes=180_000,
+        extra=[ResultSet((("curso", "str"), ("fecha", "fecha")), 6), ResultSet((("evento", "str"), ("fecha", "fecha")), 4)],
+    ),
+    # --- miembros (público) ---
+    "SP_BUSCAR_MIEMBRO":       PerfilSP(latencia_ms=25, filas=5, columnas=_MIEMBRO + (("foto_perfil", "blob"),),
+                                        blob_bytes=120_000, jitter_ms=10),
+    # --- noticias ---
+    "SP_LISTAR_PUBLICACIONES_CON_FILTROS": PerfilSP(latencia_ms=15, filas=9, columnas=_PUBLICACION,
+                                                    blob_bytes=250_000, extra=[_TOTAL], jitter_ms=5),
+    "SP_OBTENER_PUBLICACION_DESTACADA":    PerfilSP(latencia_ms=5, filas=1, columnas=_PUBLICACION, blob_bytes=250_000),
+    "SP_OBTENER_PUBLICACION_POR_ID":       PerfilSP(latencia_ms=4, filas=1, columnas=_PUBLICACION, blob_bytes=250_000),
+    # --- cursos / instructores ---
+    "SP_LISTAR_CURSOSWEB":         PerfilSP(latencia_ms=6, filas=30, columnas=_CURSO),
+    "SP_ObtenerTodosInstructores": PerfilSP(latencia_ms=5, filas=25,
+                                            columnas=(("id", "int"), ("nombre", "str"), ("especialidad", "str"),
+                                                      ("foto", "str"))),
+    # --- dashboard ---
+    "SP_DS_RESUMEN_RANGOS":     PerfilSP(latencia_ms=20, filas=1,
+                                         columnas=(("total_miembros", "int"), ("activos", "int"), ("inactivos", "int"))),
+    "SP_DS_ACTIVIDAD_RECIENTE": PerfilSP(latencia_ms=10, filas=20,
+                                         columnas=(("tipo", "str"), ("descripcion", "str"), ("detalle", "str"),
+                                                   ("fecha", "fecha"))),
+}
+
+# (método, ruta, body JSON o None, peso)
+ESCENARIOS = {
+    "publico": [
+        ("GET",  "/api/noticias/?pagina=1&cantidad_por_pagina=9", None, 4),
+        ("GET",  "/api/noticias/destacada", None, 2),
+        ("GET",  "/api/cursos/activos", None, 3),
+        ("GET",  "/api/instructores/instructores", None, 2),
+        ("POST", "/api/miembros/buscar", {"criterio": "12345678"}, 1),
+    ],
+    "admin": [
+        ("GET", "/api/admin/usuarios/miembros?pagina=1&por_pagina=10", None, 4),
+        ("GET", "/api/admin/usuarios/miembros/7", None, 2),
+        ("GET", "/api/admin/dashboard/", None, 2),
+        ("GET", "/api/admin/dashboard/actividad-reciente?top=20", None, 1),
+        ("GET", "/api/admin/noticias/listar", None, 1),
+    ],
+}
+ESCENARIOS["mixto"] = ESCENARIOS["publico"] + ESCENARIOS["admin"]
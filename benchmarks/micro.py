@@ -0,0 +1,308 @@
+# benchmarks/micro.py
+"""
+Micro-benchmarks de los helpers por fila (los que corren miles de veces por request)
+
+    python -m benchmarks.micro                     # mide y compara contra micro_base.json
+    python -m benchmarks.micro --guardar           # nueva línea base (todos los casos; no admite -k)
+    python -m benchmarks.micro -k serializar_fila  # solo los casos que contienen el texto
+
+- Filas con la forma real de cada SP (columnas, fechas, blobs de 0 / 120 / 180 KB)
+- Los helpers que leen de la BD (Endpointcursos._sp, detalle_miembro) corren sobre
+  benchmarks/driver_falso.py con latencia 0: se mide el código Python, no la red
+- timeit con autorange (≥ 0.2 s por repetición); se compara el mínimo de las
+  repeticiones (el menos ruidoso), se muestra también la mediana
+- Sale con código 1 si algún caso empeoró más que --umbral (10% por defecto)
+- Se comparan µs absolutos. "calibracion/python_puro" (sin código del API) da el
+  factor de máquina como referencia; --escalar divide la base por ese factor, pero
+  solo sirve de guía: los casos que pasan casi todo en C (base64, md5, joins de
+  bytes) no escalan como un bucle de Python
+
+La línea base guarda Python, plataforma y CPU; si no coinciden se avisa y lo
+correcto es regenerarla (--guardar) en esa máquina antes de comparar.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+BASE_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "micro_base.json")
+
+CASOS: dict[str, object] = {}
+
+
+def caso(nombre: str):
+    """Registra un caso: la función prepara los datos y retorna el callable a medir (sin argumentos)."""
+    def registrar(preparar):
+        CASOS[nombre] = preparar
+        return preparar
+    return registrar
+
+
+# =============================================
+# FILAS REPRESENTATIVAS
+# =============================================
+_FECHA = datetime(2024, 3, 15, 9, 30)
+
+
+def _foto(tamano: int) -> bytes:
+    return (b"\xff\xd8\xff\xe0" + bytes(range(256)) * (tamano // 256 + 1))[:tamano]
+
+
+_COLUMNAS_MIEMBRO = ("id", "nombre_completo", "dni", "rango", "estado", "departamento", "jefatura",
+                     "fecha_ingreso", "cursos_certificaciones", "foto_perfil")
+
+
+def _fila_miembro(i: int, foto: bytes | None) -> tuple:
+    return (i, f"Nombre Apellido {i}", f"{10_000_000 + i:08d}", "Teniente", "Activo", "Lima",
+            "Compañía B-15", _FECHA, "BLS, ACLS", foto)
+
+
+_COLUMNAS_CURSO = ("id_curso", "titulo", "categoria", "duracion", "modalidad", "fecha_inicio",
+                   "fecha_fin", "instructor", "capacidad", "inscritos", "estado")
+
+
+class _CursorFijo:
+    """Cursor mínimo: description + fetchall de filas ya armadas."""
+    def __init__(self, columnas, filas):
+        self.description = [(c, None, None, None, None, None, True) for c in columnas]
+        self._filas = filas
+
+    def fetchall(self):
+        return list(self._filas)
+
+
+# =============================================
+# CASOS
+# =============================================
+CALIBRACION = "calibracion/python_puro"
+
+
+@caso(CALIBRACION)
+def _calibracion():
+    """Bucle, dict y str sin nada del API: mide la máquina / intérprete, no el código."""
+    def trabajo():
+        d = {}
+        for i in range(200):
+            d[f"k{i}"] = i * 3 % 7
+        return sum(d.values())
+    return trabajo
+
+
+@caso("serializar_fila/miembro_sin_foto")
+def _serializar_sin_foto():
+    from Endpoint import serializar_fila
+    fila = _fila_miembro(7, None)
+    return lambda: serializar_fila(_COLUMNAS_MIEMBRO, fila)
+
+
+@caso("serializar_fila/miembro_foto_120k")
+def _serializar_con_foto():
+    from Endpoint import serializar_fila
+    fila = _fila_miembro(7, _foto(120_000))
+    return lambda: serializar_fila(_COLUMNAS_MIEMBRO, fila)
+
+
+@caso("generar_hash_id/1_id")
+def _hash_uno():
+    from Indicemiembros import generar_hash_id
+    return lambda: generar_hash_id(123_456)
+
+
+@caso("generar_hash_id/indice_10k")
+def _hash_indice():
+    from Indicemiembros import generar_hash_id
+    ids = range(1, 10_001)
+    return lambda: {generar_hash_id(i): i for i in ids}
+
+
+@caso("filas_como_dicts/miembros_10")
+def _dicts_10():
+    from Conexionsql import filas_como_dicts
+    cursor = _CursorFijo(_COLUMNAS_MIEMBRO, [_fila_miembro(i, None) for i in range(10)])
+    return lambda: filas_como_dicts(cursor)
+
+
+@caso("filas_como_dicts/miembros_1000")
+def _dicts_1000():
+    from Conexionsql import filas_como_dicts
+    cursor = _CursorFijo(_COLUMNAS_MIEMBRO, [_fila_miembro(i, None) for i in range(1000)])
+    return lambda: filas_como_dicts(cursor)
+
+
+@caso("endpointcursos._sp/cursos_30")
+def _cursos_30():
+    import Endpointcursos
+    return lambda: Endpointcursos._sp("SP_BENCH_CURSOS_30", (None, None, "Activo", None))
+
+
+@caso("endpointcursos._sp/cursos_300")
+def _cursos_300():
+    import Endpointcursos
+    return lambda: Endpointcursos._sp("SP_BENCH_CURSOS_300", (None, None, "Activo", None))
+
+
+@caso("detalle_miembro/foto_180k")
+def _detalle_miembro():
+    from adminendpoints.admin_usuarios import detalle_miembro
+    return lambda: detalle_miembro(7)
+
+
+@caso("preparar_perfil/foto_80k")
+def _preparar_perfil():
+    import Perfilesadmin
+    admin = {"admin_id": 1, "username": "admin", "nombre_completo": "Admin General", "email": "admin@cgpvp.pe",
+             "rol": "superadmin", "foto_perfil": _foto(80_000), "activo": True, "ultimo_login": _FECHA}
+    return lambda: Perfilesadmin.preparar_perfil(1, admin)
+
+
+@caso("json/listado_miembros_10")
+def _json_listado():
+    import Metricas
+    from Endpoint import serializar_fila
+    datos = {"status": "SUCCESS", "total": 10,
+             "data": [serializar_fila(_COLUMNAS_MIEMBRO, _fila_miembro(i, None)) for i in range(10)]}
+    return lambda: Metricas.JSONMedido(datos).body
+
+
+def _instalar_bd():
+    from benchmarks.driver_falso import PerfilSP, ResultSet, instalar
+
+    curso = tuple((c, "int" if c in ("id_curso", "capacidad", "inscritos") else
+                   "fecha" if c.startswith("fecha") else "str") for c in _COLUMNAS_CURSO)
+    miembro = (("id", "int"), ("nombres", "str"), ("apellidos", "str"), ("dni", "str"), ("rango", "str"),
+               ("estado", "str"), ("departamento", "str"), ("fecha_ingreso", "fecha"), ("foto_perfil", "blob"))
+    instalar({
+        "SP_BENCH_CURSOS_30": PerfilSP(latencia_ms=0, filas=30, columnas=curso),
+        "SP_BENCH_CURSOS_300": PerfilSP(latencia_ms=0, filas=300, columnas=curso),
+        "SP_GU_DETALLE_MIEMBRO": PerfilSP(
+            latencia_ms=0, filas=1, columnas=miembro, blob_bytes=180_000,
+            extra=[ResultSet((("curso", "str"), ("fecha", "fecha")), 6),
+                   ResultSet((("evento", "str"), ("fecha", "fecha")), 4)],
+        ),
+    }, PerfilSP(latencia_ms=0), sql_suelto=PerfilSP(latencia_ms=0, filas=0, columnas=(("id", "int"),)))
+
+
+# =============================================
+# MEDICIÓN / COMPARACIÓN
+# =============================================
+def medir(funcion, repeticiones: int) -> dict:
+    timer = timeit.Timer(funcion)
+    numero, _ = timer.autorange()
+    por_op = [t / numero for t in timer.repeat(repeticiones, numero)]
+    return {"us_min": round(min(por_op) * 1e6, 3), "us_mediana": round(statistics.median(por_op) * 1e6, 3),
+            "iteraciones": numero}
+
+
+def _procesador() -> str:
+    """Modelo de CPU (en Linux platform.processor() solo dice la arquitectura)."""
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for linea in f:
+                if linea.startswith("model name"):
+                    return linea.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _entorno() -> dict:
+    return {"python": platform.python_version(), "plataforma": platform.platform(),
+            "procesador": _procesador(), "fecha": datetime.now().isoformat(timespec="seconds")}
+
+
+def _avisar_entorno(entorno: dict):
+    actual = _entorno()
+    distintos = [f"{clave}: {entorno.get(clave)} → {actual[clave]}"
+                 for clave in ("python", "plataforma", "procesador") if entorno.get(clave) != actual[clave]]
+    if distintos:
+        print(f"⚠️ Línea base de otro entorno ({'; '.join(distintos)}): los µs no son comparables, "
+              f"regenerarla con --guardar en esta máquina")
+
+
+def factor_maquina(actual: dict, base: dict) -> float:
+    """Cuánto más lenta (>1) o rápida (<1) es esta corrida que la base, según la calibración."""
+    if CALIBRACION in actual and CALIBRACION in base:
+        return actual[CALIBRACION]["us_min"] / base[CALIBRACION]["us_min"]
+    return 1.0
+
+
+def comparar(actual: dict, base: dict, umbral: float, escalar: bool = False) -> list[str]:
+    """Imprime la tabla y retorna los casos que empeoraron más que `umbral` (µs absolutos salvo `escalar`)."""
+    regresiones = []
+    factor = factor_maquina(actual, base)
+    if CALIBRACION in actual and CALIBRACION in base:
+        print(f"\n📏 Factor de máquina (calibración): ×{factor:.3f}"
+              + (" — base escalada (--escalar)" if escalar else ""))
+    if not escalar:
+        factor = 1.0
+    print(f"\n{'caso':36} {'µs/op':>11} {'mediana':>11} {'base':>11} {'cambio':>9}")
+    for nombre, medicion in actual.items():
+        referencia = base.get(nombre)
+        if referencia is None:
+            print(f"{nombre:36} {medicion['us_min']:>11.2f} {medicion['us_mediana']:>11.2f} {'—':>11} {'nuevo':>9}")
+            continue
+        if nombre == CALIBRACION:
+            print(f"{nombre:36} {medicion['us_min']:>11.2f} {medicion['us_mediana']:>11.2f} "
+                  f"{referencia['us_min']:>11.2f} {'(ref)':>9}")
+            continue
+        escalada = referencia["us_min"] * factor
+        cambio = medicion["us_min"] / escalada - 1
+        marca = "🔴" if cambio > umbral else "🟢" if cambio < -umbral else "⚪"
+        if cambio > umbral:
+            regresiones.append(nombre)
+        print(f"{nombre:36} {medicion['us_min']:>11.2f} {medicion['us_mediana']:>11.2f} "
+              f"{escalada:>11.2f} {cambio * 100:>+8.1f}% {marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de los helpers por fila")
+    parser.add_argument("-k", dest="filtro", default="", help="solo los casos que contienen este texto")
+    parser.add_argument("--repeticiones", type=int, default=7)
+    parser.add_argument("--base", default=BASE_DEFECTO, help="archivo de la línea base")
+    parser.add_argument("--guardar", action="store_true", help="guardar esta corrida como línea base")
+    parser.add_argument("--umbral", type=float, default=0.10, help="empeoramiento tolerado (0.10 = 10%%)")
+    parser.add_argument("--escalar", action="store_true",
+                        help="escalar la base por el factor de calibración (aproximado, ver docstring)")
+    args = parser.parse_args()
+    if args.guardar and args.filtro:
+        parser.error("--guardar mide todos los casos: no se combina con -k (la base mezclaría dos corridas)")
+
+    os.environ.setdefault("DATOS_LOCALES_DIR", tempfile.mkdtemp(prefix="benchmark-"))
+    os.environ.setdefault("ADMIN_TOKEN_SECRET", "benchmark")
+    os.environ.setdefault("SQL_MUESTREO", "0")
+    os.environ.setdefault("SQL_LENTO_MS", "1e12")
+    _instalar_bd()
+
+    seleccion = {n: p for n, p in CASOS.items() if args.filtro in n or n == CALIBRACION}
+    print(f"⏱️ {len(seleccion)} casos, {args.repeticiones} repeticiones (Python {platform.python_version()})...")
+    actual = {}
+    for nombre, preparar in seleccion.items():
+        actual[nombre] = medir(preparar(), args.repeticiones)
+
+    base = {}
+    if os.path.exists(args.base):
+        with open(args.base, encoding="utf-8") as f:
+            guardada = json.load(f)
+        base = guardada.get("casos", {})
+        _avisar_entorno(guardada.get("entorno", {}))
+    regresiones = comparar(actual, base, args.umbral, args.escalar)
+
+    if args.guardar:
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump({"entorno": _entorno(), "casos": actual}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"\n💾 Línea base guardada en {args.base}")
+    elif regresiones:
+        print(f"\n🔴 {len(regresiones)} caso(s) más de {args.umbral:.0%} más lentos que la línea base: "
+              f"{', '.join(regresiones)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
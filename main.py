@@ -3,18 +3,30 @@
 API Principal del Sistema CGPVP2
 Consolida todos los endpoints de la aplicación
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.datastructures import MutableHeaders
 import uvicorn
 import asyncio
-from Cargadatosfacebook import escanear_y_guardar_db
-from datetime import datetime
+import json
+import os
+import time
+import Actividadreciente
+import Indicemiembros
+import Indiceunicidad
+import Contadoreskpi
+import Ejecutorscraper
+import Estadisticassql
+import Metricas
+import Outboxcorreo
+import Programador
+from Sesionadmin import requerir_sesion
 
 # ── Módulos públicos / existentes ──────────────────────────────────────────────
 from Endpointcursos       import app as cursos_app
 from Endpointnoticias     import app as noticias_app
-from Endpointregistroweb  import router as registro_router
+from Endpointregistroweb  import router as registro_router, iniciar_cola_registro
 from EnpointInstructores  import app as instructores_app
 from Endpoint             import app as miembros_app
 from EndpointLoginAdmin   import app as login_admin_app
@@ -27,7 +39,10 @@ from adminendpoints.admin_cursos       import app as admin_cursos_app
 from adminendpoints.admin_eventos      import router as admin_eventos_router  # 🔥 ROUTER, no app
 from adminendpoints.admin_noticias     import router  as admin_noticias_router
 from adminendpoints.admin_reportes     import app as admin_reportes_app
-from adminendpoints.admin_perfil       import router as admin_perfil_router
+from adminendpoints.admin_perfil       import router as admin_perfil_router, router_publico as admin_perfil_foto_router
+from adminendpoints.admin_programador  import router as admin_programador_router
+from adminendpoints.admin_scraper      import router as admin_scraper_router
+from adminendpoints.admin_diagnostico  import router as admin_diagnostico_router
 
 # =============================================
 # CONFIGURACIÓN DE LA APLICACIÓN PRINCIPAL
@@ -38,6 +53,7 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=Metricas.JSONMedido,
 )
 
 # =============================================
@@ -51,6 +67,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Ruta (plantilla) del request en curso → etiqueta "ruta" de las métricas por SP
+app.add_middleware(Metricas.OrigenMiddleware)
+
+
+# =============================================
+# SERVER-TIMING (desglose del request en las devtools → Network → Timing)
+# =============================================
+# db-espera (pool), db-exec, db-fetch, db-serial (filas → dicts), base64 (fotos), json, total.
+# SERVER_TIMING_LOG_MS=N → además una línea JSON por request que tarde ≥ N ms (0 = todos).
+# Modo diagnóstico (Estadisticassql.py): + sql-cpu / sql-elapsed y el header X-SQL-Stats.
+SERVER_TIMING_LOG_MS = os.getenv("SERVER_TIMING_LOG_MS")
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        tiempos, token = Metricas.iniciar_tiempos()
+        estadisticas = Estadisticassql.activar() if Estadisticassql.solicitado(scope) else None
+        inicio = time.perf_counter()
+
+        async def _send(mensaje):
+            if mensaje["type"] == "http.response.start":
+                total = time.perf_counter() - inicio
+                headers = MutableHeaders(scope=mensaje)
+                headers.append("Server-Timing", Metricas.server_timing(tiempos, total))
+                headers.append("Timing-Allow-Origin", "*")
+                if estadisticas is not None and (resumen := Estadisticassql.header()):
+                    headers.append("X-SQL-Stats", resumen)
+                if SERVER_TIMING_LOG_MS is not None and total * 1000 >= float(SERVER_TIMING_LOG_MS):
+                    print(json.dumps({
+                        "server_timing": Metricas.origen_actual(),
+                        "status": mensaje["status"],
+                        "total_ms": round(total * 1000, 1),
+                        "fases_ms": {f: round(s * 1000, 1) for f, (s, _) in tiempos.items()},
+                    }, ensure_ascii=False))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            if estadisticas is not None:
+                Estadisticassql.desactivar(estadisticas)
+            Metricas.terminar_tiempos(token)
+
+
+app.add_middleware(ServerTimingMiddleware)
+
 
 # =============================================
 # ENDPOINTS RAÍZ / HEALTHCHECK
@@ -77,6 +145,9 @@ def home():
             "eventos":       "/api/admin/eventos",
             "noticias":      "/api/admin/noticias",
             "reportes":      "/api/admin/reportes",
+            "programador":   "/api/admin/programador",
+            "scraper":       "/api/admin/scraper",
+            "diagnostico":   "/api/admin/diagnostico",
         },
         "documentacion": {
             "swagger": "/docs",
@@ -90,6 +161,18 @@ def health_check():
     return {"status": "healthy", "database": "connected"}
 
 
+# Si está en el .env, Prometheus debe mandar "Authorization: Bearer <METRICAS_TOKEN>"
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN")
+
+
+@app.get("/metrics", tags=["Sistema"], include_in_schema=False)
+def metricas(request: Request):
+    """Formato de texto de Prometheus: latencia / filas / bytes / errores por SP y ruta + pool de conexiones."""
+    if METRICAS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICAS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Token de métricas inválido")
+    return PlainTextResponse(Metricas.exportar(), media_type="text/plain; version=0.0.4")
+
+
 # =============================================
 # MÓDULOS PÚBLICOS / EXISTENTES
 # =============================================
@@ -108,10 +191,17 @@ app.include_router(registro_router, prefix="/api/registro", tags=["Registro Web"
 # 🔥 IMPORTANTE: include_router con prefix ANTES de mount
 # Estas rutas usan APIRouter y necesitan prefix explícito
 
-app.include_router(admin_dashboard_router, prefix="/api/admin/dashboard", tags=["Admin - Dashboard"])
-app.include_router(admin_perfil_router, prefix="/api/admin/perfil", tags=["Admin - Perfil"])
-app.include_router(admin_eventos_router, prefix="/api/admin/eventos")  # 🔥 EVENTOS CON PREFIX
-app.include_router(admin_noticias_router, prefix="/api/admin/noticias", tags=["Admin - Noticias"])
+# 🔐 Sesión admin verificada en proceso (token firmado) para todos los routers admin
+sesion_admin = [Depends(requerir_sesion)]
+
+app.include_router(admin_dashboard_router, prefix="/api/admin/dashboard", tags=["Admin - Dashboard"], dependencies=sesion_admin)
+app.include_router(admin_perfil_router, prefix="/api/admin/perfil", tags=["Admin - Perfil"], dependencies=sesion_admin)
+app.include_router(admin_perfil_foto_router, prefix="/api/admin/perfil", tags=["Admin - Perfil"])  # <img>: sin token
+app.include_router(admin_eventos_router, prefix="/api/admin/eventos", dependencies=sesion_admin)  # 🔥 EVENTOS CON PREFIX
+app.include_router(admin_noticias_router, prefix="/api/admin/noticias", tags=["Admin - Noticias"], dependencies=sesion_admin)
+app.include_router(admin_programador_router, prefix="/api/admin/programador", dependencies=sesion_admin)
+app.include_router(admin_scraper_router, prefix="/api/admin/scraper", dependencies=sesion_admin)
+app.include_router(admin_diagnostico_router, prefix="/api/admin/diagnostico", dependencies=sesion_admin)
 # Ahora las sub-aplicaciones con mount
 app.mount("/api/admin/usuarios",     admin_usuarios_app)
 app.mount("/api/admin/instructores", admin_instructores_app)
@@ -146,31 +236,58 @@ async def internal_error_handler(request, exc):
     )
 
 # =============================================
-# PROGRAMADOR DE TAREAS (MODO SEGURO)
-# =============================================
-async def reloj_programador_fb():
-    """Reloj que chequea la hora cada minuto"""
-    print("⏰ Reloj de Facebook activado en segundo plano...")
-    while True:
-        ahora = datetime.now()
-        # Si es la 1:00 AM
-        if ahora.hour == 00 and ahora.minute == 26:
-            print(f"🔥 {ahora} - ¡Es la hora, Rey! Iniciando bot...")
-            try:
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, escanear_y_guardar_db)
-                print("✅ Tarea completada con éxito.")
-            except Exception as e:
-                print(f"❌ Error en la tarea programada: {e}")
-            
-            await asyncio.sleep(61)
-        
-        await asyncio.sleep(30)
+# PROGRAMADOR DE TAREAS (ver Programador.py)
+# =============================================
+# Bot de Facebook: un solo worker por disparo (lock en SQLite compartido),
+# en un proceso aparte con límites de tiempo / memoria (Ejecutorscraper.py)
+FB_CRON   = os.getenv("FB_CRON", "26 0 * * *")
+FB_JITTER = float(os.getenv("FB_JITTER", "120"))
+
+Programador.registrar_tarea("facebook", FB_CRON, Ejecutorscraper.ejecutar_scraper_aislado, jitter=FB_JITTER,
+                            max_duracion=Ejecutorscraper.SCRAPER_TIMEOUT + 2 * Ejecutorscraper.GRACIA)
+Programador.registrar_tarea("purgar-historial", "40 3 * * *", Programador.purgar_historial)
+# Contadores KPI: un worker corre los SP y publica el resultado; cada worker lo compara con lo suyo
+Programador.registrar_tarea("contadores-kpi", "*/5 * * * *", Contadoreskpi.reconciliar, unica=True)
+Programador.registrar_tarea("contadores-kpi-revisar", "* * * * *", Contadoreskpi.revisar_referencia, unica=False)
+# Caches en memoria: se refrescan en CADA worker (escrituras de otros workers / directas en la BD)
+Programador.registrar_tarea("indices-unicidad", "*/10 * * * *", Indiceunicidad.cargar_todo, jitter=30, unica=False)
+
+
+async def construir_indices():
+    """Carga masiva de índices en memoria (sin bloquear el event loop)"""
+    loop = asyncio.get_event_loop()
+    try:
+        total = await loop.run_in_executor(None, Indicemiembros.construir_indice)
+        print(f"⚡ Índice hash→miembro listo: {total} miembros.")
+    except Exception as e:
+        print(f"⚠️ No se pudo construir el índice de miembros (se usará el SP por hash): {e}")
+
+    try:
+        total = await loop.run_in_executor(None, Actividadreciente.sembrar)
+        print(f"⚡ Actividad reciente en memoria: {total} items.")
+    except Exception as e:
+        print(f"⚠️ No se pudo sembrar la actividad reciente (se usará el SP): {e}")
+
+    # Siembra inicial; después los refresca el programador (contadores-kpi / indices-unicidad)
+    try:
+        await loop.run_in_executor(None, Contadoreskpi.reconciliar)
+    except Exception as e:
+        print(f"⚠️ No se pudieron sembrar los contadores KPI (se usarán los SP): {e}")
+    try:
+        resumen = await loop.run_in_executor(None, Indiceunicidad.cargar_todo)
+        print(f"⚡ Índices de unicidad cargados: {resumen}")
+    except Exception as e:
+        print(f"⚠️ No se pudieron cargar los índices de unicidad: {e}")
+
 
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(reloj_programador_fb())
-    print("🚀 Programador iniciado: El bot correrá a la 01:00 AM diariamente.")
+    asyncio.create_task(construir_indices())
+    Estadisticassql.iniciar_refresco()    # toggle global de STATISTICS IO/TIME, fuera del request
+    Programador.iniciar()
+    iniciar_cola_registro()
+    Outboxcorreo.iniciar_sender()   # correos que quedaron pendientes de la corrida anterior
+    print(f"🚀 Programador iniciado: el bot de Facebook corre con cron '{FB_CRON}'.")
 
 # =============================================
 # ARRANQUE DEL SERVIDOR
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Los módulos del API están en la raíz del repo; lo local (SQLite, logs) va a una carpeta temporal
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATOS_LOCALES_DIR", tempfile.mkdtemp(prefix="tests-"))
@@ -0,0 +1,80 @@
+# tests/test_extractorfacebook.py
+"""
+Extracción offline contra los snapshots de fixtures_facebook/ (FB_FUENTE=fixture)
+
+    01-feed.html   → post fijado (ya sincronizado), nuevo con comentarios anidados,
+                     nuevo truncado en "Ver más", nuevo con el texto en <p>
+    02-scroll.html → repite el último post y sigue con los ya sincronizados
+"""
+import os
+
+import pytest
+
+from Extractorfacebook import extraer_posts, recorrer
+from Fuentesfacebook import FB_FIXTURES_DIR, FuenteFixture
+
+SINCRONIZADOS = {"9000", "0903", "0902", "0901"}
+
+
+def _leer(nombre: str) -> str:
+    with open(os.path.join(FB_FIXTURES_DIR, nombre), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_extraer_posts_del_feed():
+    posts = extraer_posts(_leer("01-feed.html"))
+
+    assert [p["id_post"] for p in posts] == ["9000", "1003", "1002", "1001"]
+    fijado = posts[0]
+    assert fijado["contenido"] == "Convocatoria permanente de voluntarios."
+    assert not fijado["truncado"]
+
+
+def test_comentarios_anidados_no_son_parte_del_post():
+    posts = extraer_posts(_leer("01-feed.html"))
+    post = posts[1]
+
+    assert post["contenido"] == ("Simulacro de rescate en altura este sábado.\n"
+                                 "Inscripciones en la estación central.")
+    assert "Comentario" not in post["contenido"] and "Respuesta" not in post["contenido"]
+    assert post["foto_url"] == "https://scontent.example.net/v/t39/foto-1003.jpg"
+    assert len(posts) == 4   # los article de los comentarios no cuentan como posts
+
+
+def test_ver_mas_marca_truncado():
+    post = extraer_posts(_leer("01-feed.html"))[2]
+
+    assert post["truncado"]
+    assert post["contenido"].endswith("Ver más")
+
+
+def test_texto_desde_parrafos_sin_mensaje():
+    post = extraer_posts(_leer("01-feed.html"))[3]
+
+    assert post["contenido"] == ("Gracias a todas las compañías que participaron en la campaña.\n"
+                                 "¡Nos vemos en la próxima!")
+    assert post["foto_url"] is None
+
+
+def test_recorrer_para_en_lo_sincronizado():
+    posts, completo = recorrer(FuenteFixture().paginas(), SINCRONIZADOS, max_posts=25)
+
+    # el fijado (ya sincronizado) no corta; el repetido entre páginas sale una vez; 0800 no se alcanza
+    assert [p["id_post"] for p in posts] == ["1003", "1002", "1001"]
+    assert completo
+
+
+def test_recorrer_sin_lo_sincronizado_llega_al_tope():
+    posts, completo = recorrer(FuenteFixture().paginas(), {"1999"}, max_posts=5)
+
+    assert [p["id_post"] for p in posts] == ["9000", "1003", "1002", "1001", "0903"]
+    assert not completo
+
+
+def test_fixture_inexistente_falla_claro(tmp_path):
+    fuente = FuenteFixture(str(tmp_path / "no_existe"))
+
+    with pytest.raises(FileNotFoundError, match="FB_FIXTURES_DIR"):
+        fuente.abrir()
+    with pytest.raises(FileNotFoundError, match="no tiene snapshots"):
+        FuenteFixture(str(tmp_path)).abrir()